@@ -1,13 +1,151 @@
 # -*- coding: utf-8 -*-
 
+import functools
+import logging
 import re
-from odoo import api, models
+import threading
+
+from odoo import api, fields, models, _
+from odoo.osv import expression
+from odoo.tools import split_every
+from odoo.tools.lru import LRU
 from odoo.addons.phone_validation.tools import phone_validation
 
+_logger = logging.getLogger(__name__)
+
+# Distinct (number, country) pairs kept by the formatting memo.
+PHONE_FORMAT_CACHE_SIZE = 65536
+
+# Partners formatted per SQL update (and per commit outside of tests).
+PHONE_FORMAT_CHUNK_SIZE = 5000
+
+# Context flags changing a partner's display name, in key order.
+DISPLAY_NAME_FLAGS = (
+    'show_address', 'partner_show_db_id', 'address_inline',
+    'show_email', 'show_vat', 'show_phone',
+)
+
+# Fields read by the address part of the display name. The memo keys on
+# the rendered address instead, which also reflects state and country
+# names and the country's address format.
+ADDRESS_KEY_FIELDS = ['street', 'street2', 'zip', 'city', 'state_id', 'country_id']
+
+# Display name memo: {(dbname, lang, flags, partner id, *field values):
+# label}. Keyed by the values the label is built from, so it never goes
+# stale; the LRU bound only caps memory.
+DISPLAY_NAME_CACHE_SIZE = 20000
+_display_name_memo = LRU(DISPLAY_NAME_CACHE_SIZE)
+
+# What a phone number typed in a search box looks like.
+PHONE_QUERY_RE = re.compile(r'^\+?[\d\s().\-/]+$')
+PHONE_QUERY_MIN_DIGITS = 6
+
+
+@functools.lru_cache(maxsize=PHONE_FORMAT_CACHE_SIZE)
+def format_national(number, country_code, country_phone_code=None):
+    """NATIONAL format of `number` for the given country, or None when it
+    does not parse. Memoized: imports and bulk runs see the same numbers
+    and country over and over, and parsing dominates their cost."""
+    return phone_validation.phone_format(
+        number,
+        country_code,
+        country_phone_code,
+        force_format='NATIONAL',
+        raise_exception=False,
+    )
+
+
+@functools.lru_cache(maxsize=PHONE_FORMAT_CACHE_SIZE)
+def format_e164(number, country_code, country_phone_code=None):
+    """E.164 form of `number` ("+33612345678"), or None when it does not
+    parse. Memoized like format_national."""
+    return phone_validation.phone_format(
+        number,
+        country_code,
+        country_phone_code,
+        force_format='E164',
+        raise_exception=False,
+    )
+
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
+    phone_e164 = fields.Char(
+        string="Téléphone (E.164)",
+        compute='_compute_phone_e164',
+        store=True,
+        index='btree_not_null',
+        help="Numéro normalisé utilisé pour retrouver un client par téléphone, "
+             "quelle que soit la façon dont il a été saisi.",
+    )
+    mobile_e164 = fields.Char(
+        string="Mobile (E.164)",
+        compute='_compute_phone_e164',
+        store=True,
+        index='btree_not_null',
+    )
+    phone_lookup = fields.Char(
+        string="Téléphone ou mobile",
+        compute='_compute_phone_lookup',
+        search='_search_phone_lookup',
+    )
+
+    @api.depends('phone', 'mobile', 'country_id')
+    def _compute_phone_e164(self):
+        company_country = self.env.company.country_id
+        for partner in self:
+            country = partner.country_id or company_country
+            country_code = country.code or 'FR'
+            phone_code = country.phone_code or None
+            partner.phone_e164 = partner.phone and format_e164(partner.phone, country_code, phone_code) or False
+            partner.mobile_e164 = partner.mobile and format_e164(partner.mobile, country_code, phone_code) or False
+
+    def _compute_phone_lookup(self):
+        for partner in self:
+            partner.phone_lookup = partner.mobile or partner.phone
+
+    def _search_phone_lookup(self, operator, value):
+        key = operator in ('=', 'ilike') and isinstance(value, str) \
+            and self._get_phone_lookup_key(value)
+        if key:
+            return self._get_phone_lookup_domain(key)
+        if operator in expression.NEGATIVE_TERM_OPERATORS:
+            return ['&', ('phone', operator, value), ('mobile', operator, value)]
+        return ['|', ('phone', operator, value), ('mobile', operator, value)]
+
+    @api.model
+    def _get_phone_lookup_key(self, query):
+        """E.164 key of a number typed by a user, read with the company's
+        country when it has no international prefix; None when `query`
+        does not look like a phone number."""
+        query = (query or '').strip()
+        if not PHONE_QUERY_RE.match(query) \
+                or sum(c.isdigit() for c in query) < PHONE_QUERY_MIN_DIGITS:
+            return None
+        country = self.env.company.country_id
+        return format_e164(query, country.code or 'FR', country.phone_code or None)
+
+    @api.model
+    def _get_phone_lookup_domain(self, key):
+        return ['|', ('phone_e164', '=', key), ('mobile_e164', '=', key)]
+
+    @api.model
+    def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
+        """A phone number finds its partners through the E.164 index,
+        whatever its formatting; anything else (or a number nobody has)
+        goes through the standard search."""
+        if operator in ('ilike', '=', '=ilike') and name:
+            key = self._get_phone_lookup_key(name)
+            if key:
+                partners = self.search(
+                    expression.AND([domain or [], self._get_phone_lookup_domain(key)]),
+                    limit=limit, order=order,
+                )
+                if partners:
+                    return partners.ids
+        return super()._name_search(name, domain=domain, operator=operator, limit=limit, order=order)
+
     @api.onchange('phone', 'country_id', 'company_id')
     def _onchange_phone_validation(self):
         """Override to use NATIONAL format instead of INTERNATIONAL."""
@@ -45,7 +183,7 @@ class ResPartner(models.Model):
         Returns:
             Dictionary with formatted phone numbers
         """
-        if not vals:
+        if not vals or not (vals.get('phone') or vals.get('mobile')):
             return vals
 
         vals = vals.copy()
@@ -94,61 +232,24 @@ class ResPartner(models.Model):
         if not number:
             return None
 
-        formatted = phone_validation.phone_format(
-            number,
-            country_code,
-            None,
-            force_format='NATIONAL',
-            raise_exception=False,
-        )
-
-        return formatted
+        return format_national(number, country_code)
 
     def action_format_phone_numbers(self):
         """
         Bulk action to format all phone/mobile numbers to NATIONAL format.
 
-        Can be called from server action on selected partners.
+        Can be called from server action on selected partners. Progress is
+        logged and pushed to the user after each chunk. The numbers are
+        written in SQL, so write access is checked first, and nothing is
+        committed before the action returns: a failing chunk rolls back
+        the whole selection.
 
         Returns:
             Client action to show notification with count of updated records
         """
-        count = 0
-
-        for partner in self:
-            vals = {}
-            country = partner.country_id or self.env.company.country_id
-            country_code = country.code or 'FR'
-            country_phone_code = country.phone_code if country else None
-
-            # Format phone field
-            if partner.phone:
-                formatted = phone_validation.phone_format(
-                    partner.phone,
-                    country_code,
-                    country_phone_code,
-                    force_format='NATIONAL',
-                    raise_exception=False,
-                )
-                if formatted and formatted != partner.phone:
-                    vals['phone'] = formatted
-
-            # Format mobile field
-            if partner.mobile:
-                formatted = phone_validation.phone_format(
-                    partner.mobile,
-                    country_code,
-                    country_phone_code,
-                    force_format='NATIONAL',
-                    raise_exception=False,
-                )
-                if formatted and formatted != partner.mobile:
-                    vals['mobile'] = formatted
-
-            # Update partner if any field was formatted
-            if vals:
-                partner.with_context(skip_phone_format=True).write(vals)
-                count += 1
+        self.check_access_rights('write')
+        self.check_access_rule('write')
+        count = self._format_phone_numbers_bulk(notify_progress=True, auto_commit=False)
 
         # Return notification
         return {
@@ -161,29 +262,161 @@ class ResPartner(models.Model):
             }
         }
 
-    @api.depends('complete_name', 'email', 'vat', 'state_id', 'country_id', 'commercial_company_name')
+    def _get_phone_format_rows(self):
+        """(id, phone, mobile, phone_e164, mobile_e164, country code,
+        country phone code) of the partners of `self` having a number, in
+        one query. Partners without country use the company's, then
+        France."""
+        company_country = self.env.company.country_id
+        self.flush_recordset(['phone', 'mobile', 'phone_e164', 'mobile_e164', 'country_id'])
+        self.env.cr.execute("""
+            SELECT p.id, p.phone, p.mobile, p.phone_e164, p.mobile_e164,
+                   COALESCE(c.code, %s), COALESCE(c.phone_code, %s)
+              FROM res_partner p
+              LEFT JOIN res_country c ON c.id = p.country_id
+             WHERE p.id = ANY(%s)
+               AND (p.phone IS NOT NULL OR p.mobile IS NOT NULL)
+        """, [
+            company_country.code or 'FR',
+            company_country.phone_code or None,
+            self.ids,
+        ])
+        return self.env.cr.fetchall()
+
+    def _format_phone_numbers_bulk(self, chunk_size=PHONE_FORMAT_CHUNK_SIZE,
+                                   notify_progress=False, auto_commit=None):
+        """Format the numbers of `self` to NATIONAL format, chunk by chunk:
+        one read and one UPDATE per chunk, committed after each chunk
+        unless `auto_commit` is False (default: outside of tests).
+        Returns the number of partners changed.
+
+        Formatting only changes how a number is written, not the number,
+        so the fields derived from it (phone_sanitized...) stay valid and
+        the update goes straight to SQL. The E.164 keys are refreshed on
+        the way, which also fills them for numbers imported in SQL."""
+        if auto_commit is None:
+            auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        total = len(self)
+        done = count = 0
+        for chunk in split_every(chunk_size, self.ids, self.browse):
+            updates = []
+            for partner_id, phone, mobile, phone_key, mobile_key, country_code, phone_code \
+                    in chunk._get_phone_format_rows():
+                new_phone = (phone and format_national(phone, country_code, phone_code)) or phone
+                new_mobile = (mobile and format_national(mobile, country_code, phone_code)) or mobile
+                new_phone_key = (phone and format_e164(phone, country_code, phone_code)) or None
+                new_mobile_key = (mobile and format_e164(mobile, country_code, phone_code)) or None
+                if (new_phone, new_mobile, new_phone_key, new_mobile_key) \
+                        != (phone, mobile, phone_key, mobile_key):
+                    updates.append((partner_id, new_phone, new_mobile, new_phone_key, new_mobile_key))
+            if updates:
+                chunk._write_formatted_phones(updates)
+                count += len(updates)
+            done += len(chunk)
+            _logger.info("Phone formatting: %d/%d partners, %d changed", done, total, count)
+            if notify_progress and done < total:
+                self._notify_phone_format_progress(done, total, count)
+            if auto_commit:
+                self.env.cr.commit()
+        return count
+
+    def _write_formatted_phones(self, updates):
+        """Store [(id, phone, mobile, phone_e164, mobile_e164)] in one
+        UPDATE."""
+        ids, phones, mobiles, phone_keys, mobile_keys = zip(*updates)
+        self.env.cr.execute("""
+            UPDATE res_partner p
+               SET phone = v.phone,
+                   mobile = v.mobile,
+                   phone_e164 = v.phone_e164,
+                   mobile_e164 = v.mobile_e164,
+                   write_uid = %s,
+                   write_date = now() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::varchar[], %s::varchar[])
+                   AS v(id, phone, mobile, phone_e164, mobile_e164)
+             WHERE p.id = v.id
+        """, [self.env.uid, list(ids), list(phones), list(mobiles),
+              list(phone_keys), list(mobile_keys)])
+        self.browse(ids).invalidate_recordset([
+            'phone', 'mobile', 'phone_e164', 'mobile_e164',
+            'write_uid', 'write_date', 'display_name',
+        ])
+
+    def _notify_phone_format_progress(self, done, total, count):
+        self.env['bus.bus']._sendone(self.env.user.partner_id, 'simple_notification', {
+            'title': _("Formatage en cours"),
+            'message': _("%(done)s / %(total)s contacts traités, %(count)s formatés.") % {
+                'done': done, 'total': total, 'count': count,
+            },
+        })
+
+    @api.depends('complete_name', 'email', 'phone', 'vat', 'street', 'street2', 'zip', 'city',
+                 'state_id', 'country_id', 'commercial_company_name')
     @api.depends_context('show_address', 'partner_show_db_id', 'address_inline', 'show_email', 'show_vat', 'show_phone', 'lang')
     def _compute_display_name(self):
         """
         Override display name computation to:
         - Display email on new line instead of inline <email> format
         - Add phone number when show_phone context is set
+
+        With any of the display contexts set (partner pickers), labels are
+        memoized per partner and context, keyed by the values they are
+        built from (the rendered address for show_address), so an edit
+        simply misses the memo; the fields are fetched for the whole batch
+        in one read first.
         """
+        flags = tuple(bool(self._context.get(flag)) for flag in DISPLAY_NAME_FLAGS)
+        if not any(flags):
+            for partner in self:
+                partner.display_name = partner._build_display_name()
+            return
+
+        show_address, _db_id, _inline, show_email, show_vat, show_phone = flags
+        fnames = ['name', 'type', 'complete_name']
+        if show_address:
+            fnames += ADDRESS_KEY_FIELDS
+        if show_email:
+            fnames.append('email')
+        if show_phone:
+            fnames.append('phone')
+        if show_vat:
+            fnames.append('vat')
+        stored = self.filtered(lambda p: isinstance(p.id, int))
+        stored.fetch(fnames)
+        key_fnames = [f for f in fnames if f not in ADDRESS_KEY_FIELDS]
+
+        prefix = (self.env.cr.dbname, self.env.lang, flags)
         for partner in self:
-            name = partner.with_context(lang=self.env.lang)._get_complete_name()
-            if partner._context.get('show_address'):
-                name = name + "\n" + partner._display_address(without_company=True)
-            name = re.sub(r'\s+\n', '\n', name)
-            if partner._context.get('partner_show_db_id'):
-                name = f"{name} ({partner.id})"
-            if partner._context.get('address_inline'):
-                splitted_names = name.split("\n")
-                name = ", ".join([n for n in splitted_names if n.strip()])
-            if partner._context.get('show_email') and partner.email:
-                name = name + "\n" + partner.email
-            if partner._context.get('show_phone') and partner.phone:
-                name = name + "\n" + partner.phone
-            if partner._context.get('show_vat') and partner.vat:
-                name = f"{name} ‒ {partner.vat}"
-
-            partner.display_name = name.strip()
+            if partner not in stored:  # onchange record: nothing to key on
+                partner.display_name = partner._build_display_name()
+                continue
+            key = prefix + (partner.id,) + tuple(
+                partner._fields[f].convert_to_cache(partner[f], partner) for f in key_fnames
+            )
+            if show_address:
+                key += (partner._display_address(without_company=True),)
+            name = _display_name_memo.get(key)
+            if name is None:
+                name = partner._build_display_name()
+                _display_name_memo[key] = name
+            partner.display_name = name
+
+    def _build_display_name(self):
+        self.ensure_one()
+        partner = self
+        name = partner.with_context(lang=self.env.lang)._get_complete_name()
+        if partner._context.get('show_address'):
+            name = name + "\n" + partner._display_address(without_company=True)
+        name = re.sub(r'\s+\n', '\n', name)
+        if partner._context.get('partner_show_db_id'):
+            name = f"{name} ({partner.id})"
+        if partner._context.get('address_inline'):
+            splitted_names = name.split("\n")
+            name = ", ".join([n for n in splitted_names if n.strip()])
+        if partner._context.get('show_email') and partner.email:
+            name = name + "\n" + partner.email
+        if partner._context.get('show_phone') and partner.phone:
+            name = name + "\n" + partner.phone
+        if partner._context.get('show_vat') and partner.vat:
+            name = f"{name} ‒ {partner.vat}"
+        return name.strip()
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_phone_lookup
+from . import test_display_name
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install', 'partner_custom')
+class TestDisplayName(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.france = cls.env.ref('base.fr')
+        cls.env.company.country_id = cls.france
+        cls.state = cls.env['res.country.state'].create({
+            'name': 'Région Test', 'code': 'RTX', 'country_id': cls.france.id,
+        })
+        cls.partner = cls.env['res.partner'].create({
+            'name': 'Claire Petit',
+            'phone': '01 23 45 67 89',
+            'street': '1 rue des Lilas',
+            'zip': '75001',
+            'city': 'Paris',
+            'state_id': cls.state.id,
+            'country_id': cls.france.id,
+        })
+
+    def _label(self, **flags):
+        partner = self.partner.with_context(**flags)
+        partner.invalidate_recordset(['display_name'])
+        return partner.display_name
+
+    def test_label_follows_phone_edit(self):
+        self.assertIn('01 23 45 67 89', self._label(show_phone=True))
+        self.partner.phone = '01 98 76 54 32'
+        label = self.partner.with_context(show_phone=True).display_name
+        self.assertIn('01 98 76 54 32', label)
+        self.assertNotIn('01 23 45 67 89', label)
+
+    def test_label_follows_address_edit(self):
+        self.assertIn('1 rue des Lilas', self._label(show_address=True))
+        self.partner.street = '8 avenue Foch'
+        label = self.partner.with_context(show_address=True).display_name
+        self.assertIn('8 avenue Foch', label)
+        self.assertNotIn('Lilas', label)
+
+    def test_label_follows_state_and_country_changes(self):
+        self.france.address_format = "%(street)s\n%(zip)s %(city)s %(state_name)s\n%(country_name)s"
+        self.assertIn('Région Test', self._label(show_address=True))
+        self.state.name = 'Région Renommée'
+        self.assertIn('Région Renommée', self._label(show_address=True))
+        self.france.address_format = "%(street)s\n%(city)s %(zip)s\n%(country_name)s"
+        self.assertIn('Paris 75001', self._label(show_address=True))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import AccessError
+from odoo.tests.common import TransactionCase, new_test_user, tagged
+
+
+@tagged('-at_install', 'post_install', 'partner_custom')
+class TestPhoneLookup(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.france = cls.env.ref('base.fr')
+        cls.env.company.country_id = cls.france
+        cls.Partner = cls.env['res.partner']
+        cls.dupont = cls.Partner.create({
+            'name': 'Jean Dupont',
+            'country_id': cls.france.id,
+            'phone': '01 23 45 67 89',
+            'mobile': '06 12 34 56 78',
+        })
+        cls.martin = cls.Partner.create({
+            'name': 'Paul Martin',
+            'country_id': cls.france.id,
+            'mobile': '07 11 22 33 44',
+        })
+
+    def test_e164_keys_are_stored(self):
+        self.assertEqual(self.dupont.phone_e164, '+33123456789')
+        self.assertEqual(self.dupont.mobile_e164, '+33612345678')
+
+    def test_any_formatting_finds_the_partner(self):
+        for query in ('0612345678', '06.12.34.56.78', '06 12 34 56 78', '01-23-45-67-89'):
+            self.assertEqual(self.Partner.search([('phone_lookup', '=', query)]), self.dupont, query)
+            ids = [r[0] for r in self.Partner.name_search(query)]
+            self.assertEqual(ids, [self.dupont.id], query)
+
+    def test_prefixed_number_finds_the_partner(self):
+        for query in ('+33 6 12 34 56 78', '+33612345678', '+33 1 23 45 67 89'):
+            ids = [r[0] for r in self.Partner.name_search(query)]
+            self.assertEqual(ids, [self.dupont.id], query)
+
+    def test_non_number_falls_back_to_standard_search(self):
+        ids = [r[0] for r in self.Partner.name_search('Dupont')]
+        self.assertIn(self.dupont.id, ids)
+        # Too short to be a number: matched as text.
+        self.assertIn(self.dupont.id, [r[0] for r in self.Partner.name_search('Jean')])
+        partners = self.Partner.search([
+            ('id', 'in', (self.dupont | self.martin).ids),
+            ('phone_lookup', 'ilike', '56 78'),
+        ])
+        self.assertEqual(partners, self.dupont)
+
+    def test_negative_operator_excludes_partner(self):
+        partners = self.Partner.search([
+            ('id', 'in', (self.dupont | self.martin).ids),
+            ('phone_lookup', 'not ilike', '12 34'),
+        ])
+        self.assertEqual(partners, self.martin)
+
+    def test_bulk_formatter_refreshes_keys(self):
+        # Imported straight in SQL: unformatted, no key.
+        self.env.cr.execute(
+            "UPDATE res_partner SET mobile = '0698765432', mobile_e164 = NULL WHERE id = %s",
+            [self.martin.id],
+        )
+        self.martin.invalidate_recordset()
+        self.assertFalse(self.Partner.search([('phone_lookup', '=', '06 98 76 54 32')]))
+
+        self.martin._format_phone_numbers_bulk(auto_commit=False)
+        self.assertEqual(self.martin.mobile, '06 98 76 54 32')
+        self.assertEqual(self.martin.mobile_e164, '+33698765432')
+        self.assertEqual(self.Partner.search([('phone_lookup', '=', '06 98 76 54 32')]), self.martin)
+
+    def test_create_and_write_format_numbers(self):
+        partner = self.Partner.create({'name': 'Luc Bernard', 'mobile': '0645454545'})
+        self.assertEqual(partner.mobile, '06 45 45 45 45')
+        self.assertEqual(partner.mobile_e164, '+33645454545')
+        partner.write({'phone': '+33 1 40 40 40 40'})
+        self.assertEqual(partner.phone, '01 40 40 40 40')
+        # Same number again: served from the memo, same result.
+        other = self.Partner.create({'name': 'Anne Bernard', 'mobile': '0645454545'})
+        self.assertEqual(other.mobile, '06 45 45 45 45')
+
+    def test_format_action_formats_selection(self):
+        self.env.cr.execute(
+            "UPDATE res_partner SET phone = '0140404040', mobile = '0698765432' WHERE id IN %s",
+            [tuple((self.dupont | self.martin).ids)],
+        )
+        (self.dupont | self.martin).invalidate_recordset()
+        (self.dupont | self.martin).action_format_phone_numbers()
+        self.assertEqual(self.dupont.phone, '01 40 40 40 40')
+        self.assertEqual(self.martin.mobile, '06 98 76 54 32')
+
+    def test_format_action_checks_write_access(self):
+        portal = new_test_user(self.env, login='portal_phone', groups='base.group_portal')
+        with self.assertRaises(AccessError):
+            self.dupont.with_user(portal).action_format_phone_numbers()
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'repair_appointment',
-    'version': '17.0.1.2.0',
+    'version': '17.0.1.3.0',
     'category': 'Inventory/Inventory',
     'summary': 'Pickup appointment scheduling for repair batches',
     'author': 'martinl',
@@ -32,6 +32,7 @@ repair.batch.
     ],
     'assets': {
         'web.assets_backend': [
+            'repair_appointment/static/src/css/appointment_calendar.css',
             'repair_appointment/static/src/js/appointment_calendar_patch.js',
         ],
         'web.assets_frontend': [
@@ -0,0 +1,23 @@
+from datetime import date
+
+from odoo import http
+from odoo.http import request
+
+
+class RepairPickupBackend(http.Controller):
+
+    @http.route('/repair_appointment/capacity_overlay', type='json', auth='user')
+    def capacity_overlay(self, date_from, date_to, location_ids=None):
+        """Per-location per-day capacity for the backend calendar range.
+        Runs with the user's rights: technicians may read schedules,
+        closures and appointments."""
+        Appointment = request.env['repair.pickup.appointment']
+        locations = None
+        if location_ids:
+            locations = request.env['repair.pickup.location'].browse(location_ids).exists()
+        overlay = Appointment._get_capacity_overlay(
+            date.fromisoformat(date_from), date.fromisoformat(date_to), locations,
+        )
+        for entry in overlay:
+            entry['date'] = entry['date'].isoformat()
+        return overlay
@@ -2,11 +2,13 @@ from datetime import date
 from odoo import http
 from odoo.exceptions import UserError
 from odoo.http import request
+from odoo.addons.repair_custom.controllers.repair_tracking import check_rate_limit
 
 
 class RepairPickupPortal(http.Controller):
 
     def _get_appointment(self, token):
+        check_rate_limit('pickup_portal')
         apt = request.env['repair.pickup.appointment'].sudo().search(
             [('token', '=', token)], limit=1,
         )
@@ -27,33 +29,45 @@ class RepairPickupPortal(http.Controller):
         apt = self._get_appointment(token)
         if not apt:
             return []
-        days = apt._compute_available_days(apt.location_id)
-        return [
-            {
-                'date': d['date'].isoformat(),
-                'state': d['state'],
-                'remaining_capacity': d['remaining_capacity'],
-            }
-            for d in days
+        _version, days = apt._get_available_days_cached(apt.location_id)
+        return self._serialize_days(days)
+
+    @http.route('/my/pickup/<string:token>/availability', type='http',
+                auth='public', methods=['GET'])
+    def pickup_availability(self, token, **kwargs):
+        """Cacheable GET twin of /slots: answers 304 while the location's
+        availability version matches the browser's If-None-Match."""
+        apt = self._get_appointment(token)
+        if not apt:
+            return request.not_found()
+        version, days = apt._get_available_days_cached(apt.location_id)
+        headers = [
+            ('ETag', f'"{version}"'),
+            ('Cache-Control', 'private, no-cache'),
         ]
+        if request.httprequest.if_none_match.contains(version):
+            return request.make_response('', headers=headers, status=304)
+        return request.make_json_response(self._serialize_days(days), headers=headers)
 
     # csrf=False: UUID4 token in URL is the auth mechanism
     @http.route('/my/pickup/<string:token>/book', type='http', auth='public',
                 methods=['POST'], csrf=False, website=True)
-    def pickup_book(self, token, pickup_date=None, **kwargs):
+    def pickup_book(self, token, pickup_date=None, slot_id=None, **kwargs):
         apt = self._get_appointment(token)
         if not apt:
             return request.not_found()
-        return self._schedule_from_form(apt, pickup_date, expected_state='pending')
+        return self._schedule_from_form(apt, pickup_date, expected_state='pending',
+                                        slot_id=slot_id)
 
     # csrf=False: UUID4 token in URL is the auth mechanism
     @http.route('/my/pickup/<string:token>/reschedule', type='http',
                 auth='public', methods=['POST'], csrf=False, website=True)
-    def pickup_reschedule(self, token, pickup_date=None, **kwargs):
+    def pickup_reschedule(self, token, pickup_date=None, slot_id=None, **kwargs):
         apt = self._get_appointment(token)
         if not apt:
             return request.not_found()
-        return self._schedule_from_form(apt, pickup_date, expected_state='scheduled')
+        return self._schedule_from_form(apt, pickup_date, expected_state='scheduled',
+                                        slot_id=slot_id)
 
     @http.route('/my/pickup/<string:token>/confirmation', type='http',
                 auth='public', website=True)
@@ -67,13 +81,42 @@ class RepairPickupPortal(http.Controller):
 
     # ----- helpers -----
 
-    def _schedule_from_form(self, apt, date_iso, expected_state):
+    def _serialize_days(self, days):
+        return [
+            {
+                'date': d['date'].isoformat(),
+                'state': d['state'],
+                'remaining_capacity': d['remaining_capacity'],
+                'slots': [
+                    {
+                        'id': slot['slot_id'],
+                        'label': slot['label'],
+                        'remaining_capacity': slot['remaining_capacity'],
+                    }
+                    for slot in d['slots']
+                ],
+            }
+            for d in days
+        ]
+
+    def _schedule_from_form(self, apt, date_iso, expected_state, slot_id=None):
         if not date_iso:
             return self._render_error(apt, "Date de retrait manquante.")
         try:
             pickup_date = date.fromisoformat(date_iso)
         except ValueError:
             return self._render_error(apt, "Format de date invalide.")
+        slot = request.env['repair.pickup.slot'].sudo()
+        if slot_id:
+            # Checked against the cached schedule of the location, no query.
+            config = apt._get_pickup_config(apt.location_id)
+            slot_ids = {s.id for day in (config.slots if config else ()) for s in day}
+            try:
+                slot = slot.browse(int(slot_id))
+            except ValueError:
+                slot = slot.browse()
+            if slot.id not in slot_ids:
+                return self._render_error(apt, "Créneau invalide.")
 
         if apt.state != expected_state:
             return self._render_error(
@@ -81,7 +124,7 @@ class RepairPickupPortal(http.Controller):
             )
 
         try:
-            apt.sudo().with_context(portal_booking=True).action_schedule(pickup_date)
+            apt.sudo().with_context(portal_booking=True).action_schedule(pickup_date, slot)
         except UserError as e:
             return self._render_error(apt, str(e))
 
@@ -0,0 +1,9 @@
+"""Drop the closure daterange column and its GiST index: affected
+appointments are found with plain date bounds on the (location_id,
+pickup_date) appointment index, and nothing else read the range.
+"""
+
+
+def migrate(cr, version):
+    cr.execute("DROP INDEX IF EXISTS repair_pickup_closure_date_range_gist")
+    cr.execute("ALTER TABLE repair_pickup_closure DROP COLUMN IF EXISTS date_range")
@@ -1,5 +1,8 @@
+from . import repair_pickup_location
 from . import repair_pickup_schedule
+from . import repair_pickup_slot
 from . import repair_pickup_closure
+from . import repair_pickup_day_load
 from . import repair_pickup_appointment
 from . import repair_batch
 from . import res_config_settings
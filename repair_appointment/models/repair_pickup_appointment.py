@@ -1,8 +1,17 @@
+import logging
+import threading
 import uuid
+from contextlib import contextmanager
+
+import psycopg2
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import clean_context
+from odoo.tools import clean_context, split_every
+from odoo.tools.lru import LRU
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
 
 
 STATE_SELECTION = [
@@ -13,6 +22,28 @@ STATE_SELECTION = [
     ('cancelled', 'Annulé'),
 ]
 
+# Portal availability memo: {(dbname, location_id, version): days}. The
+# version changes with every booking, schedule or closure change at the
+# location, so entries never go stale; the LRU bound only caps memory.
+AVAILABILITY_MEMO_SIZE = 256
+_availability_memo = LRU(AVAILABILITY_MEMO_SIZE)
+
+# Longest range the backend capacity overlay accepts (a year view plus
+# the padding weeks FullCalendar shows around it).
+OVERLAY_MAX_DAYS = 400
+
+# Partial unique index: one pending/scheduled appointment per batch.
+ACTIVE_BATCH_INDEX = 'repair_pickup_appointment_active_batch_uniq'
+
+# How far past an appointment's date bulk rescheduling looks for a day.
+RESCHEDULE_SEARCH_DAYS = 60
+
+# Appointments handled per commit by the reminder cron.
+CRON_CHUNK_SIZE = 200
+
+# Fields whose change moves an appointment in or out of a day's capacity.
+AVAILABILITY_FIELDS = {'state', 'pickup_date', 'location_id', 'slot_id'}
+
 
 class RepairPickupAppointment(models.Model):
     _name = 'repair.pickup.appointment'
@@ -55,6 +86,13 @@ class RepairPickupAppointment(models.Model):
         tracking=True,
     )
     pickup_date = fields.Date('Date de retrait', tracking=True)
+    slot_id = fields.Many2one(
+        'repair.pickup.slot',
+        string='Créneau',
+        tracking=True,
+        ondelete='set null',
+        domain="[('location_id', '=', location_id)]",
+    )
     token = fields.Char(
         required=True, copy=False, readonly=True, index=True,
         default=lambda self: str(uuid.uuid4()),
@@ -76,12 +114,21 @@ class RepairPickupAppointment(models.Model):
     device_count = fields.Integer(
         'Nb. appareils',
         compute='_compute_device_summary',
+        store=True,
     )
     device_summary = fields.Char(
         'Appareils',
         compute='_compute_device_summary',
+        store=True,
         help="Identification rapide des appareils à préparer pour le retrait.",
     )
+    calendar_label = fields.Char(
+        'Libellé',
+        compute='_compute_calendar_label',
+        store=True,
+        help="Nom du client (ou référence) stocké pour que le calendrier "
+             "n'ait pas à lire le client de chaque rendez-vous.",
+    )
     location_color = fields.Integer(
         'Couleur lieu',
         compute='_compute_location_color',
@@ -96,8 +143,8 @@ class RepairPickupAppointment(models.Model):
     ]
 
     @api.depends(
-        'repair_ids',
-        'repair_ids.device_id_name',
+        'batch_id.repair_ids',
+        'batch_id.repair_ids.device_id_name',
     )
     def _compute_device_summary(self):
         for apt in self:
@@ -112,35 +159,29 @@ class RepairPickupAppointment(models.Model):
             ]
             apt.device_summary = ", ".join(parts)
 
-    @api.depends('name', 'partner_id', 'device_count')
+    @api.depends('name', 'partner_id.name')
+    def _compute_calendar_label(self):
+        # Language-neutral on purpose: the translated "(N Appareils)" part
+        # is added at read time by _compute_display_name.
+        for apt in self:
+            apt.calendar_label = apt.partner_id.name or apt.name or ''
+
+    @api.depends('calendar_label', 'device_count')
+    @api.depends_context('lang')
     def _compute_display_name(self):
         """Show "Client (N Appareils)" as the record label — this is what
         Odoo's calendar view, many2one dropdowns and breadcrumbs render.
-        The sequence ref (self.name) stays visible in form/tree views."""
+        The sequence ref (self.name) stays visible in form/tree views.
+        Built from stored fields so a calendar load stays a flat read of
+        the appointment table, in the reader's language."""
         for apt in self:
-            partner = apt.partner_id.name or apt.name or ''
             if apt.device_count:
                 apt.display_name = _("%(partner)s (%(count)d Appareils)") % {
-                    'partner': partner,
+                    'partner': apt.calendar_label,
                     'count': apt.device_count,
                 }
             else:
-                apt.display_name = partner
-
-    @api.constrains('batch_id', 'state')
-    def _check_single_active_per_batch(self):
-        for apt in self:
-            if apt.state not in ('pending', 'scheduled'):
-                continue
-            duplicate = self.search([
-                ('batch_id', '=', apt.batch_id.id),
-                ('state', 'in', ('pending', 'scheduled')),
-                ('id', '!=', apt.id),
-            ], limit=1)
-            if duplicate:
-                raise ValidationError(_(
-                    "Ce dossier a déjà un rendez-vous de retrait actif (%s)."
-                ) % duplicate.name)
+                apt.display_name = apt.calendar_label
 
     @api.constrains('state', 'pickup_date')
     def _check_scheduled_has_date(self):
@@ -152,6 +193,7 @@ class RepairPickupAppointment(models.Model):
 
     @api.depends('batch_id.repair_ids.pickup_location_id')
     def _compute_location_id(self):
+        fallbacks = {}
         for apt in self:
             loc = False
             for repair in apt.batch_id.repair_ids:
@@ -159,11 +201,46 @@ class RepairPickupAppointment(models.Model):
                     loc = repair.pickup_location_id
                     break
             if not loc:
-                loc = self.env['repair.pickup.location'].search(
-                    [('company_id', 'in', [apt.company_id.id, False])], limit=1,
-                )
+                # One search per company rather than per appointment.
+                company_id = apt.company_id.id
+                if company_id not in fallbacks:
+                    fallbacks[company_id] = self.env['repair.pickup.location'].search(
+                        [('company_id', 'in', [company_id, False])], limit=1,
+                    )
+                loc = fallbacks[company_id]
             apt.location_id = loc
 
+    def init(self):
+        # Capacity counts and closure lookups only ever look at scheduled
+        # appointments of one location over a date range.
+        create_index(
+            self.env.cr, 'repair_pickup_appointment_scheduled_day_idx',
+            self._table, ['location_id', 'pickup_date'], where="state = 'scheduled'",
+        )
+        # At most one active (pending/scheduled) appointment per batch,
+        # enforced by PostgreSQL so concurrent creations cannot both pass.
+        # Same index as the 17.0.1.2.0 migration, for fresh installs.
+        self.env.cr.execute("""
+            SELECT batch_id
+              FROM repair_pickup_appointment
+             WHERE state IN ('pending', 'scheduled')
+             GROUP BY batch_id
+            HAVING COUNT(*) > 1
+             LIMIT 1
+        """)
+        if self.env.cr.fetchone():
+            _logger.warning(
+                "Index %s not created: some batches have several active "
+                "pickup appointments. Resolve them, then update the module.",
+                ACTIVE_BATCH_INDEX,
+            )
+            return
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {ACTIVE_BATCH_INDEX}
+                ON repair_pickup_appointment (batch_id)
+             WHERE state IN ('pending', 'scheduled')
+        """)
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -173,7 +250,10 @@ class RepairPickupAppointment(models.Model):
                 ) or _('Nouveau')
             if not vals.get('token'):
                 vals['token'] = str(uuid.uuid4())
-        return super().create(vals_list)
+        with self._translate_active_batch_violation():
+            appointments = super().create(vals_list)
+        self.env['repair.pickup.day.load'].sudo()._bump(appointments._get_booked_days())
+        return appointments
 
     def write(self, vals):
         track_date_change = False
@@ -181,7 +261,17 @@ class RepairPickupAppointment(models.Model):
         if 'pickup_date' in vals and not self.env.context.get('skip_reschedule_notification'):
             track_date_change = True
             old_dates = {apt.id: apt.pickup_date for apt in self}
+        booked_days = set()
+        if AVAILABILITY_FIELDS & vals.keys():
+            booked_days = self._get_booked_days()
         res = super().write(vals)
+        if {'batch_id', 'state'} & vals.keys():
+            with self._translate_active_batch_violation():
+                self.flush_recordset(['batch_id', 'state'])
+        if AVAILABILITY_FIELDS & vals.keys():
+            self.env['repair.pickup.day.load'].sudo()._bump(
+                booked_days | self._get_booked_days()
+            )
         if track_date_change:
             template = self.env.ref(
                 'repair_appointment.mail_template_pickup_reschedule',
@@ -202,6 +292,32 @@ class RepairPickupAppointment(models.Model):
                     ))
         return res
 
+    @contextmanager
+    def _translate_active_batch_violation(self):
+        """Run the block in a savepoint and turn a violation of the
+        one-active-appointment-per-batch index into a readable error."""
+        try:
+            with self.env.cr.savepoint(flush=False):
+                yield
+        except psycopg2.errors.UniqueViolation as e:
+            if e.diag.constraint_name != ACTIVE_BATCH_INDEX:
+                raise
+            raise ValidationError(_(
+                "Ce dossier a déjà un rendez-vous de retrait actif."
+            )) from None
+
+    def unlink(self):
+        self.env['repair.pickup.day.load'].sudo()._bump(self._get_booked_days())
+        return super().unlink()
+
+    def _get_booked_days(self):
+        """(location_id, day) pairs whose capacity these appointments use."""
+        return {
+            (apt.location_id.id, apt.pickup_date)
+            for apt in self
+            if apt.state == 'scheduled' and apt.location_id and apt.pickup_date
+        }
+
     # ------------------------------------------------------------------
     # State transitions
     # ------------------------------------------------------------------
@@ -215,23 +331,33 @@ class RepairPickupAppointment(models.Model):
                     "Ce rendez-vous est déjà dans un état final (%s).",
                 ) % dict(STATE_SELECTION).get(apt.state))
 
-    def action_schedule(self, pickup_date):
+    def action_schedule(self, pickup_date, slot=None):
         """Transition pending → scheduled, or update pickup_date in place
-        on an already-scheduled appointment. Validates day availability
-        unless context `skip_slot_validation` is True."""
+        on an already-scheduled appointment. Validates day (and `slot`,
+        an optional repair.pickup.slot) availability unless context
+        `skip_slot_validation` is True.
+
+        The (location, day) load row is reserved first, so concurrent
+        bookings of the same day are serialized and the capacity check
+        never runs on a snapshot missing a competing booking."""
         for apt in self:
             apt._ensure_not_terminal()
             if apt.state not in ('pending', 'scheduled'):
                 raise UserError(_("Impossible de planifier ce rendez-vous."))
 
+            if apt.location_id and pickup_date:
+                self.env['repair.pickup.day.load'].sudo()._reserve(
+                    apt.location_id, pickup_date,
+                )
             if not self.env.context.get('skip_slot_validation'):
-                apt._validate_day(pickup_date)
+                apt._validate_day(pickup_date, slot)
 
             was_scheduled = apt.state == 'scheduled'
             old_date = apt.pickup_date
 
             apt.write({
                 'pickup_date': pickup_date,
+                'slot_id': slot.id if slot else False,
                 'state': 'scheduled',
             })
 
@@ -262,13 +388,19 @@ class RepairPickupAppointment(models.Model):
                     "Renseignez la date de retrait avant de confirmer."
                 ))
             apt.with_context(skip_slot_validation=True).action_schedule(
-                apt.pickup_date,
+                apt.pickup_date, apt.slot_id,
             )
 
-    def _validate_day(self, pickup_date):
+    def _validate_day(self, pickup_date, slot=None):
         if not pickup_date:
             raise UserError(_("Date de retrait requise."))
-        if not self._is_day_available(pickup_date):
+        if not slot and self.env.context.get('portal_booking'):
+            config = self._get_pickup_config(self.location_id)
+            if config and config.get_slots(pickup_date.weekday()):
+                raise UserError(_("Choisissez un créneau horaire."))
+        if not self._is_day_available(pickup_date, slot):
+            if slot:
+                raise UserError(_("Ce créneau n'est plus disponible."))
             raise UserError(_("Ce jour n'est plus disponible."))
 
     def action_mark_done(self):
@@ -299,15 +431,20 @@ class RepairPickupAppointment(models.Model):
     # Slot availability helpers
     # ------------------------------------------------------------------
 
+    @api.model
+    def _get_pickup_config(self, location):
+        """Cached PickupConfig of `location` (None without schedule)."""
+        return self.env['repair.pickup.schedule']._get_pickup_config(location.id)
+
+    @api.model
+    def _get_pickup_params(self):
+        return self.env['repair.pickup.schedule']._get_pickup_params()
+
     def _get_booking_horizon_days(self):
-        return int(self.env['ir.config_parameter'].sudo().get_param(
-            'repair_appointment.booking_horizon_days', default='14',
-        ))
+        return self._get_pickup_params().booking_horizon_days
 
     def _get_min_lead_days(self):
-        return int(self.env['ir.config_parameter'].sudo().get_param(
-            'repair_appointment.min_lead_days', default='2',
-        ))
+        return self._get_pickup_params().min_lead_days
 
     @api.model
     def _compute_available_days(self, location, date_from=None, date_to=None,
@@ -319,8 +456,12 @@ class RepairPickupAppointment(models.Model):
             'date': date,
             'state': 'open' | 'closed' | 'full' | 'lead_time',
             'remaining_capacity': int,
+            'slots': [{'slot_id', 'label', 'remaining_capacity'}],
         }
 
+        `slots` is empty for days booked as a whole (no slot configured
+        for that weekday).
+
         Days before the min-lead cutoff are excluded entirely (the portal
         renders the cutoff explicitly; no need to send them). Days past
         the horizon are also excluded. Days within the window are always
@@ -328,11 +469,15 @@ class RepairPickupAppointment(models.Model):
         """
         from datetime import timedelta
 
+        config = self._get_pickup_config(location)
+        if not config:
+            return []
+
         today = fields.Date.today()
-        min_lead = self._get_min_lead_days()
+        min_lead = config.params.min_lead_days
         horizon = (booking_horizon_days
                    if booking_horizon_days is not None
-                   else self._get_booking_horizon_days())
+                   else config.params.booking_horizon_days)
 
         earliest = today + timedelta(days=min_lead)
         latest = today + timedelta(days=horizon)
@@ -343,30 +488,70 @@ class RepairPickupAppointment(models.Model):
         if date_from > date_to:
             return []
 
-        schedule = self.env['repair.pickup.schedule'].search(
-            [('location_id', '=', location.id), ('active', '=', True)],
-            limit=1,
+        return self._get_day_entries(location, config, date_from, date_to)
+
+    @api.model
+    def _get_available_days_cached(self, location):
+        """Return (version, days) for the default booking window at
+        `location`, reusing the days computed by a previous request while
+        the location's availability version is unchanged.
+
+        Meant for the read-only portal routes: a transaction that has
+        written bookings of its own must call `_compute_available_days`."""
+        params = self._get_pickup_params()
+        version = location._get_availability_version(
+            fields.Date.today(),
+            params.min_lead_days,
+            params.booking_horizon_days,
         )
-        if not schedule:
-            return []
+        key = (self.env.cr.dbname, location.id, version)
+        days = _availability_memo.get(key)
+        if days is None:
+            days = self._compute_available_days(location)
+            _availability_memo[key] = days
+        return version, days
 
-        closures = self.env['repair.pickup.closure'].search(
-            [('active', '=', True)],
-        ).filtered(
-            lambda c: c.location_id in (location, False) or c.location_id.id is False
+    @api.model
+    def _get_day_entries(self, location, config, date_from, date_to, exclude_ids=()):
+        """Describe every day of [date_from, date_to] at `location` with a
+        single grouped count of scheduled appointments; the schedule
+        (`config`, a PickupConfig) and the closures come from the registry
+        cache. `exclude_ids` leaves some appointments out of the count
+        (same-day reschedule)."""
+        from datetime import timedelta
+
+        Closure = self.env['repair.pickup.closure']
+        booked_by_slot = self._count_booked_by_slot(
+            location, date_from, date_to, exclude_ids=exclude_ids,
         )
+        booked_by_day = {}
+        for (day, _slot_id), count in booked_by_slot.items():
+            booked_by_day[day] = booked_by_day.get(day, 0) + count
 
         results = []
         day = date_from
         while day <= date_to:
-            entry = {'date': day, 'state': 'open', 'remaining_capacity': 0}
-            if not schedule._day_is_open(day.weekday()):
+            entry = {'date': day, 'state': 'open', 'remaining_capacity': 0, 'slots': []}
+            if not config.is_open(day.weekday()):
                 entry['state'] = 'closed'
-            elif any(c._covers(day, location) for c in closures):
+            elif Closure._is_closed(day, location):
                 entry['state'] = 'closed'
             else:
-                booked = self._count_booked_on_day(day, location)
-                remaining = max(0, schedule.daily_capacity - booked)
+                booked = booked_by_day.get(day, 0)
+                remaining = max(0, config.daily_capacity - booked)
+                slots = config.get_slots(day.weekday())
+                if slots:
+                    # The day cap still applies on top of each slot's own.
+                    entry['slots'] = [{
+                        'slot_id': slot.id,
+                        'label': slot.label,
+                        'remaining_capacity': min(remaining, max(
+                            0, slot.capacity - booked_by_slot.get((day, slot.id), 0),
+                        )),
+                    } for slot in slots]
+                    remaining = min(remaining, sum(
+                        s['remaining_capacity'] for s in entry['slots']
+                    ))
                 entry['remaining_capacity'] = remaining
                 entry['state'] = 'open' if remaining > 0 else 'full'
             results.append(entry)
@@ -374,49 +559,198 @@ class RepairPickupAppointment(models.Model):
 
         return results
 
+    @api.model
+    def _count_booked_by_slot(self, location, date_from, date_to, exclude_ids=()):
+        """Return {(date, slot id or False): number of scheduled
+        appointments} at `location` for the window, as one grouped
+        query."""
+        domain = self._booked_domain(location, date_from, date_to, exclude_ids)
+        groups = self._read_group(domain, ['pickup_date:day', 'slot_id'], ['__count'])
+        return {
+            (fields.Date.to_date(day), slot.id): count
+            for day, slot, count in groups
+        }
+
+    @api.model
+    def _booked_domain(self, locations, date_from, date_to, exclude_ids=()):
+        """Scheduled appointments at `locations` over [date_from, date_to]:
+        what every capacity count counts."""
+        domain = [
+            ('pickup_date', '>=', date_from),
+            ('pickup_date', '<=', date_to),
+            ('location_id', 'in', locations.ids),
+            ('state', '=', 'scheduled'),
+        ]
+        if exclude_ids:
+            domain.append(('id', 'not in', list(exclude_ids)))
+        return domain
+
+    @api.model
+    def _count_booked_by_day(self, location, date_from, date_to, exclude_ids=()):
+        """Return {date: number of scheduled appointments} at `location`
+        for the window, as one grouped query."""
+        domain = self._booked_domain(location, date_from, date_to, exclude_ids)
+        groups = self._read_group(domain, ['pickup_date:day'], ['__count'])
+        return {fields.Date.to_date(day): count for day, count in groups}
+
+    @api.model
+    def _get_capacity_overlay(self, date_from, date_to, locations=None):
+        """Booked / capacity / closed status per location and day over
+        [date_from, date_to], for the backend calendar overlay. Whatever
+        the range, costs one count grouped by location and day; schedules
+        and closures come from the registry cache."""
+        from datetime import timedelta
+
+        if (date_to - date_from).days > OVERLAY_MAX_DAYS:
+            raise UserError(_("Période trop longue pour l'affichage des capacités."))
+        if locations is None:
+            locations = self.env['repair.pickup.location'].search([])
+        Closure = self.env['repair.pickup.closure']
+        groups = self._read_group(
+            self._booked_domain(locations, date_from, date_to),
+            ['location_id', 'pickup_date:day'], ['__count'],
+        )
+        booked = {
+            (location.id, fields.Date.to_date(day)): count
+            for location, day, count in groups
+        }
+
+        overlay = []
+        for location in locations:
+            config = self._get_pickup_config(location)
+            if not config:
+                continue
+            day = date_from
+            while day <= date_to:
+                overlay.append({
+                    'location_id': location.id,
+                    'location_name': location.name,
+                    'date': day,
+                    'booked': booked.get((location.id, day), 0),
+                    'capacity': config.daily_capacity,
+                    'closed': (not config.is_open(day.weekday())
+                               or Closure._is_closed(day, location)),
+                })
+                day += timedelta(days=1)
+        return overlay
+
     @api.model
     def _count_booked_on_day(self, pickup_date, location):
         """Count scheduled appointments at `location` on `pickup_date`."""
-        return self.search_count([
-            ('pickup_date', '=', pickup_date),
-            ('location_id', '=', location.id),
-            ('state', '=', 'scheduled'),
-        ])
+        return self._count_booked_by_day(location, pickup_date, pickup_date).get(pickup_date, 0)
 
-    def _is_day_available(self, pickup_date):
+    def _is_day_available(self, pickup_date, slot=None):
         """True if the target day has remaining capacity and is within
         the schedule + closures + lead-time rules. Excludes self from
-        the count so same-day reschedules pass."""
+        the count so same-day reschedules pass.
+
+        With `slot`, the slot must belong to that weekday and have room
+        left. Portal bookings (context `portal_booking`) of a day split
+        into slots must name one."""
         self.ensure_one()
         from datetime import timedelta
         if not self.location_id or not pickup_date:
             return False
-        schedule = self.env['repair.pickup.schedule'].search(
-            [('location_id', '=', self.location_id.id)], limit=1,
-        )
-        if not schedule:
-            return False
-        if not schedule._day_is_open(pickup_date.weekday()):
+        config = self._get_pickup_config(self.location_id)
+        if not config:
             return False
-        closures = self.env['repair.pickup.closure'].search([('active', '=', True)])
-        for c in closures:
-            if c._covers(pickup_date, self.location_id):
-                return False
-        min_lead = self._get_min_lead_days()
+        min_lead = config.params.min_lead_days
         if pickup_date < fields.Date.today() + timedelta(days=min_lead):
             if not self.env.context.get('bypass_lead_time'):
                 return False
-        booked = self.search_count([
-            ('pickup_date', '=', pickup_date),
-            ('location_id', '=', self.location_id.id),
-            ('state', '=', 'scheduled'),
-            ('id', '!=', self.id),
-        ])
-        if booked >= schedule.daily_capacity:
-            if not self.env.context.get('bypass_capacity'):
+        [entry] = self._get_day_entries(
+            self.location_id, config, pickup_date, pickup_date,
+            exclude_ids=self.ids,
+        )
+        if entry['state'] == 'closed':
+            return False
+        bypass_capacity = self.env.context.get('bypass_capacity')
+        if entry['state'] == 'full' and not bypass_capacity:
+            return False
+        if slot:
+            slot_entry = next(
+                (s for s in entry['slots'] if s['slot_id'] == slot.id), None,
+            )
+            if not slot_entry:
                 return False
+            if not slot_entry['remaining_capacity'] and not bypass_capacity:
+                return False
+        elif entry['slots'] and self.env.context.get('portal_booking'):
+            return False
         return True
 
+    # ------------------------------------------------------------------
+    # Bulk rescheduling (closures)
+    # ------------------------------------------------------------------
+
+    def _plan_reschedule(self):
+        """Pick for each appointment the nearest bookable day to its
+        current date (later days win ties), respecting lead time, closures
+        and the capacity left once earlier picks are counted. One grouped
+        count per location. Returns {appointment id: date or False}."""
+        from datetime import timedelta
+
+        earliest = fields.Date.today() + timedelta(days=self._get_min_lead_days())
+        plan = {}
+        for location in self.location_id:
+            appointments = self.filtered(
+                lambda a: a.location_id == location and a.pickup_date
+            ).sorted(lambda a: (a.pickup_date, a.id))
+            config = self._get_pickup_config(location)
+            if not config:
+                plan.update(dict.fromkeys(appointments.ids, False))
+                continue
+            date_to = max(max(appointments.mapped('pickup_date')), earliest) \
+                + timedelta(days=RESCHEDULE_SEARCH_DAYS)
+            remaining = {
+                entry['date']: entry['remaining_capacity']
+                for entry in self._get_day_entries(
+                    location, config, earliest, date_to, exclude_ids=appointments.ids,
+                )
+                if entry['state'] == 'open'
+            }
+            for apt in appointments:
+                target = False
+                for offset in range((date_to - earliest).days + 1):
+                    for day in (apt.pickup_date + timedelta(days=offset),
+                                apt.pickup_date - timedelta(days=offset)):
+                        if remaining.get(day):
+                            target = day
+                            break
+                    if target:
+                        break
+                if target:
+                    remaining[target] -= 1
+                plan[apt.id] = target
+        plan.update(dict.fromkeys((self - self.browse(plan)).ids, False))
+        return plan
+
+    def _apply_reschedule(self, plan, reason):
+        """Move the appointments of `plan` in one go: one write per target
+        day, one batch of chatter logs, one batched reschedule mail per
+        language. Returns the moved appointments."""
+        moved = self.browse([apt_id for apt_id, day in plan.items() if day])
+        old_dates = {apt.id: apt.pickup_date for apt in moved}
+        ids_by_day = {}
+        for apt_id in moved.ids:
+            ids_by_day.setdefault(plan[apt_id], []).append(apt_id)
+        for day, ids in ids_by_day.items():
+            # The slot is weekday-bound: staff re-pick it if needed.
+            self.browse(ids).with_context(skip_reschedule_notification=True).write({
+                'pickup_date': day,
+                'slot_id': False,
+            })
+        for apt in moved:
+            apt.reschedule_count += 1
+        moved._message_log_batch(bodies={
+            apt.id: _("RDV déplacé du %(old)s au %(new)s (%(reason)s).") % {
+                'old': old_dates[apt.id], 'new': apt.pickup_date, 'reason': reason,
+            }
+            for apt in moved
+        })
+        moved._post_template_batch('repair_appointment.mail_template_pickup_reschedule')
+        return moved
+
     # ------------------------------------------------------------------
     # Escalation activity handling
     # ------------------------------------------------------------------
@@ -437,27 +771,33 @@ class RepairPickupAppointment(models.Model):
             apt.escalation_activity_id = matching[:1]
 
     def _create_escalation_activity(self):
-        """Create one activity per user in group_repair_manager."""
-        self.ensure_one()
+        """Create one activity per user in group_repair_manager on each
+        appointment, in a single batched create."""
+        if not self:
+            return
         activity_type = self.env.ref('repair_appointment.activity_pickup_to_contact')
         managers = self.env.ref('repair_custom.group_repair_manager').users
+        res_model_id = self.env['ir.model']._get_id('repair.pickup.appointment')
         note_tmpl = _(
             "Le client %(name)s n'a pas pris rendez-vous pour récupérer son appareil.\n"
             "Dossier : %(batch)s\nTéléphone : %(phone)s"
         )
-        for manager in managers:
-            self.env['mail.activity'].create({
-                'res_model_id': self.env['ir.model']._get_id('repair.pickup.appointment'),
-                'res_id': self.id,
+        self.env['mail.activity'].create([
+            {
+                'res_model_id': res_model_id,
+                'res_id': apt.id,
                 'activity_type_id': activity_type.id,
                 'user_id': manager.id,
                 'summary': _("Client à contacter — RDV retrait non pris"),
                 'note': note_tmpl % {
-                    'name': self.partner_id.name or '',
-                    'batch': self.batch_id.name or '',
-                    'phone': self.partner_id.phone or '',
+                    'name': apt.partner_id.name or '',
+                    'batch': apt.batch_id.name or '',
+                    'phone': apt.partner_id.phone or '',
                 },
-            })
+            }
+            for apt in self
+            for manager in managers
+        ])
 
     def action_mark_contacted(self):
         """Manager clicked 'Contacté'. Marks all sibling activities (of
@@ -507,22 +847,36 @@ class RepairPickupAppointment(models.Model):
         return f"{base.rstrip('/')}/my/pickup/{self.token}"
 
     def _send_reminder_mail(self):
-        self.ensure_one()
-        template = self.env.ref(
-            'repair_appointment.mail_template_pickup_reminder',
-            raise_if_not_found=False,
-        )
-        if template:
-            self.with_context(clean_context(self.env.context), force_send=False).message_post_with_source(
-                template,
-                email_layout_xmlid='repair_custom.mail_notification_layout',
-                subtype_xmlid='mail.mt_comment',
-            )
+        self._post_template_batch('repair_appointment.mail_template_pickup_reminder')
+
+    def _post_template_batch(self, template_xmlid):
+        """Post `template_xmlid` on every appointment of `self`. One
+        composer per language renders and queues the whole group at once
+        (the mails leave with the mail queue, not synchronously)."""
+        template = self.env.ref(template_xmlid, raise_if_not_found=False)
+        if not template or not self:
+            return
+        langs = template._render_lang(self.ids)
+        ids_by_lang = {}
+        for res_id in self.ids:
+            ids_by_lang.setdefault(langs.get(res_id), []).append(res_id)
+        Composer = self.env['mail.compose.message'].with_context(clean_context(self.env.context))
+        for lang, res_ids in ids_by_lang.items():
+            composer = Composer.with_context(
+                lang=lang,
+                mail_notify_force_send=False,
+                default_model=self._name,
+                default_res_ids=res_ids,
+                default_template_id=template.id,
+                default_composition_mode='comment',
+                default_email_layout_xmlid='repair_custom.mail_notification_layout',
+            ).create({})
+            composer._action_send_mail()
 
     def action_send_reminder_now(self):
+        self._send_reminder_mail()
+        self.last_reminder_sent_at = fields.Datetime.now()
         for apt in self:
-            apt._send_reminder_mail()
-            apt.last_reminder_sent_at = fields.Datetime.now()
             apt.message_post(body=_("Rappel envoyé manuellement."))
 
     def _reset_pickup_cycle(self, send_initial=False):
@@ -594,48 +948,95 @@ class RepairPickupAppointment(models.Model):
     # ------------------------------------------------------------------
 
     def _get_reminder_delay_days(self):
-        return int(self.env['ir.config_parameter'].sudo().get_param(
-            'repair_appointment.reminder_delay_days', default='3',
-        ))
+        return self._get_pickup_params().reminder_delay_days
 
     def _get_escalation_delay_days(self):
-        return int(self.env['ir.config_parameter'].sudo().get_param(
-            'repair_appointment.escalation_delay_days', default='3',
-        ))
+        return self._get_pickup_params().escalation_delay_days
 
     @api.model
     def _cron_process_pending_appointments(self):
         """Send the single reminder and create escalation activities.
-        Pseudocode matches the spec's Reminder CRON section."""
+
+        Both phases are selected with one search each, then processed in
+        chunks of CRON_CHUNK_SIZE: one batched mail send or activity
+        create per chunk, committed when running as a real cron so a
+        failure does not replay the chunks already handled. A transaction
+        advisory lock, re-taken after each commit, keeps two runs (cron
+        and manual trigger) from processing the same appointments."""
         from datetime import timedelta
+        if not self._try_cron_lock():
+            _logger.info("Pickup reminder cron already running, skipped.")
+            return
         now = fields.Datetime.now()
-        reminder_delay = self._get_reminder_delay_days()
-        escalation_delay = self._get_escalation_delay_days()
+        params = self._get_pickup_params()
+        reminder_delay = params.reminder_delay_days
+        escalation_delay = params.escalation_delay_days
 
-        pending = self.search([
+        # Phase 1: single reminder mail
+        to_remind = self.search([
             ('state', '=', 'pending'),
             ('notification_sent_at', '!=', False),
-        ])
+            ('notification_sent_at', '<=', now - timedelta(days=reminder_delay)),
+            ('last_reminder_sent_at', '=', False),
+            ('contacted', '=', False),
+        ], order='id')
 
-        for apt in pending:
-            # Phase 1: single reminder mail
-            if (not apt.last_reminder_sent_at
-                    and not apt.contacted
-                    and now >= apt.notification_sent_at + timedelta(days=reminder_delay)):
-                apt._send_reminder_mail()
-                apt.last_reminder_sent_at = now
-                continue
+        # Phase 2: escalation, unless an escalation activity is still open
+        escalation_limit = now - timedelta(days=escalation_delay)
+        activity_type = self.env.ref(
+            'repair_appointment.activity_pickup_to_contact',
+            raise_if_not_found=False,
+        )
+        to_escalate = self.browse()
+        if activity_type:
+            to_escalate = self.search([
+                ('state', '=', 'pending'),
+                ('notification_sent_at', '!=', False),
+                '|',
+                '&', ('contacted', '=', True), ('contacted_at', '<=', escalation_limit),
+                '&', ('contacted', '=', False), ('last_reminder_sent_at', '<=', escalation_limit),
+                ('activity_ids', 'not any', [('activity_type_id', '=', activity_type.id)]),
+            ], order='id')
+
+        if not self._run_cron_chunks(
+            to_remind, lambda chunk: chunk._cron_send_reminders(now), "reminders",
+        ):
+            return
+        self._run_cron_chunks(
+            to_escalate, lambda chunk: chunk._cron_escalate(), "escalations",
+        )
 
-            # Phase 2: escalation
-            apt.invalidate_recordset(['escalation_activity_id'])
-            if apt.escalation_activity_id:
-                continue  # still open, wait for manager
-
-            if apt.contacted:
-                if (apt.contacted_at
-                        and now >= apt.contacted_at + timedelta(days=escalation_delay)):
-                    apt._create_escalation_activity()
-                    apt.contacted = False  # consume the flag
-            elif apt.last_reminder_sent_at:
-                if now >= apt.last_reminder_sent_at + timedelta(days=escalation_delay):
-                    apt._create_escalation_activity()
+    def _cron_send_reminders(self, now):
+        self._send_reminder_mail()
+        self.write({'last_reminder_sent_at': now})
+
+    def _cron_escalate(self):
+        self._create_escalation_activity()
+        self.filtered('contacted').write({'contacted': False})  # consume the flag
+
+    @api.model
+    def _try_cron_lock(self):
+        self.env.cr.execute(
+            "SELECT pg_try_advisory_xact_lock(hashtext(%s))",
+            ['repair_appointment.pickup_reminder_cron'],
+        )
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _run_cron_chunks(self, records, process, label):
+        """Apply `process` to `records` chunk by chunk, committing and
+        logging progress after each chunk outside of tests. Returns False
+        when the lock was lost to a concurrent run after a commit."""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        total = len(records)
+        done = 0
+        for chunk in split_every(CRON_CHUNK_SIZE, records.ids, self.browse):
+            process(chunk)
+            done += len(chunk)
+            if auto_commit:
+                self.env.cr.commit()
+                _logger.info("Pickup reminder cron: %s %d/%d", label, done, total)
+                if not self._try_cron_lock():
+                    _logger.info("Pickup reminder cron: lock taken by another run, stopping.")
+                    return False
+        return True
@@ -1,4 +1,7 @@
-from odoo import api, fields, models, _
+from bisect import bisect_right
+from datetime import timedelta
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 
 
@@ -17,6 +20,15 @@ class RepairPickupClosure(models.Model):
     date_from = fields.Date(required=True)
     date_to = fields.Date(required=True)
     active = fields.Boolean(default=True)
+    auto_reschedule = fields.Boolean(
+        'Replanifier les RDV impactés',
+        help="À la création, déplace automatiquement les rendez-vous confirmés "
+             "pendant la fermeture vers le jour disponible le plus proche.",
+    )
+    affected_appointment_count = fields.Integer(
+        'RDV impactés',
+        compute='_compute_affected_appointment_count',
+    )
 
     @api.constrains('date_from', 'date_to')
     def _check_date_range(self):
@@ -24,6 +36,131 @@ class RepairPickupClosure(models.Model):
             if rec.date_to < rec.date_from:
                 raise ValidationError(_("La date de fin doit être postérieure ou égale à la date de début."))
 
+    @api.depends('date_from', 'date_to', 'location_id', 'active')
+    def _compute_affected_appointment_count(self):
+        for closure in self:
+            closure.affected_appointment_count = (
+                len(closure._get_affected_appointments()) if closure.id else 0
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        closures = super().create(vals_list)
+        closures._get_affected_locations()._bump_availability_version()
+        self.env.registry.clear_cache()
+        to_reschedule = closures.filtered('auto_reschedule')
+        if to_reschedule:
+            to_reschedule._reschedule_affected_appointments()
+        return closures
+
+    def write(self, vals):
+        locations = self._get_affected_locations()
+        res = super().write(vals)
+        (locations | self._get_affected_locations())._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        locations = self._get_affected_locations()
+        res = super().unlink()
+        locations._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
+
+    def _get_affected_locations(self):
+        """Locations whose availability these closures change: all of them
+        as soon as one closure is global."""
+        if any(not closure.location_id for closure in self):
+            return self.env['repair.pickup.location'].search([])
+        return self.location_id
+
+    @api.model
+    @tools.ormcache('location_id')
+    def _get_closed_intervals(self, location_id):
+        """Active closures applying to `location_id` (its own and the
+        global ones) as sorted, merged, disjoint intervals:
+        ``(starts, ends)`` tuples of dates, inclusive on both ends.
+        Cleared on every closure create / write / unlink."""
+        closures = self.sudo().search_read(
+            # Explicit: the result is shared by every caller, whatever
+            # their active_test context.
+            [('location_id', 'in', [location_id, False]), ('active', '=', True)],
+            ['date_from', 'date_to'], order='date_from',
+        )
+        starts, ends = [], []
+        for closure in closures:
+            if ends and closure['date_from'] <= ends[-1] + timedelta(days=1):
+                ends[-1] = max(ends[-1], closure['date_to'])
+            else:
+                starts.append(closure['date_from'])
+                ends.append(closure['date_to'])
+        return tuple(starts), tuple(ends)
+
+    @api.model
+    def _is_closed(self, day, location):
+        """True if an active closure covers `day` at `location`, with a
+        bisect over the cached intervals (no query once warm)."""
+        starts, ends = self._get_closed_intervals(location.id)
+        index = bisect_right(starts, day) - 1
+        return index >= 0 and day <= ends[index]
+
+    def _get_affected_appointments(self):
+        """Scheduled appointments falling inside these closures, in one
+        query. Plain date bounds and one branch per kind of closure keep
+        each join on the (location_id, pickup_date) appointment index."""
+        self.flush_recordset(['date_from', 'date_to', 'location_id', 'active'])
+        Appointment = self.env['repair.pickup.appointment']
+        Appointment.flush_model(['state', 'pickup_date', 'location_id'])
+        self.env.cr.execute("""
+            SELECT a.id
+              FROM repair_pickup_closure c
+              JOIN repair_pickup_appointment a
+                ON a.location_id = c.location_id
+               AND a.pickup_date BETWEEN c.date_from AND c.date_to
+             WHERE c.id = ANY(%s)
+               AND c.active
+               AND a.state = 'scheduled'
+             UNION
+            SELECT a.id
+              FROM repair_pickup_closure c
+              JOIN repair_pickup_appointment a
+                ON a.pickup_date BETWEEN c.date_from AND c.date_to
+             WHERE c.id = ANY(%s)
+               AND c.active
+               AND c.location_id IS NULL
+               AND a.state = 'scheduled'
+        """, [self.ids, self.ids])
+        return Appointment.browse(row[0] for row in self.env.cr.fetchall())
+
+    def _reschedule_affected_appointments(self):
+        """Move every scheduled appointment falling in these closures to
+        the nearest available day. Returns (moved, left) appointments."""
+        affected = self._get_affected_appointments()
+        plan = affected._plan_reschedule()
+        moved = affected._apply_reschedule(
+            plan, _("fermeture %s") % ", ".join(self.mapped('name')),
+        )
+        return moved, affected - moved
+
+    def action_reschedule_affected_appointments(self):
+        moved, left = self._reschedule_affected_appointments()
+        message = _("%s rendez-vous déplacé(s).") % len(moved)
+        if left:
+            message += " " + _(
+                "Aucun jour disponible pour : %s. À replanifier manuellement."
+            ) % ", ".join(left.mapped('display_name'))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Replanification"),
+                'message': message,
+                'type': 'warning' if left else 'success',
+                'sticky': bool(left),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
     def _covers(self, day, location):
         """Return True if this closure covers `day` at `location`."""
         self.ensure_one()
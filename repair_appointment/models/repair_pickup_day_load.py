@@ -0,0 +1,60 @@
+from odoo import api, fields, models
+
+
+class RepairPickupDayLoad(models.Model):
+    """One row per (location, day) whose bookings have ever changed.
+
+    The row is the serialization point of portal bookings: every booking
+    bumps its counter before the capacity is checked, so two transactions
+    booking the same day conflict on the same row. PostgreSQL then aborts
+    the late one with a serialization failure, the HTTP layer retries it
+    on a fresh snapshot, and the retry sees the first booking in its
+    count. The authoritative capacity count stays the scheduled
+    appointments themselves.
+
+    Releases (cancel, reschedule away, deletion) bump the counter too, so
+    `change_count` doubles as the per-day availability version used by
+    the portal cache.
+    """
+    _name = 'repair.pickup.day.load'
+    _description = 'Charge des jours de retrait'
+    _log_access = False
+    _order = 'day desc'
+
+    location_id = fields.Many2one(
+        'repair.pickup.location',
+        string='Lieu de retrait',
+        required=True,
+        ondelete='cascade',
+    )
+    day = fields.Date('Jour', required=True)
+    change_count = fields.Integer('Modifications', default=0)
+
+    _sql_constraints = [
+        ('location_day_unique',
+         'UNIQUE(location_id, day)',
+         "Une seule ligne de charge par lieu et par jour."),
+    ]
+
+    @api.model
+    def _reserve(self, location, day):
+        """Lock the (location, day) row for the rest of the transaction,
+        creating it if needed. Blocks while another transaction holds it."""
+        self._bump([(location.id, day)])
+
+    @api.model
+    def _bump(self, keys):
+        """Bump the rows of the given (location_id, day) pairs in one
+        statement. Rows are locked in a fixed order to avoid deadlocks
+        between transactions touching several days."""
+        keys = sorted(set(keys))
+        if not keys:
+            return
+        self.env.cr.execute("""
+            INSERT INTO repair_pickup_day_load (location_id, day, change_count)
+            SELECT location_id, day, 1
+              FROM unnest(%s::int[], %s::date[]) AS k(location_id, day)
+             ORDER BY location_id, day
+            ON CONFLICT (location_id, day)
+            DO UPDATE SET change_count = repair_pickup_day_load.change_count + 1
+        """, [[k[0] for k in keys], [k[1] for k in keys]])
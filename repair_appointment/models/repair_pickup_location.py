@@ -0,0 +1,53 @@
+import hashlib
+
+from odoo import fields, models
+
+
+class RepairPickupLocation(models.Model):
+    _inherit = 'repair.pickup.location'
+
+    availability_version = fields.Integer(
+        'Version des disponibilités',
+        default=0,
+        readonly=True,
+        copy=False,
+        help="Incrémentée à chaque modification d'horaire ou de fermeture "
+             "touchant ce lieu.",
+    )
+
+    def _bump_availability_version(self):
+        """Invalidate the portal availability of these locations after a
+        schedule or closure change. Appointment changes are tracked per day
+        on repair.pickup.day.load instead, so bookings of different days
+        never contend on the location row."""
+        if not self:
+            return
+        self.env.cr.execute("""
+            UPDATE repair_pickup_location
+               SET availability_version = availability_version + 1
+             WHERE id = ANY(%s)
+        """, [self.ids])
+        self.invalidate_recordset(['availability_version'])
+
+    def _get_availability_version(self, today, min_lead, horizon):
+        """Opaque token that changes whenever the availability of this
+        location may have changed, in one query.
+
+        Besides the counters, the transaction ids (xmin) of the rows are
+        part of the token: a rolled-back change can leave the counters at
+        a value that another change later reaches again, but never with
+        the same xmin."""
+        self.ensure_one()
+        self.env.cr.execute("""
+            SELECT l.availability_version, l.xmin::text,
+                   COALESCE(SUM(d.change_count), 0),
+                   COALESCE(MAX(d.xmin::text::bigint), 0)
+              FROM repair_pickup_location l
+              LEFT JOIN repair_pickup_day_load d
+                     ON d.location_id = l.id AND d.day >= %s
+             WHERE l.id = %s
+             GROUP BY l.id
+        """, [today, self.id])
+        row = self.env.cr.fetchone()
+        raw = f"{self.env.cr.dbname}|{self.id}|{today}|{min_lead}|{horizon}|{row}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:20]
@@ -1,7 +1,32 @@
-from odoo import api, fields, models, _
+from collections import namedtuple
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 
 
+PickupSlotConfig = namedtuple('PickupSlotConfig', ['id', 'label', 'capacity'])
+
+PickupParams = namedtuple('PickupParams', [
+    'booking_horizon_days', 'min_lead_days',
+    'reminder_delay_days', 'escalation_delay_days',
+])
+
+
+class PickupConfig(namedtuple('PickupConfig', [
+        'schedule_id', 'daily_capacity', 'open_weekdays', 'slots', 'params'])):
+    """Immutable snapshot of a location's active schedule: open weekdays,
+    daily capacity, slots per weekday (0=Mon..6=Sun) and the global
+    booking parameters. Holds no records, so it can live in the registry
+    cache and be shared between requests."""
+    __slots__ = ()
+
+    def is_open(self, weekday_index):
+        return weekday_index in self.open_weekdays
+
+    def get_slots(self, weekday_index):
+        return self.slots[weekday_index]
+
+
 class RepairPickupSchedule(models.Model):
     _name = 'repair.pickup.schedule'
     _description = 'Horaires de retrait par lieu'
@@ -28,6 +53,12 @@ class RepairPickupSchedule(models.Model):
         default=6,
         help="Nombre maximum de retraits acceptés pour un jour ouvré.",
     )
+    slot_ids = fields.One2many(
+        'repair.pickup.slot', 'schedule_id',
+        string='Créneaux',
+        help="Créneaux horaires proposés au client. Un jour sans créneau "
+             "se réserve à la journée.",
+    )
 
     _sql_constraints = [
         ('location_unique',
@@ -41,6 +72,27 @@ class RepairPickupSchedule(models.Model):
             if rec.daily_capacity < 1:
                 raise ValidationError(_("La capacité quotidienne doit être au moins 1."))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        schedules = super().create(vals_list)
+        schedules.location_id._bump_availability_version()
+        self.env.registry.clear_cache()
+        return schedules
+
+    def write(self, vals):
+        locations = self.location_id
+        res = super().write(vals)
+        (locations | self.location_id)._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        locations = self.location_id
+        res = super().unlink()
+        locations.exists()._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
+
     def _day_is_open(self, weekday_index):
         """weekday_index: 0=Mon..6=Sun. Returns bool."""
         mapping = [
@@ -50,6 +102,48 @@ class RepairPickupSchedule(models.Model):
         ]
         return bool(mapping[weekday_index])
 
+    def _get_slots(self, weekday_index):
+        """Slots of this schedule for weekday_index (0=Mon..6=Sun)."""
+        weekday = str(weekday_index)
+        return self.slot_ids.filtered(lambda slot: slot.weekday == weekday)
+
+    @api.model
+    @tools.ormcache()
+    def _get_pickup_params(self):
+        """Booking parameters from the settings, read once per registry.
+        ir.config_parameter clears the registry cache on every change."""
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return PickupParams(
+            booking_horizon_days=int(get_param('repair_appointment.booking_horizon_days', default='14')),
+            min_lead_days=int(get_param('repair_appointment.min_lead_days', default='2')),
+            reminder_delay_days=int(get_param('repair_appointment.reminder_delay_days', default='3')),
+            escalation_delay_days=int(get_param('repair_appointment.escalation_delay_days', default='3')),
+        )
+
+    @api.model
+    @tools.ormcache('location_id')
+    def _get_pickup_config(self, location_id):
+        """PickupConfig of the active schedule of `location_id`, or None
+        when the location has none. Cleared on every schedule or slot
+        create / write / unlink, and on settings changes."""
+        schedule = self.sudo().search(
+            [('location_id', '=', location_id), ('active', '=', True)], limit=1,
+        )
+        if not schedule:
+            return None
+        slots = [[] for _i in range(7)]
+        for slot in schedule.slot_ids:
+            slots[int(slot.weekday)].append(
+                PickupSlotConfig(slot.id, slot.display_name, slot.capacity),
+            )
+        return PickupConfig(
+            schedule_id=schedule.id,
+            daily_capacity=schedule.daily_capacity,
+            open_weekdays=frozenset(i for i in range(7) if schedule._day_is_open(i)),
+            slots=tuple(tuple(day) for day in slots),
+            params=self._get_pickup_params(),
+        )
+
     @api.model
     def _seed_default_schedules(self):
         Location = self.env['repair.pickup.location']
@@ -0,0 +1,81 @@
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+
+WEEKDAY_SELECTION = [
+    ('0', 'Lundi'),
+    ('1', 'Mardi'),
+    ('2', 'Mercredi'),
+    ('3', 'Jeudi'),
+    ('4', 'Vendredi'),
+    ('5', 'Samedi'),
+    ('6', 'Dimanche'),
+]
+
+
+class RepairPickupSlot(models.Model):
+    """Intra-day pickup slot of a schedule. A weekday with slots spreads
+    its bookings over them, each slot with its own capacity; the
+    schedule's daily_capacity still caps the day as a whole. Weekdays
+    without slots keep the day-level behaviour."""
+    _name = 'repair.pickup.slot'
+    _description = 'Créneau de retrait'
+    _order = 'schedule_id, weekday, time_from'
+
+    schedule_id = fields.Many2one(
+        'repair.pickup.schedule',
+        string='Horaire',
+        required=True,
+        ondelete='cascade',
+    )
+    location_id = fields.Many2one(
+        related='schedule_id.location_id',
+        store=True,
+    )
+    weekday = fields.Selection(WEEKDAY_SELECTION, 'Jour', required=True)
+    time_from = fields.Float('De', required=True)
+    time_to = fields.Float('À', required=True)
+    capacity = fields.Integer(
+        'Capacité',
+        default=2,
+        help="Nombre maximum de retraits acceptés sur ce créneau.",
+    )
+
+    @api.constrains('time_from', 'time_to', 'capacity')
+    def _check_slot(self):
+        for slot in self:
+            if not 0 <= slot.time_from < slot.time_to <= 24:
+                raise ValidationError(_("Le créneau doit commencer avant de finir, dans la journée."))
+            if slot.capacity < 1:
+                raise ValidationError(_("La capacité d'un créneau doit être au moins 1."))
+
+    @api.depends('time_from', 'time_to')
+    def _compute_display_name(self):
+        for slot in self:
+            slot.display_name = f"{self._format_time(slot.time_from)} – {self._format_time(slot.time_to)}"
+
+    @api.model
+    def _format_time(self, value):
+        hours, minutes = divmod(round(value * 60), 60)
+        return f"{hours:02d}:{minutes:02d}"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        slots = super().create(vals_list)
+        slots.location_id._bump_availability_version()
+        self.env.registry.clear_cache()
+        return slots
+
+    def write(self, vals):
+        locations = self.location_id
+        res = super().write(vals)
+        (locations | self.location_id)._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        locations = self.location_id
+        res = super().unlink()
+        locations.exists()._bump_availability_version()
+        self.env.registry.clear_cache()
+        return res
@@ -4,8 +4,78 @@ import { patch } from "@web/core/utils/patch";
 import { CalendarCommonRenderer } from "@web/views/calendar/calendar_common/calendar_common_renderer";
 import { ConfirmationDialog } from "@web/core/confirmation_dialog/confirmation_dialog";
 import { _t } from "@web/core/l10n/translation";
+import { serializeDate } from "@web/core/l10n/dates";
+import { useService } from "@web/core/utils/hooks";
+import { onWillStart, onWillUpdateProps } from "@odoo/owl";
+
+const PICKUP_MODEL = "repair.pickup.appointment";
 
 patch(CalendarCommonRenderer.prototype, {
+    setup() {
+        super.setup(...arguments);
+        this.pickupCapacity = [];
+        if (this.props.model.meta.resModel !== PICKUP_MODEL) {
+            return;
+        }
+        const rpc = useService("rpc");
+        // One request per calendar load, for the whole visible range.
+        const loadCapacity = async (model) => {
+            this.pickupCapacity = await rpc("/repair_appointment/capacity_overlay", {
+                date_from: serializeDate(model.rangeStart),
+                date_to: serializeDate(model.rangeEnd),
+            });
+        };
+        onWillStart(() => loadCapacity(this.props.model));
+        onWillUpdateProps((nextProps) => loadCapacity(nextProps.model));
+    },
+
+    mapRecordsToEvents() {
+        const events = super.mapRecordsToEvents(...arguments);
+        if (this.props.model.meta.resModel !== PICKUP_MODEL) {
+            return events;
+        }
+        // One background event per day summing up every location.
+        const byDay = {};
+        for (const entry of this.pickupCapacity) {
+            (byDay[entry.date] = byDay[entry.date] || []).push(entry);
+        }
+        for (const [day, entries] of Object.entries(byDay)) {
+            const open = entries.filter((e) => !e.closed);
+            let status = "open";
+            if (!open.length) {
+                status = "closed";
+            } else if (open.every((e) => e.booked >= e.capacity)) {
+                status = "full";
+            }
+            const label = entries
+                .map((e) => e.closed
+                    ? `${e.location_name} : ${_t("fermé")}`
+                    : `${e.location_name} : ${e.booked}/${e.capacity}`)
+                .join("\n");
+            events.push({
+                id: `pickup_capacity_${day}`,
+                start: day,
+                allDay: true,
+                rendering: "background",
+                classNames: ["o_pickup_capacity", `o_pickup_capacity_${status}`],
+                extendedProps: { pickupCapacityLabel: label },
+            });
+        }
+        return events;
+    },
+
+    onEventRender(info) {
+        const label = info.event.extendedProps.pickupCapacityLabel;
+        if (label) {
+            const span = document.createElement("span");
+            span.className = "o_pickup_capacity_label";
+            span.textContent = label;
+            info.el.appendChild(span);
+            return;
+        }
+        return super.onEventRender(...arguments);
+    },
+
     async onEventDrop(info) {
         const model = this.props.model;
         if (model.meta.resModel !== "repair.pickup.appointment") {
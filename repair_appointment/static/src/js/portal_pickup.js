@@ -11,22 +11,59 @@
         const confirmLabel = document.getElementById('pickup-confirm-label');
         const submitBtn = document.getElementById('pickup-submit-btn');
         const cancelBtn = document.getElementById('pickup-cancel-btn');
+        const slotBlock = document.getElementById('pickup-slot-block');
+        const slotOptions = document.getElementById('pickup-slot-options');
 
-        fetch('/my/pickup/' + token + '/slots', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({jsonrpc: '2.0', method: 'call', params: {}}),
+        // Days split into slots need one picked before the form can go.
+        function renderSlots(day) {
+            const slots = (day && day.slots) || [];
+            if (!slotBlock || !slotOptions) return false;
+            slotOptions.innerHTML = '';
+            slotBlock.style.display = slots.length ? 'block' : 'none';
+            slots.forEach(function (slot) {
+                const id = 'pickup-slot-' + slot.id;
+                const wrapper = document.createElement('div');
+                wrapper.className = 'form-check form-check-inline';
+                const radio = document.createElement('input');
+                radio.type = 'radio';
+                radio.name = 'slot_id';
+                radio.value = slot.id;
+                radio.id = id;
+                radio.className = 'form-check-input';
+                radio.disabled = slot.remaining_capacity <= 0;
+                radio.addEventListener('change', function () {
+                    if (submitBtn) submitBtn.disabled = false;
+                });
+                const label = document.createElement('label');
+                label.className = 'form-check-label';
+                label.htmlFor = id;
+                label.textContent = slot.label + (radio.disabled ? ' (complet)' : '');
+                wrapper.appendChild(radio);
+                wrapper.appendChild(label);
+                slotOptions.appendChild(wrapper);
+            });
+            return slots.length > 0;
+        }
+
+        // 'no-cache' revalidates with If-None-Match: an unchanged
+        // availability comes back as an empty 304 served from the cache.
+        fetch('/my/pickup/' + token + '/availability', {
+            method: 'GET',
+            cache: 'no-cache',
+            headers: {'Accept': 'application/json'},
         }).then(function (resp) {
             return resp.json();
         }).then(function (payload) {
-            const days = (payload && payload.result) || [];
+            const days = payload || [];
             if (!days.length) {
                 input.placeholder = 'Aucun jour disponible';
                 input.disabled = true;
                 return;
             }
             const disabledDates = [];
+            const daysByDate = {};
             days.forEach(function (d) {
+                daysByDate[d.date] = d;
                 if (d.state !== 'open') disabledDates.push(d.date);
             });
             const first = days[0].date;
@@ -44,10 +81,12 @@
                 defaultDate: currentDate || undefined,
                 onChange: function (selectedDates, dateStr) {
                     if (!dateStr) {
+                        renderSlots(null);
                         if (confirmBlock) confirmBlock.style.display = 'none';
                         if (submitBtn) submitBtn.disabled = true;
                         return;
                     }
+                    const needsSlot = renderSlots(daysByDate[dateStr]);
                     if (confirmLabel) {
                         const d = new Date(dateStr + 'T12:00:00');
                         const weekdays = ['dimanche', 'lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi'];
@@ -57,13 +96,14 @@
                                                  + months[d.getMonth()] + ' ' + d.getFullYear();
                     }
                     if (confirmBlock) confirmBlock.style.display = 'block';
-                    if (submitBtn) submitBtn.disabled = false;
+                    if (submitBtn) submitBtn.disabled = needsSlot;
                 },
             });
 
             if (cancelBtn) {
                 cancelBtn.addEventListener('click', function () {
                     fp.clear();
+                    renderSlots(null);
                     if (confirmBlock) confirmBlock.style.display = 'none';
                     if (submitBtn) submitBtn.disabled = true;
                 });
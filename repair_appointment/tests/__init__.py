@@ -10,3 +10,6 @@ from . import test_portal_controller
 from . import test_reschedule_notification
 from . import test_mail_template_pickup_ready
 from . import test_daily_agenda
+from . import test_booking_concurrency
+from . import test_availability_cache
+from . import test_slots
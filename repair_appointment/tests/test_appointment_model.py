@@ -1,3 +1,4 @@
+from odoo.exceptions import ValidationError
 from odoo.tests import tagged
 from .common import RepairAppointmentCase
 
@@ -51,3 +52,45 @@ class TestAppointmentModel(RepairAppointmentCase):
         with self.assertRaises(ValidationError):
             apt.write({'state': 'scheduled'})
 
+
+    def test_stored_summary_follows_batch_repairs(self):
+        batch = self._make_batch(repair_count=1)
+        apt = self.Appointment.create({'batch_id': batch.id})
+        self.assertEqual(apt.device_count, 1)
+        self.env['repair.order'].create({
+            'partner_id': self.partner.id,
+            'batch_id': batch.id,
+            'pickup_location_id': self.location_boutique.id,
+        })
+        self.assertEqual(apt.device_count, 2)
+        self.assertIn('(2 Appareils)', apt.display_name)
+
+        self.partner.name = 'Client Renommé'
+        # Only the client name is stored; the count is added when read.
+        self.assertEqual(apt.calendar_label, 'Client Renommé')
+        self.assertTrue(apt.display_name.startswith('Client Renommé'))
+        self.assertIn('(2 Appareils)', apt.display_name)
+
+    def test_calendar_read_stays_on_appointment_table(self):
+        appointments = self.Appointment.create([
+            {'batch_id': self._make_batch().id} for _i in range(5)
+        ])
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(1):
+            appointments.read(
+                ['display_name', 'device_count', 'device_summary', 'location_id'],
+                load=None,
+            )
+
+    def test_second_active_appointment_rejected(self):
+        batch = self._make_batch()
+        first = self.Appointment.create({'batch_id': batch.id})
+        with self.assertRaises(ValidationError):
+            self.Appointment.create({'batch_id': batch.id})
+        # A closed appointment does not block a new one.
+        first.action_cancel()
+        second = self.Appointment.create({'batch_id': batch.id})
+        with self.assertRaises(ValidationError):
+            first.state = 'pending'
+        self.assertEqual(second.state, 'pending')
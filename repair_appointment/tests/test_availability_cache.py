@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from odoo.tests import tagged
+from .common import RepairAppointmentCase
+
+
+@tagged('repair_appointment', 'post_install', '-at_install')
+class TestAvailabilityCache(RepairAppointmentCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.schedule_boutique = cls.Schedule.search(
+            [('location_id', '=', cls.location_boutique.id)], limit=1
+        ) or cls.Schedule.create({'location_id': cls.location_boutique.id})
+
+    def _version(self):
+        version, _days = self.Appointment._get_available_days_cached(
+            self.location_boutique,
+        )
+        return version
+
+    def _open_day(self, offset=3):
+        target = date.today() + timedelta(days=offset)
+        while target.weekday() == 6:
+            target += timedelta(days=1)
+        return target
+
+    def test_memo_reused_while_version_unchanged(self):
+        version, days = self.Appointment._get_available_days_cached(
+            self.location_boutique,
+        )
+        again, days_again = self.Appointment._get_available_days_cached(
+            self.location_boutique,
+        )
+        self.assertEqual(version, again)
+        self.assertIs(days, days_again)
+
+    def test_booking_and_cancellation_change_version(self):
+        version = self._version()
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        self.assertEqual(self._version(), version)  # pending: no capacity used
+        apt.with_context(skip_slot_validation=True).action_schedule(self._open_day())
+        booked = self._version()
+        self.assertNotEqual(booked, version)
+        apt.action_cancel()
+        self.assertNotEqual(self._version(), booked)
+
+    def test_memo_reflects_new_booking(self):
+        target = self._open_day()
+        _version, days = self.Appointment._get_available_days_cached(
+            self.location_boutique,
+        )
+        before = {d['date']: d['remaining_capacity'] for d in days}[target]
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        apt.with_context(skip_slot_validation=True).action_schedule(target)
+        _version, days = self.Appointment._get_available_days_cached(
+            self.location_boutique,
+        )
+        after = {d['date']: d['remaining_capacity'] for d in days}[target]
+        self.assertEqual(after, before - 1)
+
+    def test_schedule_and_closure_change_version(self):
+        version = self._version()
+        self.schedule_boutique.daily_capacity += 1
+        after_schedule = self._version()
+        self.assertNotEqual(after_schedule, version)
+        self.Closure.create({
+            'name': 'Inventaire',
+            'date_from': self._open_day(5),
+            'date_to': self._open_day(5),
+        })
+        self.assertNotEqual(self._version(), after_schedule)
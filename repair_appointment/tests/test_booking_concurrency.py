@@ -0,0 +1,172 @@
+import threading
+
+from odoo import SUPERUSER_ID, api
+from odoo.exceptions import UserError, ValidationError
+from odoo.service.model import retrying
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('repair_appointment', 'post_install', '-at_install')
+class TestBookingConcurrency(TransactionCase):
+    """Several clients book the last slots of a day at the same time, each
+    in its own committed transaction, the way concurrent portal requests
+    do. The test cursor cannot see uncommitted fixtures, so the data is
+    committed through a separate cursor and removed afterwards."""
+
+    CLIENTS = 5
+    CAPACITY = 2
+
+    def setUp(self):
+        super().setUp()
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            location = env['repair.pickup.location'].create({'name': 'Boutique Concurrence'})
+            schedule = env['repair.pickup.schedule'].create({
+                'location_id': location.id,
+                'daily_capacity': self.CAPACITY,
+            })
+            partner = env['res.partner'].create({'name': 'Client Concurrence'})
+            batches = env['repair.batch'].create([{
+                'partner_id': partner.id,
+                'repair_ids': [(0, 0, {
+                    'partner_id': partner.id,
+                    'pickup_location_id': location.id,
+                })],
+            } for _i in range(self.CLIENTS)])
+            appointments = env['repair.pickup.appointment'].create([
+                {'batch_id': batch.id} for batch in batches
+            ])
+            days = appointments._compute_available_days(location)
+            self.target = next(d['date'] for d in days if d['state'] == 'open')
+            self.ids_to_clean = {
+                'repair.pickup.appointment': appointments.ids,
+                'repair.order': batches.repair_ids.ids,
+                'repair.batch': batches.ids,
+                'repair.pickup.schedule': schedule.ids,
+                'repair.pickup.location': location.ids,
+                'res.partner': partner.ids,
+            }
+            self.location_id = location.id
+            self.appointment_ids = appointments.ids
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            for model, ids in self.ids_to_clean.items():
+                env[model].browse(ids).exists().unlink()
+
+    def _book(self, apt_id, barrier, results):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            # Read first so the transaction snapshot predates the competing
+            # bookings, as in a real request.
+            env['repair.pickup.appointment'].browse(apt_id).state
+            barrier.wait()
+            try:
+                retrying(
+                    lambda: env['repair.pickup.appointment'].browse(apt_id)
+                    .action_schedule(self.target),
+                    env,
+                )
+            except UserError:
+                cr.rollback()
+                results.append('refused')
+            else:
+                cr.commit()
+                results.append('booked')
+
+    def test_capacity_never_exceeded(self):
+        barrier = threading.Barrier(self.CLIENTS)
+        results = []
+        threads = [
+            threading.Thread(target=self._book, args=(apt_id, barrier, results))
+            for apt_id in self.appointment_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('booked'), self.CAPACITY)
+        self.assertEqual(results.count('refused'), self.CLIENTS - self.CAPACITY)
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            booked = env['repair.pickup.appointment'].search_count([
+                ('location_id', '=', self.location_id),
+                ('pickup_date', '=', self.target),
+                ('state', '=', 'scheduled'),
+            ])
+            load = env['repair.pickup.day.load'].search_count([
+                ('location_id', '=', self.location_id),
+                ('day', '=', self.target),
+            ])
+        self.assertEqual(booked, self.CAPACITY)
+        self.assertEqual(load, 1)
+
+
+@tagged('repair_appointment', 'post_install', '-at_install')
+class TestActiveAppointmentConcurrency(TransactionCase):
+    """Portal and backend creating the pickup appointment of the same
+    batch at once: the partial unique index lets exactly one through."""
+
+    def setUp(self):
+        super().setUp()
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            partner = env['res.partner'].create({'name': 'Client Course'})
+            batch = env['repair.batch'].create({
+                'partner_id': partner.id,
+                'repair_ids': [(0, 0, {'partner_id': partner.id})],
+            })
+            self.batch_id = batch.id
+            self.ids_to_clean = {
+                'repair.order': batch.repair_ids.ids,
+                'repair.batch': batch.ids,
+                'res.partner': partner.ids,
+            }
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            env['repair.pickup.appointment'].search([('batch_id', '=', self.batch_id)]).unlink()
+            for model, ids in self.ids_to_clean.items():
+                env[model].browse(ids).exists().unlink()
+
+    def _create(self, barrier, results):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            batch = env['repair.batch'].browse(self.batch_id)
+            batch.current_appointment_id  # snapshot before the race
+            barrier.wait()
+            try:
+                batch.action_create_pickup_appointment(notify=False)
+            except ValidationError:
+                cr.rollback()
+                results.append('refused')
+            else:
+                cr.commit()
+                results.append('created')
+
+    def test_single_active_appointment_under_concurrency(self):
+        barrier = threading.Barrier(2)
+        results = []
+        threads = [
+            threading.Thread(target=self._create, args=(barrier, results))
+            for _i in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['created', 'refused'])
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            active = env['repair.pickup.appointment'].search_count([
+                ('batch_id', '=', self.batch_id),
+                ('state', 'in', ('pending', 'scheduled')),
+            ])
+        self.assertEqual(active, 1)
@@ -51,3 +51,96 @@ class TestClosure(RepairAppointmentCase):
         })
         self.assertTrue(closure._covers(date(2026, 5, 1), self.location_boutique))
         self.assertTrue(closure._covers(date(2026, 5, 1), self.location_atelier))
+
+    def test_intervals_merged_and_looked_up(self):
+        self.Closure.create([
+            {'name': 'A', 'location_id': self.location_boutique.id,
+             'date_from': date(2031, 3, 1), 'date_to': date(2031, 3, 5)},
+            {'name': 'B', 'location_id': self.location_boutique.id,
+             'date_from': date(2031, 3, 4), 'date_to': date(2031, 3, 8)},
+            {'name': 'C (adjacent)', 'date_from': date(2031, 3, 9), 'date_to': date(2031, 3, 9)},
+            {'name': 'D', 'location_id': self.location_atelier.id,
+             'date_from': date(2031, 3, 20), 'date_to': date(2031, 3, 20)},
+        ])
+        starts, ends = self.Closure._get_closed_intervals(self.location_boutique.id)
+        self.assertIn(date(2031, 3, 1), starts)
+        self.assertEqual(ends[starts.index(date(2031, 3, 1))], date(2031, 3, 9))
+        self.assertTrue(self.Closure._is_closed(date(2031, 3, 6), self.location_boutique))
+        self.assertTrue(self.Closure._is_closed(date(2031, 3, 9), self.location_boutique))
+        self.assertFalse(self.Closure._is_closed(date(2031, 3, 10), self.location_boutique))
+        self.assertFalse(self.Closure._is_closed(date(2031, 3, 20), self.location_boutique))
+        self.assertTrue(self.Closure._is_closed(date(2031, 3, 20), self.location_atelier))
+
+    def test_interval_cache_cleared_on_archive(self):
+        closure = self.Closure.create({
+            'name': 'Inventaire', 'location_id': self.location_boutique.id,
+            'date_from': date(2031, 6, 2), 'date_to': date(2031, 6, 2),
+        })
+        self.assertTrue(self.Closure._is_closed(date(2031, 6, 2), self.location_boutique))
+        closure.active = False
+        self.assertFalse(self.Closure._is_closed(date(2031, 6, 2), self.location_boutique))
+
+    def test_interval_cache_ignores_active_test_context(self):
+        self.Closure.create({
+            'name': 'Archivée', 'location_id': self.location_boutique.id,
+            'date_from': date(2031, 7, 1), 'date_to': date(2031, 7, 1),
+            'active': False,
+        })
+        self.env.registry.clear_cache()
+        # First (cache-filling) call made without the active filter.
+        self.assertFalse(self.Closure.with_context(active_test=False)._is_closed(
+            date(2031, 7, 1), self.location_boutique))
+        self.assertFalse(self.Closure._is_closed(date(2031, 7, 1), self.location_boutique))
+
+    def test_affected_appointments_found_by_range(self):
+        inside = self.Appointment.create({'batch_id': self._make_batch().id})
+        outside = self.Appointment.create({'batch_id': self._make_batch().id})
+        other_location = self.Appointment.create({
+            'batch_id': self._make_batch(location=self.location_atelier).id,
+        })
+        schedule = self.Appointment.with_context(skip_slot_validation=True)
+        schedule.browse(inside.id).action_schedule(date(2031, 9, 3))
+        schedule.browse(outside.id).action_schedule(date(2031, 9, 10))
+        schedule.browse(other_location.id).action_schedule(date(2031, 9, 3))
+        closure = self.Closure.create({
+            'name': 'Travaux', 'location_id': self.location_boutique.id,
+            'date_from': date(2031, 9, 1), 'date_to': date(2031, 9, 5),
+        })
+        self.assertEqual(closure._get_affected_appointments(), inside)
+
+    def test_auto_reschedule_moves_to_nearest_days_within_capacity(self):
+        schedule = self.Schedule.search(
+            [('location_id', '=', self.location_boutique.id)], limit=1,
+        ) or self.Schedule.create({'location_id': self.location_boutique.id})
+        schedule.write({'daily_capacity': 1, 'sunday_open': False})
+        day = date(2031, 10, 15)  # a Wednesday
+        apts = self.Appointment.browse()
+        for _i in range(2):
+            apt = self.Appointment.create({'batch_id': self._make_batch().id})
+            apt.with_context(skip_slot_validation=True).action_schedule(day)
+            apts |= apt
+        self.Closure.create({
+            'name': 'Dégât des eaux', 'location_id': self.location_boutique.id,
+            'date_from': day, 'date_to': day, 'auto_reschedule': True,
+        })
+        self.assertEqual(
+            sorted(apts.mapped('pickup_date')),
+            [date(2031, 10, 14), date(2031, 10, 16)],
+        )
+        self.assertEqual(apts.mapped('reschedule_count'), [1, 1])
+        self.assertEqual(set(apts.mapped('state')), {'scheduled'})
+
+    def test_reschedule_action_reports_unplaceable_appointments(self):
+        apt = self.Appointment.create({
+            'batch_id': self._make_batch(location=self.location_atelier).id,
+        })
+        apt.with_context(skip_slot_validation=True).action_schedule(date(2031, 11, 5))
+        self.Schedule.search([('location_id', '=', self.location_atelier.id)]).unlink()
+        closure = self.Closure.create({
+            'name': 'Fermeture atelier', 'location_id': self.location_atelier.id,
+            'date_from': date(2031, 11, 1), 'date_to': date(2031, 11, 30),
+        })
+        self.assertEqual(closure.affected_appointment_count, 1)
+        action = closure.action_reschedule_affected_appointments()
+        self.assertEqual(action['params']['type'], 'warning')
+        self.assertEqual(apt.pickup_date, date(2031, 11, 5))
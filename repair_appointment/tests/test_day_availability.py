@@ -68,3 +68,76 @@ class TestDayAvailability(RepairAppointmentCase):
         batch = self._make_batch()
         apt = self.Appointment.create({'batch_id': batch.id})
         self.assertFalse(apt._is_day_available(d))
+
+    def _queries_for_horizon(self, horizon):
+        cr = self.env.cr
+        self.env.invalidate_all()
+        before = cr.sql_log_count
+        self.Appointment._compute_available_days(
+            self.location_boutique, booking_horizon_days=horizon,
+        )
+        return cr.sql_log_count - before
+
+    def test_query_count_independent_of_horizon(self):
+        # Bookings and closures spread over the window so every code path
+        # (open, full, closed) is exercised.
+        target = date.today() + timedelta(days=4)
+        while target.weekday() == 6:
+            target += timedelta(days=1)
+        batch = self._make_batch()
+        apt = self.Appointment.create({'batch_id': batch.id})
+        apt.with_context(skip_slot_validation=True).action_schedule(target)
+        self.Closure.create({
+            'name': 'Fermeture longue',
+            'date_from': date.today() + timedelta(days=20),
+            'date_to': date.today() + timedelta(days=25),
+        })
+        self.env.flush_all()
+        self._queries_for_horizon(14)  # warm caches (env.ref, params)
+        self.assertEqual(
+            self._queries_for_horizon(14),
+            self._queries_for_horizon(60),
+        )
+
+    def test_is_day_available_excludes_self_from_count(self):
+        target = date.today() + timedelta(days=3)
+        while target.weekday() == 6:
+            target += timedelta(days=1)
+        self.schedule_boutique.daily_capacity = 1
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        apt.with_context(skip_slot_validation=True).action_schedule(target)
+        self.assertTrue(apt._is_day_available(target))
+        other = self.Appointment.create({'batch_id': self._make_batch().id})
+        self.assertFalse(other._is_day_available(target))
+
+    def test_capacity_overlay_reports_booked_and_closed(self):
+        target = date.today() + timedelta(days=3)
+        while target.weekday() == 6:
+            target += timedelta(days=1)
+        closed = target + timedelta(days=1)
+        while closed.weekday() == 6:
+            closed += timedelta(days=1)
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        apt.with_context(skip_slot_validation=True).action_schedule(target)
+        self.Closure.create({'name': 'Inventaire', 'date_from': closed, 'date_to': closed})
+
+        overlay = self.Appointment._get_capacity_overlay(
+            target, closed, self.location_boutique,
+        )
+        by_day = {entry['date']: entry for entry in overlay}
+        self.assertEqual(by_day[target]['booked'], 1)
+        self.assertEqual(by_day[target]['capacity'], self.schedule_boutique.daily_capacity)
+        self.assertFalse(by_day[target]['closed'])
+        self.assertTrue(by_day[closed]['closed'])
+
+    def test_capacity_overlay_query_count_independent_of_range(self):
+        today = date.today()
+        self.Appointment._get_capacity_overlay(today, today + timedelta(days=7))
+        cr = self.env.cr
+        counts = []
+        for days in (7, 120):
+            self.env.invalidate_all()
+            before = cr.sql_log_count
+            self.Appointment._get_capacity_overlay(today, today + timedelta(days=days))
+            counts.append(cr.sql_log_count - before)
+        self.assertEqual(counts[0], counts[1])
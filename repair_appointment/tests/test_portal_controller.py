@@ -106,3 +106,26 @@ class TestPortalController(HttpCase, RepairAppointmentCase):
         self.assertIn('remaining_capacity', sample)
         self.assertIn(sample['state'],
                       ('open', 'closed', 'full', 'lead_time'))
+
+    def test_availability_etag_revalidation(self):
+        batch = self._make_batch()
+        apt = batch.action_create_pickup_appointment(notify=False)
+        url = f'/my/pickup/{apt.token}/availability'
+        resp = self.url_open(url)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp.headers.get('ETag')
+        self.assertTrue(etag)
+        self.assertTrue(resp.json())
+
+        resp = self.url_open(url, headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+
+        # A booking at the location changes the version.
+        other = self._make_batch().action_create_pickup_appointment(notify=False)
+        target = date.today() + timedelta(days=3)
+        while target.weekday() == 6:
+            target += timedelta(days=1)
+        other.with_context(skip_slot_validation=True).action_schedule(target)
+        resp = self.url_open(url, headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers.get('ETag'), etag)
@@ -68,3 +68,33 @@ class TestReminderCron(RepairAppointmentCase):
         apt.invalidate_recordset(['escalation_activity_id'])
         self.assertTrue(apt.escalation_activity_id)
         self.assertFalse(apt.contacted)  # flag consumed
+
+    def test_batch_run_handles_every_due_appointment(self):
+        due = self.Appointment.browse()
+        for _i in range(3):
+            due |= self._make_pending_with_notification(days_ago=4)
+        recent = self._make_pending_with_notification(days_ago=1)
+        self.Appointment._cron_process_pending_appointments()
+        self.assertTrue(all(due.mapped('last_reminder_sent_at')))
+        self.assertFalse(recent.last_reminder_sent_at)
+
+        due.last_reminder_sent_at = fields.Datetime.now() - timedelta(days=4)
+        self.Appointment._cron_process_pending_appointments()
+        due.invalidate_recordset(['escalation_activity_id'])
+        self.assertTrue(all(due.mapped('escalation_activity_id')))
+        # Open escalations are not duplicated by the next run.
+        activities = self.env['mail.activity'].search_count([
+            ('res_model', '=', 'repair.pickup.appointment'),
+            ('res_id', 'in', due.ids),
+        ])
+        self.Appointment._cron_process_pending_appointments()
+        self.assertEqual(self.env['mail.activity'].search_count([
+            ('res_model', '=', 'repair.pickup.appointment'),
+            ('res_id', 'in', due.ids),
+        ]), activities)
+
+    def test_skipped_when_another_run_holds_the_lock(self):
+        apt = self._make_pending_with_notification(days_ago=4)
+        with patch.object(type(self.Appointment), '_try_cron_lock', return_value=False):
+            self.Appointment._cron_process_pending_appointments()
+        self.assertFalse(apt.last_reminder_sent_at)
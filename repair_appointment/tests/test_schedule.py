@@ -44,3 +44,33 @@ class TestSchedule(RepairAppointmentCase):
                       'slot2_end', 'slot_capacity'):
             self.assertNotIn(fname, sched._fields,
                              "%s must be removed" % fname)
+
+    def test_pickup_config_cached_and_invalidated(self):
+        schedule = self.Schedule.create({'location_id': self.location_boutique.id})
+        location_id = self.location_boutique.id
+        config = self.Schedule._get_pickup_config(location_id)
+        self.assertEqual(config.schedule_id, schedule.id)
+        self.assertFalse(config.is_open(6))
+        with self.assertQueryCount(0):
+            self.assertIs(self.Schedule._get_pickup_config(location_id), config)
+
+        schedule.write({'daily_capacity': 9, 'sunday_open': True})
+        config = self.Schedule._get_pickup_config(location_id)
+        self.assertEqual(config.daily_capacity, 9)
+        self.assertTrue(config.is_open(6))
+
+        slot = self.env['repair.pickup.slot'].create({
+            'schedule_id': schedule.id, 'weekday': '1',
+            'time_from': 9.0, 'time_to': 12.5, 'capacity': 3,
+        })
+        config = self.Schedule._get_pickup_config(location_id)
+        self.assertEqual(config.get_slots(1), ((slot.id, '09:00 – 12:30', 3),))
+        self.assertEqual(config.get_slots(2), ())
+
+        self.env['ir.config_parameter'].sudo().set_param(
+            'repair_appointment.min_lead_days', '5',
+        )
+        self.assertEqual(self.Schedule._get_pickup_config(location_id).params.min_lead_days, 5)
+
+        schedule.active = False
+        self.assertIsNone(self.Schedule._get_pickup_config(location_id))
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+from .common import RepairAppointmentCase
+
+
+@tagged('repair_appointment', 'post_install', '-at_install')
+class TestSlots(RepairAppointmentCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.schedule = cls.Schedule.search(
+            [('location_id', '=', cls.location_boutique.id)], limit=1
+        ) or cls.Schedule.create({'location_id': cls.location_boutique.id})
+        cls.schedule.daily_capacity = 3
+        cls.target = date.today() + timedelta(days=4)
+        while cls.target.weekday() == 6:
+            cls.target += timedelta(days=1)
+        weekday = str(cls.target.weekday())
+        cls.early, cls.late = cls.env['repair.pickup.slot'].create([
+            {'schedule_id': cls.schedule.id, 'weekday': weekday,
+             'time_from': 15.0, 'time_to': 17.0, 'capacity': 1},
+            {'schedule_id': cls.schedule.id, 'weekday': weekday,
+             'time_from': 17.0, 'time_to': 19.5, 'capacity': 5},
+        ])
+
+    def _entry(self):
+        days = self.Appointment._compute_available_days(self.location_boutique)
+        return {d['date']: d for d in days}[self.target]
+
+    def _book(self, slot):
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        apt.action_schedule(self.target, slot)
+        return apt
+
+    def test_day_split_into_slots(self):
+        entry = self._entry()
+        self.assertEqual(
+            [(s['slot_id'], s['remaining_capacity']) for s in entry['slots']],
+            [(self.early.id, 1), (self.late.id, 3)],  # late capped by the day
+        )
+        self.assertEqual(entry['remaining_capacity'], 3)
+        self.assertEqual(self.early.display_name, '15:00 – 17:00')
+
+    def test_full_slot_rejected_other_slot_open(self):
+        apt = self._book(self.early)
+        self.assertEqual(apt.slot_id, self.early)
+        entry = self._entry()
+        self.assertEqual(entry['slots'][0]['remaining_capacity'], 0)
+        with self.assertRaises(UserError):
+            self._book(self.early)
+        self._book(self.late)
+        self.assertEqual(self._entry()['remaining_capacity'], 1)
+
+    def test_day_cap_applies_across_slots(self):
+        for _i in range(3):
+            self._book(self.late)
+        entry = self._entry()
+        self.assertEqual(entry['state'], 'full')
+        self.assertEqual(entry['slots'][0]['remaining_capacity'], 0)
+
+    def test_portal_booking_requires_slot_on_split_day(self):
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        with self.assertRaises(UserError):
+            apt.with_context(portal_booking=True).action_schedule(self.target)
+        # Staff may still book the day as a whole.
+        apt.action_schedule(self.target)
+        self.assertFalse(apt.slot_id)
+
+    def test_slot_of_another_weekday_rejected(self):
+        other_day = self.target + timedelta(days=1)
+        while other_day.weekday() == 6:
+            other_day += timedelta(days=1)
+        apt = self.Appointment.create({'batch_id': self._make_batch().id})
+        self.assertFalse(apt._is_day_available(other_day, self.early))
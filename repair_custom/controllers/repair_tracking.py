@@ -1,70 +1,131 @@
-from odoo import http
+import hashlib
+
+from odoo import fields, http
 from odoo.http import request
+from odoo.tools.lru import LRU
 from werkzeug.exceptions import TooManyRequests
-import time
-from collections import defaultdict
+from werkzeug.http import http_date
 
-class RepairTrackingController(http.Controller):
-    # Simple rate limiting: IP -> [(timestamp, count)]
-    _rate_limit_cache = defaultdict(list)
-    _rate_limit_window = 60  # 60 seconds
-    _rate_limit_max_requests = 10  # 10 requests per minute
-
-    def _check_rate_limit(self, ip):
-        """Check if IP is within rate limit. Returns True if allowed."""
-        now = time.time()
-
-        # Clean old entries
-        self._rate_limit_cache[ip] = [
-            timestamp for timestamp in self._rate_limit_cache[ip]
-            if now - timestamp < self._rate_limit_window
-        ]
+# Rendered tracking page bodies: {(dbname, token, write_date, lang):
+# Markup}. A repair change moves its write_date, so entries never go
+# stale; the LRU bound only caps memory.
+TRACKING_PAGE_CACHE_SIZE = 512
+_tracking_page_cache = LRU(TRACKING_PAGE_CACHE_SIZE)
 
-        # Check limit
-        if len(self._rate_limit_cache[ip]) >= self._rate_limit_max_requests:
-            return False
 
-        # Add current request
-        self._rate_limit_cache[ip].append(now)
-        return True
+def check_rate_limit(route):
+    """Raise 429 once the client has used up its budget on `route` (see
+    repair.rate.limiter, shared by all workers)."""
+    limiter = request.env['repair.rate.limiter'].sudo()
+    if not limiter._check_rate_limit(route, request.httprequest.remote_addr):
+        raise TooManyRequests("Trop de requêtes. Veuillez réessayer dans une minute.")
 
-    @http.route('/repair/tracking/<string:token>', type='http', auth='public', website=True)
-    def repair_tracking(self, token=None, **kwargs):
-        from odoo import fields as odoo_fields
 
-        # Rate limiting
-        ip = request.httprequest.remote_addr
-        if not self._check_rate_limit(ip):
-            raise TooManyRequests("Trop de requêtes. Veuillez réessayer dans une minute.")
+class RepairTrackingController(http.Controller):
 
+    def _get_tracked_order(self, token):
+        """Return (order, error) for a tracking token, `error` being
+        'not_found' or 'expired'."""
         # Validate token format (should be 43 characters for secrets.token_urlsafe(32))
         if not token or len(token) < 32:
-            return request.render('repair_custom.tracking_not_found')
+            return None, 'not_found'
 
         # Use exists() to prevent timing attacks - same response time for valid/invalid tokens
         # Remove sudo() - use proper public access instead
         order = request.env['repair.order'].search([('tracking_token', '=', token)], limit=1)
 
         if not order:
-            return request.render('repair_custom.tracking_not_found')
+            return None, 'not_found'
 
         # Check token expiration
-        if order.tracking_token_expiry and order.tracking_token_expiry < odoo_fields.Datetime.now():
+        if order.tracking_token_expiry and order.tracking_token_expiry < fields.Datetime.now():
+            return order, 'expired'
+        return order, None
+
+    def _get_pickup_appointment(self, order):
+        """Open pickup appointment of the order's batch, when the pickup
+        appointment module is installed."""
+        batch = order.sudo().batch_id
+        return getattr(batch, 'current_appointment_id', None) or None
+
+    @http.route('/repair/tracking/<string:token>', type='http', auth='public', website=True)
+    def repair_tracking(self, token=None, **kwargs):
+        check_rate_limit('repair_tracking')
+
+        order, error = self._get_tracked_order(token)
+        if error == 'not_found':
+            return request.render('repair_custom.tracking_not_found')
+        if error == 'expired':
             return request.render('repair_custom.tracking_expired', {
                 'repair_name': order.name
             })
 
-        # Limit exposed data by only passing necessary fields
-        safe_order_data = {
-            'id': order.id,
-            'name': order.name,
-            'state': order.state,
-            'entry_date': order.entry_date,
-            'device_id_name': order.device_id_name,
-            'delivery_state': order.delivery_state,
-        }
+        # The repair part of the page is rendered once per repair change;
+        # the layout around it (session CSRF token, assets) never is cached.
+        key = (request.env.cr.dbname, token, order.write_date, request.env.lang)
+        content = _tracking_page_cache.get(key)
+        if content is None:
+            # Limit exposed data by only passing necessary fields
+            safe_order_data = {
+                'id': order.id,
+                'name': order.name,
+                'state': order.state,
+                'entry_date': order.entry_date,
+                'device_id_name': order.device_id_name,
+                'delivery_state': order.delivery_state,
+            }
+            content = request.env['ir.qweb']._render('repair_custom.tracking_page_content', {
+                'order': order,
+                'safe_data': safe_order_data,
+            })
+            _tracking_page_cache[key] = content
 
         return request.render('repair_custom.tracking_page', {
             'order': order,
-            'safe_data': safe_order_data
-        })
\ No newline at end of file
+            'content': content,
+        })
+
+    @http.route('/repair/tracking/<string:token>/status', type='http', auth='public',
+                methods=['GET'])
+    def repair_tracking_status(self, token=None, **kwargs):
+        """Status of the repair as JSON, for clients polling the tracking
+        page. Answers 304 while neither the repair nor its pickup
+        appointment changed (ETag / If-Modified-Since)."""
+        check_rate_limit('repair_tracking_status')
+
+        order, error = self._get_tracked_order(token)
+        if error == 'not_found':
+            return request.not_found()
+        if error == 'expired':
+            return request.make_json_response({'error': 'expired'}, status=410)
+
+        appointment = self._get_pickup_appointment(order)
+        changed = [order.write_date]
+        if appointment:
+            changed.append(appointment.write_date)
+        last_modified = max(changed).replace(microsecond=0)
+        etag = hashlib.sha1('|'.join(map(str, changed)).encode()).hexdigest()[:20]
+        headers = [
+            ('ETag', f'"{etag}"'),
+            ('Last-Modified', http_date(last_modified)),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            not_modified = httprequest.if_none_match.contains(etag)
+        else:
+            since = httprequest.if_modified_since
+            not_modified = bool(since) and since.replace(tzinfo=None) >= last_modified
+        if not_modified:
+            return request.make_response('', headers=headers, status=304)
+
+        return request.make_json_response({
+            'state': order.state,
+            'delivery_state': order.delivery_state,
+            'entry_date': order.entry_date and order.entry_date.isoformat(),
+            'device_id_name': order.device_id_name,
+            'appointment_date': (
+                appointment.pickup_date.isoformat()
+                if appointment and appointment.pickup_date else None
+            ),
+        }, headers=headers)
@@ -13,4 +13,5 @@ from . import sale_order
 from . import sale_order_template_extension
 from . import mail_compose_message
 from . import res_config_settings
-from . import repair_review_sms
\ No newline at end of file
+from . import repair_review_sms
+from . import repair_rate_limit
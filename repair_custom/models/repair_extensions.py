@@ -3,12 +3,96 @@ from odoo.exceptions import UserError
 from dateutil.relativedelta import relativedelta
 
 
+# Latest non-archived repair per lot, ranked like the original Python
+# sort (end_date or write_date, most recent first), plus a per-lot flag
+# telling whether any repair is still in the workshop.
+FUNCTIONAL_STATE_QUERY = """
+    WITH ranked AS (
+        SELECT ro.lot_id,
+               ro.state,
+               BOOL_OR(ro.state IN ('confirmed', 'under_repair'))
+                   OVER (PARTITION BY ro.lot_id) AS in_workshop,
+               ROW_NUMBER() OVER (
+                   PARTITION BY ro.lot_id
+                   ORDER BY COALESCE(ro.end_date, ro.write_date) DESC,
+                            ro.priority DESC, ro.entry_date DESC, ro.id DESC
+               ) AS rn
+          FROM repair_order ro
+         WHERE ro.active
+           AND ro.lot_id = ANY(%(lot_ids)s)
+    )
+    SELECT lot.id,
+           CASE WHEN r.in_workshop THEN 'fixing'
+                WHEN r.state = 'done' THEN 'working'
+                ELSE 'broken'
+           END AS functional_state
+      FROM unnest(%(lot_ids)s::int[]) AS lot(id)
+      LEFT JOIN ranked r ON r.lot_id = lot.id AND r.rn = 1
+"""
+
+
+# Set-based version of StockLot._compute_stock_state, used when templates
+# are reclassified; only the lots whose state changes are updated.
+STOCK_STATE_QUERY = """
+    WITH computed AS (
+        SELECT l.id,
+               CASE WHEN NOT COALESCE(l.is_hifi_unit, FALSE) THEN NULL
+                    WHEN l.location_id IS NULL THEN 'client'
+                    WHEN l.location_id = %(rented)s THEN 'rented'
+                    WHEN l.location_id = %(customer)s THEN
+                         CASE WHEN l.sale_order_id IS NOT NULL THEN 'sold' ELSE 'client' END
+                    WHEN l.location_id = ANY(%(internal)s::int[]) THEN
+                         CASE WHEN l.functional_state = 'fixing' THEN 'in_repair' ELSE 'stock' END
+                    WHEN loc.usage = 'internal' THEN 'stock'
+                    ELSE 'client'
+               END AS stock_state
+          FROM stock_lot l
+          LEFT JOIN stock_location loc ON loc.id = l.location_id
+         WHERE l.id = ANY(%(lot_ids)s)
+    )
+    UPDATE stock_lot l
+       SET stock_state = c.stock_state
+      FROM computed c
+     WHERE c.id = l.id
+       AND l.stock_state IS DISTINCT FROM c.stock_state
+    RETURNING l.id
+"""
+
+
 class StockLot(models.Model):
     _inherit = 'stock.lot'
 
     # Repair tracking
     repair_order_ids = fields.One2many('repair.order', 'lot_id', string="Réparations associées")
-    repair_order_count = fields.Integer(string="Réparations", compute='_compute_repair_order_count')
+
+    # Repair statistics — stored, recomputed in bulk by _compute_repair_statistics
+    repair_order_count = fields.Integer(
+        string="Réparations",
+        compute='_compute_repair_statistics', store=True,
+    )
+    repair_done_count = fields.Integer(
+        string="Réparations terminées",
+        compute='_compute_repair_statistics', store=True,
+    )
+    last_repair_date = fields.Datetime(
+        string="Dernière réparation",
+        compute='_compute_repair_statistics', store=True,
+    )
+    repair_currency_id = fields.Many2one(
+        'res.currency', related='company_id.currency_id', string="Devise",
+    )
+    repair_invoiced_amount = fields.Monetary(
+        string="Montant réparations facturé",
+        currency_field='repair_currency_id',
+        compute='_compute_repair_statistics', store=True,
+    )
+    repair_mean_days_between_failures = fields.Float(
+        string="Jours moyens entre pannes",
+        digits=(16, 1),
+        compute='_compute_repair_statistics', store=True,
+        help="Intervalle moyen (en jours) entre deux entrées en atelier "
+             "non annulées de cet appareil.",
+    )
 
     # Functional state (computed from repair history)
     functional_state = fields.Selection([
@@ -26,8 +110,9 @@ class StockLot(models.Model):
         ('rented', 'En Location'),
     ], string="Statut Stock", compute='_compute_stock_state', store=True, tracking=True)
 
-    @api.depends('location_id', 'functional_state', 'sale_order_id')
-    def _compute_stock_state(self):
+    def _get_stock_state_locations(self):
+        """(customer location, rented location, internal location ids) the
+        stock state is derived from."""
         customer_loc = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
         rented_loc = self.env.ref('repair_custom.stock_location_rented', raise_if_not_found=False)
         # Build set of all internal location IDs (Boutique, Ateliers, Hangar, Collection, WH/Stock)
@@ -40,6 +125,11 @@ class StockLot(models.Model):
         wh = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
         if wh:
             internal_loc_ids.add(wh.lot_stock_id.id)
+        return customer_loc, rented_loc, internal_loc_ids
+
+    @api.depends('is_hifi_unit', 'location_id', 'functional_state', 'sale_order_id')
+    def _compute_stock_state(self):
+        customer_loc, rented_loc, internal_loc_ids = self._get_stock_state_locations()
 
         for lot in self:
             if not lot.is_hifi_unit:
@@ -59,6 +149,27 @@ class StockLot(models.Model):
             else:
                 lot.stock_state = 'client'
 
+    def _get_reclassify_protected_fields(self):
+        return super()._get_reclassify_protected_fields() + ['stock_state']
+
+    def _recompute_reclassified_lots(self):
+        """Same rules as _compute_stock_state, in one UPDATE for the lots
+        whose HiFi status changed with their template's category. Not
+        tracked: a reclassification moves no device."""
+        super()._recompute_reclassified_lots()
+        customer_loc, rented_loc, internal_loc_ids = self._get_stock_state_locations()
+        self.flush_recordset(['location_id', 'functional_state', 'sale_order_id', 'stock_state'])
+        self.env.cr.execute(STOCK_STATE_QUERY, {
+            'lot_ids': self.ids,
+            'customer': customer_loc.id if customer_loc else None,
+            'rented': rented_loc.id if rented_loc else None,
+            'internal': list(internal_loc_ids),
+        })
+        lots = self.browse([r[0] for r in self.env.cr.fetchall()])
+        if lots:
+            lots.invalidate_recordset(['stock_state'])
+            lots.modified(['stock_state'])
+
     # SAV warranty (equipment sale)
     sale_date = fields.Datetime("Date de vente", readonly=True, copy=False)
     sav_expiry = fields.Date("Expiration SAV", readonly=True, copy=False)
@@ -114,27 +225,128 @@ class StockLot(models.Model):
             unit.warranty_expiry = w_expiry
             unit.warranty_state = w_state
 
-    def _compute_repair_order_count(self):
-        for rec in self:
-            rec.repair_order_count = self.env['repair.order'].with_context(active_test=False).search_count([('lot_id', '=', rec.id)])
+    @api.depends(
+        'repair_order_ids',
+        'repair_order_ids.state',
+        'repair_order_ids.entry_date',
+        'repair_order_ids.end_date',
+        'repair_order_ids.sale_order_id.order_line.untaxed_amount_invoiced',
+    )
+    def _compute_repair_statistics(self):
+        """Compute all repair statistics for the whole recordset in a single
+        grouped query. Archived repairs are counted on purpose: the smart
+        button keeps the device's full history."""
+        stats = self._read_repair_statistics()
+        for lot in self:
+            values = stats.get(lot.id, {})
+            lot.repair_order_count = values.get('repair_count', 0)
+            lot.repair_done_count = values.get('done_count', 0)
+            lot.last_repair_date = values.get('last_repair_date') or False
+            lot.repair_invoiced_amount = float(values.get('invoiced_amount') or 0.0)
+            lot.repair_mean_days_between_failures = float(values.get('mean_days') or 0.0)
+
+    def _read_repair_statistics(self):
+        """Return {lot_id: {repair_count, done_count, last_repair_date,
+        invoiced_amount, mean_days}} for the persisted lots of self."""
+        lot_ids = [rec.id for rec in self if isinstance(rec.id, int)]
+        if not lot_ids:
+            return {}
+        self.env['repair.order'].flush_model(
+            ['lot_id', 'state', 'entry_date', 'end_date', 'sale_order_id']
+        )
+        self.env['sale.order.line'].flush_model(['order_id', 'untaxed_amount_invoiced'])
+        self.env.cr.execute("""
+            WITH repairs AS (
+                SELECT ro.lot_id, ro.state, ro.end_date
+                  FROM repair_order ro
+                 WHERE ro.lot_id = ANY(%(lot_ids)s)
+            ),
+            gaps AS (
+                SELECT ro.lot_id,
+                       ro.entry_date - LAG(ro.entry_date) OVER (
+                           PARTITION BY ro.lot_id ORDER BY ro.entry_date
+                       ) AS gap
+                  FROM repair_order ro
+                 WHERE ro.lot_id = ANY(%(lot_ids)s)
+                   AND ro.state != 'cancel'
+                   AND ro.entry_date IS NOT NULL
+            ),
+            invoiced AS (
+                SELECT ro.lot_id, SUM(sol.untaxed_amount_invoiced) AS amount
+                  FROM repair_order ro
+                  JOIN sale_order_line sol ON sol.order_id = ro.sale_order_id
+                 WHERE ro.lot_id = ANY(%(lot_ids)s)
+                 GROUP BY ro.lot_id
+            )
+            SELECT r.lot_id,
+                   COUNT(*) AS repair_count,
+                   COUNT(*) FILTER (WHERE r.state = 'done') AS done_count,
+                   MAX(r.end_date) FILTER (WHERE r.state = 'done') AS last_repair_date,
+                   MAX(i.amount) AS invoiced_amount,
+                   (SELECT AVG(EXTRACT(EPOCH FROM g.gap) / 86400.0)
+                      FROM gaps g
+                     WHERE g.lot_id = r.lot_id AND g.gap IS NOT NULL) AS mean_days
+              FROM repairs r
+              LEFT JOIN invoiced i ON i.lot_id = r.lot_id
+             GROUP BY r.lot_id
+        """, {'lot_ids': lot_ids})
+        return {row['lot_id']: row for row in self.env.cr.dictfetchall()}
+
+    def _read_functional_states(self):
+        """Return {lot_id: functional_state} for the persisted lots of self,
+        evaluated in a single query."""
+        lot_ids = [rec.id for rec in self if isinstance(rec.id, int)]
+        if not lot_ids:
+            return {}
+        self.env['repair.order'].flush_model()
+        self.env.cr.execute(FUNCTIONAL_STATE_QUERY, {'lot_ids': lot_ids})
+        return dict(self.env.cr.fetchall())
 
     @api.depends('repair_order_ids.state')
     def _compute_functional_state(self):
+        states = self._read_functional_states()
         for unit in self:
-            active_repairs = unit.repair_order_ids.filtered(
-                lambda r: r.state in ['confirmed', 'under_repair']
-            )
-            if active_repairs:
-                unit.functional_state = 'fixing'
-            else:
-                last_repair = unit.repair_order_ids.sorted(
-                    key=lambda r: r.end_date or r.write_date,
-                    reverse=True
-                )
-                if last_repair and last_repair[0].state in ['done']:
-                    unit.functional_state = 'working'
-                else:
-                    unit.functional_state = 'broken'
+            unit.functional_state = states.get(unit.id, 'broken')
+
+    @api.model
+    def _bulk_recompute_functional_state(self, lot_ids=None):
+        """Rewrite functional_state for the given lots (all lots when None)
+        with one UPDATE, then let the ORM recompute what depends on it
+        (stock_state). Returns the number of lots whose state changed."""
+        if lot_ids is None:
+            self.flush_model()
+            self.env.cr.execute("SELECT id FROM stock_lot")
+            lot_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not lot_ids:
+            return 0
+        self.env['repair.order'].flush_model()
+        self.flush_model(['functional_state'])
+        self.env.cr.execute(f"""
+            UPDATE stock_lot sl
+               SET functional_state = computed.functional_state
+              FROM ({FUNCTIONAL_STATE_QUERY}) AS computed
+             WHERE sl.id = computed.id
+               AND sl.functional_state IS DISTINCT FROM computed.functional_state
+         RETURNING sl.id
+        """, {'lot_ids': list(lot_ids)})
+        changed = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if changed:
+            changed.invalidate_recordset(['functional_state'])
+            changed.modified(['functional_state'])
+        return len(changed)
+
+    def action_recompute_functional_state(self):
+        count = self._bulk_recompute_functional_state(self.ids)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("État physique recalculé"),
+                'message': _("%s appareil(s) mis à jour.") % count,
+                'type': 'success',
+                'sticky': False,
+            },
+        }
 
     def _compute_is_admin(self):
         user = self.env.user
@@ -746,7 +958,7 @@ class SaleOrderLine(models.Model):
             line.lot_id = lot
             line.product_uom_qty = 1
             if lot.is_hifi_unit:
-                line.name = lot.format_hifi_label(include_serial=True)
+                line.name = lot.hifi_label
 
     @api.onchange('product_id')
     def _onchange_product_id_set_categ(self):
@@ -761,7 +973,7 @@ class SaleOrderLine(models.Model):
                 self.product_id = self.lot_id.product_id
                 self.categ_id = self.lot_id.product_id.categ_id
             if self.lot_id.is_hifi_unit:
-                self.name = self.lot_id.format_hifi_label(include_serial=True)
+                self.name = self.lot_id.hifi_label
 
     def _prepare_procurement_values(self, group_id=False):
         values = super()._prepare_procurement_values(group_id=group_id)
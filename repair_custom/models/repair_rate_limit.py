@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+# Per-route token buckets: (burst capacity, seconds to refill it fully).
+RATE_LIMITS = {
+    'repair_tracking': (10, 60),
+    'repair_tracking_status': (30, 60),
+    'pickup_portal': (30, 60),
+}
+
+# Most buckets kept; the least recently used ones go first.
+RATE_LIMIT_MAX_BUCKETS = 10000
+
+# Seconds between two evictions run by the same worker.
+RATE_LIMIT_EVICT_INTERVAL = 60
+
+
+class RepairRateLimiter(models.AbstractModel):
+    """Token-bucket rate limiter for the public routes, shared by all
+    workers through an unlogged table.
+
+    One row per (route, client) holds the tokens left at `updated_at`;
+    each request refills the bucket for the elapsed time and takes a
+    token in a single upsert. A bucket left alone long enough to be full
+    again carries no information, so idle rows are dropped, and the
+    table is capped at RATE_LIMIT_MAX_BUCKETS rows by evicting the least
+    recently used ones. Rejections are counted per route."""
+    _name = 'repair.rate.limiter'
+    _description = 'Limitation de débit des pages publiques'
+
+    _last_eviction = 0.0
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS repair_rate_limit_bucket (
+                route varchar NOT NULL,
+                client_key varchar NOT NULL,
+                tokens double precision NOT NULL,
+                updated_at timestamp NOT NULL,
+                allowed boolean NOT NULL,
+                PRIMARY KEY (route, client_key)
+            );
+            CREATE INDEX IF NOT EXISTS repair_rate_limit_bucket_updated_at_idx
+                ON repair_rate_limit_bucket (updated_at);
+            CREATE UNLOGGED TABLE IF NOT EXISTS repair_rate_limit_stat (
+                route varchar PRIMARY KEY,
+                rejected_count bigint NOT NULL DEFAULT 0,
+                last_rejected_at timestamp
+            );
+        """)
+
+    @api.model
+    def _check_rate_limit(self, route, client_key):
+        """Take a token from the bucket of `client_key` on `route`.
+        Returns False when the bucket is empty.
+
+        Runs on its own short READ COMMITTED transaction, so concurrent
+        requests of the same client queue on the row lock instead of
+        failing with serialization errors, and the count survives a
+        rollback of the request."""
+        # A second cursor on purpose: a savepoint on the request cursor
+        # would be rolled back with a failing request and would keep the
+        # bucket row locked until the page is rendered. The connection is
+        # only held for the upsert and returned to the pool before the
+        # route runs, so a worker peaks at two connections, which
+        # db_maxconn must allow (Odoo's default of 64 per process leaves
+        # ample room; with threaded workers count two per HTTP thread).
+        registry = self.env.registry
+        with registry.cursor() as cr:
+            if not registry.in_test_mode():
+                cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            allowed = self._consume_token(cr, route, client_key or '?')
+            now = time.monotonic()
+            if now - RepairRateLimiter._last_eviction > RATE_LIMIT_EVICT_INTERVAL:
+                RepairRateLimiter._last_eviction = now
+                self._evict_buckets(cr)
+        if not allowed:
+            _logger.info("Rate limit hit on %s by %s", route, client_key)
+        return allowed
+
+    @api.model
+    def _consume_token(self, cr, route, client_key):
+        capacity, period = RATE_LIMITS[route]
+        refill = """LEAST(%(capacity)s::double precision,
+                          b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at) * %(rate)s)"""
+        cr.execute(f"""
+            INSERT INTO repair_rate_limit_bucket AS b
+                   (route, client_key, tokens, updated_at, allowed)
+            VALUES (%(route)s, %(key)s, %(capacity)s - 1, now(), TRUE)
+            ON CONFLICT (route, client_key) DO UPDATE
+               SET tokens = CASE WHEN {refill} >= 1 THEN {refill} - 1 ELSE {refill} END,
+                   allowed = {refill} >= 1,
+                   updated_at = now()
+            RETURNING b.allowed
+        """, {'route': route, 'key': client_key, 'capacity': capacity,
+              'rate': capacity / period})
+        allowed = cr.fetchone()[0]
+        if not allowed:
+            cr.execute("""
+                INSERT INTO repair_rate_limit_stat AS s (route, rejected_count, last_rejected_at)
+                VALUES (%s, 1, now())
+                ON CONFLICT (route) DO UPDATE
+                   SET rejected_count = s.rejected_count + 1,
+                       last_rejected_at = now()
+            """, [route])
+        return allowed
+
+    @api.model
+    def _evict_buckets(self, cr):
+        """Drop the buckets that have refilled completely, then the least
+        recently used ones beyond RATE_LIMIT_MAX_BUCKETS."""
+        longest = max(period for _capacity, period in RATE_LIMITS.values())
+        cr.execute("""
+            DELETE FROM repair_rate_limit_bucket
+             WHERE updated_at < now() - make_interval(secs => %s)
+        """, [longest])
+        cr.execute("""
+            DELETE FROM repair_rate_limit_bucket
+             WHERE (route, client_key) IN (
+                   SELECT route, client_key FROM repair_rate_limit_bucket
+                    ORDER BY updated_at DESC
+                   OFFSET %s)
+        """, [RATE_LIMIT_MAX_BUCKETS])
+
+    @api.model
+    def _get_rejected_counts(self):
+        """{route: number of rejected requests} since the table was
+        created (unlogged: reset by a database crash)."""
+        self.env.cr.execute("SELECT route, rejected_count FROM repair_rate_limit_stat")
+        return dict(self.env.cr.fetchall())
@@ -1,20 +1,55 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
 from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models, _
+from odoo.tools import split_every
+from odoo.tools.sql import create_index
 
 _logger = logging.getLogger(__name__)
 
+# Due repairs handled per commit by the review SMS cron.
+REVIEW_SMS_CHUNK_SIZE = 100
+
+# Gateway failures: retried after 15, 30, 60, 120 minutes, then the
+# repair is marked failed.
+REVIEW_SMS_MAX_ATTEMPTS = 5
+REVIEW_SMS_RETRY_BASE_MINUTES = 15
+
+# sms.sms states meaning the message did not reach the gateway; any other
+# state (process, pending, sent) means the gateway accepted it.
+SMS_REFUSED_STATES = ('outgoing', 'error', 'canceled')
+
 
 class SmsTemplate(models.Model):
     _inherit = 'sms.template'
 
-    def _send_review_sms(self, res_id):
-        """Send this SMS template to the given record id (uses IAP)."""
+    def _send_review_sms(self, records):
+        """Render this template for all `records` at once, create their
+        sms.sms in bulk and hand them to the SMS gateway in a single
+        call. Records without a usable number are left out.
+
+        Returns {record id: sms.sms}; the state of each sms tells whether
+        the gateway accepted it."""
         self.ensure_one()
-        record = self.env[self.model].browse(res_id)
-        record._message_sms_with_template(template=self)
+        recipients = records._sms_get_recipients_info()
+        numbers = {
+            record_id: info['sanitized'] or info['number']
+            for record_id, info in recipients.items()
+            if info['sanitized'] or info['number']
+        }
+        if not numbers:
+            return {}
+        bodies = self._render_field('body', list(numbers), compute_lang=True)
+        sms_records = self.env['sms.sms'].sudo().create([{
+            'body': bodies[record_id],
+            'number': number,
+            'partner_id': recipients[record_id]['partner'].id,
+            'state': 'outgoing',
+        } for record_id, number in numbers.items()])
+        sms_records._send(unlink_failed=False, unlink_sent=False, raise_exception=False)
+        return dict(zip(numbers, sms_records))
 
 
 class RepairOrder(models.Model):
@@ -27,6 +62,7 @@ class RepairOrder(models.Model):
             ('sent', 'Envoyé'),
             ('cancelled', 'Annulé'),
             ('skipped', 'Ignoré'),
+            ('failed', 'Échec'),
         ],
         string="SMS d'avis Google",
         default='none',
@@ -45,10 +81,33 @@ class RepairOrder(models.Model):
         string="SMS d'avis - motif d'omission",
         copy=False,
     )
+    review_sms_attempt_count = fields.Integer(
+        string="SMS d'avis - tentatives",
+        copy=False,
+    )
+    review_sms_error = fields.Char(
+        string="SMS d'avis - dernière erreur",
+        copy=False,
+    )
 
     SKIP_REASON_NO_PHONE = "Pas de numéro mobile"
     SKIP_REASON_DEDUP = "SMS envoyé récemment au client"
 
+    def init(self):
+        super().init()
+        # Dedup lookups: "SMS sent to this partner since ..." and "repairs
+        # of this partner still waiting for their SMS".
+        create_index(
+            self.env.cr, 'repair_order_review_sms_sent_idx', self._table,
+            ['partner_id', 'review_sms_sent_date'],
+            where='review_sms_sent_date IS NOT NULL',
+        )
+        create_index(
+            self.env.cr, 'repair_order_review_sms_pending_idx', self._table,
+            ['partner_id', 'review_sms_eligible_date'],
+            where="review_sms_state = 'pending'",
+        )
+
     def _get_review_sms_delay_days(self):
         return int(self.env['ir.config_parameter'].sudo().get_param(
             'repair_custom.review_sms_delay_days', 7))
@@ -61,53 +120,79 @@ class RepairOrder(models.Model):
         self.ensure_one()
         return bool(self.partner_id.mobile or self.partner_id.phone)
 
-    def _review_sms_recently_handled(self):
+    def _get_review_sms_history(self):
+        """Review SMS history of the partners of `self`, in one grouped
+        query: {partner_id: {'sent': ids, 'pending': ids}} where `sent`
+        holds the repairs whose SMS left within the dedup window and
+        `pending` the repairs still waiting for theirs. Partners without
+        any are left out.
+
+        The sets are meant to be kept up to date by the caller as it
+        sends or skips, so one query answers for a whole run."""
+        partner_ids = self.partner_id.ids
+        if not partner_ids:
+            return {}
+        self.flush_model(['partner_id', 'review_sms_sent_date', 'review_sms_state'])
+        cutoff = fields.Datetime.now() - relativedelta(
+            months=self._get_review_sms_dedup_months())
+        self.env.cr.execute("""
+            SELECT partner_id,
+                   array_agg(id) FILTER (WHERE review_sms_sent_date >= %(cutoff)s),
+                   array_agg(id) FILTER (WHERE review_sms_state = 'pending')
+              FROM repair_order
+             WHERE partner_id = ANY(%(partners)s)
+               AND (review_sms_sent_date >= %(cutoff)s OR review_sms_state = 'pending')
+             GROUP BY partner_id
+        """, {'partners': partner_ids, 'cutoff': cutoff})
+        return {
+            partner_id: {'sent': set(sent or ()), 'pending': set(pending or ())}
+            for partner_id, sent, pending in self.env.cr.fetchall()
+        }
+
+    def _review_sms_recently_handled(self, history=None):
         """True if the partner already has another repair where a review
         SMS has been sent within the dedup window OR is currently
-        scheduled (pending). Avoids double-SMS for back-to-back repairs."""
+        scheduled (pending). Avoids double-SMS for back-to-back repairs.
+
+        `history` is a mapping from `_get_review_sms_history` covering
+        this repair's partner; it is computed when not given."""
         self.ensure_one()
-        months = self._get_review_sms_dedup_months()
-        cutoff = fields.Datetime.now() - relativedelta(months=months)
-        Repair = self.env['repair.order']
-        already_sent = Repair.search_count([
-            ('id', '!=', self.id),
-            ('partner_id', '=', self.partner_id.id),
-            ('review_sms_sent_date', '>=', cutoff),
-        ])
-        if already_sent:
-            return True
-        pending = Repair.search_count([
-            ('id', '!=', self.id),
-            ('partner_id', '=', self.partner_id.id),
-            ('review_sms_state', '=', 'pending'),
-        ])
-        return bool(pending)
+        if history is None:
+            history = self._get_review_sms_history()
+        entry = history.get(self.partner_id.id)
+        if not entry:
+            return False
+        return bool((entry['sent'] | entry['pending']) - {self.id})
 
     def _schedule_review_sms(self):
         """Called when delivery_state flips to 'delivered'. Decides
         whether to enqueue, skip, or do nothing."""
-        for rec in self:
-            if rec.review_sms_state not in ('none', 'cancelled'):
-                continue
+        todo = self.filtered(lambda r: r.review_sms_state in ('none', 'cancelled'))
+        if not todo:
+            return
+        history = todo._get_review_sms_history()
+        eligible = fields.Datetime.now() + relativedelta(
+            days=self._get_review_sms_delay_days())
+        for rec in todo:
             if not rec._has_review_sms_phone():
                 rec.write({
                     'review_sms_state': 'skipped',
                     'review_sms_skip_reason': rec.SKIP_REASON_NO_PHONE,
                 })
                 continue
-            if rec._review_sms_recently_handled():
+            if rec._review_sms_recently_handled(history):
                 rec.write({
                     'review_sms_state': 'skipped',
                     'review_sms_skip_reason': rec.SKIP_REASON_DEDUP,
                 })
                 continue
-            eligible = fields.Datetime.now() + relativedelta(
-                days=rec._get_review_sms_delay_days())
             rec.write({
                 'review_sms_state': 'pending',
                 'review_sms_eligible_date': eligible,
                 'review_sms_skip_reason': False,
             })
+            history.setdefault(rec.partner_id.id, {'sent': set(), 'pending': set()})
+            history[rec.partner_id.id]['pending'].add(rec.id)
 
     @api.model
     def _get_review_sms_template(self):
@@ -123,6 +208,14 @@ class RepairOrder(models.Model):
 
     @api.model
     def _cron_send_review_sms(self):
+        """Send the review SMS of every due repair.
+
+        The due set comes from one search on the pending partial index,
+        and the dedup history of all its partners from one grouped query,
+        kept up to date in memory as repairs are sent or skipped. Repairs
+        are then handled in id order, in chunks of REVIEW_SMS_CHUNK_SIZE
+        with one write per outcome, committed after each chunk when
+        running as a real cron."""
         template = self._get_review_sms_template()
         if not template:
             _logger.warning("Review SMS template not configured, skipping cron")
@@ -130,33 +223,111 @@ class RepairOrder(models.Model):
         repairs = self.search([
             ('review_sms_state', '=', 'pending'),
             ('review_sms_eligible_date', '<=', fields.Datetime.now()),
-        ])
-        for repair in repairs:
+        ], order='id')
+        if not repairs:
+            return
+        history = repairs._get_review_sms_history()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        done = 0
+        for chunk in split_every(REVIEW_SMS_CHUNK_SIZE, repairs.ids, self.browse):
+            chunk._send_review_sms_chunk(template, history)
+            done += len(chunk)
+            if auto_commit:
+                self.env.cr.commit()
+                _logger.info("Review SMS cron: %d/%d", done, len(repairs))
+
+    def _send_review_sms_chunk(self, template, history):
+        no_phone = self.browse()
+        dedup = self.browse()
+        to_send = self.browse()
+        for repair in self:
+            entry = history.setdefault(
+                repair.partner_id.id, {'sent': set(), 'pending': set()})
+            if not repair._has_review_sms_phone():
+                no_phone |= repair
+            elif repair._review_sms_recently_handled(history):
+                dedup |= repair
+            else:
+                # Stays in `pending` until the gateway answers, so later
+                # repairs of the same partner are deduplicated against it.
+                to_send |= repair
+                continue
+            entry['pending'].discard(repair.id)
+
+        no_phone.write({
+            'review_sms_state': 'skipped',
+            'review_sms_skip_reason': self.SKIP_REASON_NO_PHONE,
+        })
+        dedup.write({
+            'review_sms_state': 'skipped',
+            'review_sms_skip_reason': self.SKIP_REASON_DEDUP,
+        })
+        if not to_send:
+            return
+
+        try:
             with self.env.cr.savepoint():
-                if not repair._has_review_sms_phone():
-                    repair.write({
-                        'review_sms_state': 'skipped',
-                        'review_sms_skip_reason': repair.SKIP_REASON_NO_PHONE,
-                    })
-                    continue
-                if repair._review_sms_recently_handled():
-                    repair.write({
-                        'review_sms_state': 'skipped',
-                        'review_sms_skip_reason': repair.SKIP_REASON_DEDUP,
-                    })
-                    continue
-                try:
-                    template._send_review_sms(repair.id)
-                    repair.write({
-                        'review_sms_state': 'sent',
-                        'review_sms_sent_date': fields.Datetime.now(),
-                    })
-                    repair.message_post(body=_("SMS d'avis Google envoyé."))
-                except Exception as e:
-                    _logger.exception(
-                        "Review SMS send failed for repair %s", repair.id)
-                    repair.message_post(
-                        body=_("Échec envoi SMS d'avis : %s") % e)
+                sms_by_repair = template._send_review_sms(to_send)
+        except Exception as e:
+            _logger.exception("Review SMS batch failed for repairs %s", to_send.ids)
+            sms_by_repair = {}
+            error = str(e)
+        else:
+            error = False
+            # No number left once sanitized: nothing to retry.
+            no_number = to_send.filtered(lambda r: r.id not in sms_by_repair)
+            no_number.write({
+                'review_sms_state': 'skipped',
+                'review_sms_skip_reason': self.SKIP_REASON_NO_PHONE,
+            })
+            for repair in no_number:
+                history[repair.partner_id.id]['pending'].discard(repair.id)
+            to_send -= no_number
+
+        sent = to_send.filtered(
+            lambda r: r.id in sms_by_repair
+            and sms_by_repair[r.id].state not in SMS_REFUSED_STATES
+        )
+        sent.write({
+            'review_sms_state': 'sent',
+            'review_sms_sent_date': fields.Datetime.now(),
+            'review_sms_attempt_count': 0,
+            'review_sms_error': False,
+        })
+        sent._message_log_batch(bodies={
+            repair.id: _("SMS d'avis Google envoyé.") for repair in sent
+        })
+        for repair in sent:
+            history[repair.partner_id.id]['sent'].add(repair.id)
+            history[repair.partner_id.id]['pending'].discard(repair.id)
+
+        failed = to_send - sent
+        for repair in failed:
+            sms = sms_by_repair.get(repair.id)
+            reason = error or (sms.failure_type if sms else False) or _("Refusé par la passerelle SMS")
+            if repair._register_review_sms_failure(reason) == 'failed':
+                history[repair.partner_id.id]['pending'].discard(repair.id)
+
+    def _register_review_sms_failure(self, reason):
+        """Count a failed gateway attempt: schedule the next one with an
+        exponential backoff, or give up after REVIEW_SMS_MAX_ATTEMPTS.
+        Returns the new review_sms_state."""
+        self.ensure_one()
+        attempts = self.review_sms_attempt_count + 1
+        vals = {'review_sms_attempt_count': attempts, 'review_sms_error': reason}
+        if attempts >= REVIEW_SMS_MAX_ATTEMPTS:
+            vals['review_sms_state'] = 'failed'
+            self.message_post(body=_(
+                "Échec définitif de l'envoi du SMS d'avis après %(count)s tentatives : %(reason)s"
+            ) % {'count': attempts, 'reason': reason})
+        else:
+            delay = REVIEW_SMS_RETRY_BASE_MINUTES * 2 ** (attempts - 1)
+            vals['review_sms_eligible_date'] = fields.Datetime.now() + relativedelta(minutes=delay)
+            self.message_post(body=_(
+                "Échec envoi SMS d'avis (tentative %(count)s, nouvel essai dans %(delay)s min) : %(reason)s"
+            ) % {'count': attempts, 'delay': delay, 'reason': reason})
+        self.write(vals)
+        return self.review_sms_state
 
     def action_cancel_review_sms(self):
         for rec in self:
@@ -166,6 +337,18 @@ class RepairOrder(models.Model):
             rec.message_post(body=_("SMS d'avis Google annulé manuellement."))
         return True
 
+    def action_retry_review_sms(self):
+        for rec in self:
+            if rec.review_sms_state != 'failed':
+                continue
+            rec.write({
+                'review_sms_state': 'pending',
+                'review_sms_eligible_date': fields.Datetime.now(),
+                'review_sms_attempt_count': 0,
+            })
+            rec.message_post(body=_("Nouvel envoi du SMS d'avis Google demandé."))
+        return True
+
     def write(self, vals):
         if 'delivery_state' not in vals:
             return super().write(vals)
@@ -176,11 +359,13 @@ class RepairOrder(models.Model):
         prev = {rec.id: rec.delivery_state for rec in self}
         res = super().write(vals)
         new_state = vals['delivery_state']
+        if new_state == 'delivered':
+            self.filtered(
+                lambda rec: prev.get(rec.id) != 'delivered'
+            )._schedule_review_sms()
         for rec in self:
             old_state = prev.get(rec.id)
-            if old_state != 'delivered' and new_state == 'delivered':
-                rec._schedule_review_sms()
-            elif old_state == 'delivered' and new_state != 'delivered' \
+            if old_state == 'delivered' and new_state != 'delivered' \
                     and rec.review_sms_state == 'pending':
                 rec.write({
                     'review_sms_state': 'none',
@@ -5,3 +5,10 @@ from . import test_completion_pickup
 from . import test_batch_ux_polish
 from . import test_sale_cancel_rollback
 from . import test_review_sms
+from . import test_lot_statistics
+from . import test_lot_search
+from . import test_rate_limit
+from . import test_tracking
+from . import test_reclassify
+from . import test_brand_prefix
+from . import test_catalog_import
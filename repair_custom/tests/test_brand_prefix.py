@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestBrandPrefix(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hifi_categ = cls.env.ref('repair_devices.product_category_hifi')
+        Brand = cls.env['repair.device.brand']
+        cls.bang = Brand.create({'name': 'Bang'})
+        cls.bang_olufsen = Brand.create({'name': 'Bang & Olufsen'})
+        cls.bo = Brand.create({'name': 'B&O'})
+
+    def _split(self, text):
+        brand, remainder = self.env['repair.device.brand']._split_brand_prefix(text)
+        return brand, remainder
+
+    def test_longest_prefix_wins(self):
+        self.assertEqual(self._split('Bang & Olufsen - Beogram 4000'), (self.bang_olufsen, 'Beogram 4000'))
+        self.assertEqual(self._split('bang 12'), (self.bang, '12'))
+        brand, remainder = self._split('Zzyzx 12')
+        self.assertFalse(brand)
+        self.assertEqual(remainder, 'Zzyzx 12')
+
+    def test_punctuation_in_brand_name(self):
+        self.assertEqual(self._split('B&O Beolab 5'), (self.bo, 'Beolab 5'))
+        self.assertEqual(self._split('bo beolab 5'), (self.bo, 'beolab 5'))
+
+    def test_trie_refreshed_on_rename(self):
+        self.assertEqual(self._split('Bang 12')[0], self.bang)
+        self.bang.name = 'Quad'
+        self.assertEqual(self._split('Quad 405'), (self.bang, '405'))
+        self.assertFalse(self._split('Bang 12')[0])
+
+    def test_default_get_splits_typed_name(self):
+        defaults = self.env['product.template'].with_context(
+            default_categ_id=self.hifi_categ.id,
+            default_name='bang & olufsen beogram 4000',
+        ).default_get(['name', 'brand_id'])
+        self.assertEqual(defaults['brand_id'], self.bang_olufsen.id)
+        self.assertEqual(defaults['name'], 'BEOGRAM 4000')
+
+    def test_bulk_import_reuses_and_reports(self):
+        Template = self.env['product.template']
+        existing = Template.create({
+            'name': 'BEOGRAM 4000',
+            'brand_id': self.bang_olufsen.id,
+            'categ_id': self.hifi_categ.id,
+        })
+        templates, unmatched = Template._import_hifi_models([
+            'Bang & Olufsen beogram 4000', 'B&O Beolab 5', 'bo BEOLAB 5', 'Zzyzx 12', 'Bang',
+        ])
+        self.assertEqual(unmatched, ['Zzyzx 12', 'Bang'])
+        self.assertEqual(templates['Bang & Olufsen beogram 4000'], existing)
+        beolab = templates['B&O Beolab 5']
+        self.assertEqual(templates['bo BEOLAB 5'], beolab)
+        self.assertEqual((beolab.brand_id, beolab.name), (self.bo, 'BEOLAB 5'))
+        self.assertTrue(beolab.is_hifi_device)
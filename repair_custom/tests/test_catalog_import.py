@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestCatalogImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hifi_categ = cls.env.ref('repair_devices.product_category_hifi')
+        cls.marantz = cls.env['repair.device.brand'].create({'name': 'Marantz'})
+        cls.model_2270 = cls.env['product.template'].create({
+            'name': '2270',
+            'brand_id': cls.marantz.id,
+            'categ_id': cls.hifi_categ.id,
+        })
+        cls.model_7 = cls.env['product.template'].create({
+            'name': 'MODEL 7',
+            'brand_id': cls.marantz.id,
+            'categ_id': cls.hifi_categ.id,
+            'active': False,
+        })
+        cls.existing_lot = cls.env['stock.lot'].create({
+            'name': 'MZ0001',
+            'product_id': cls.model_2270.product_variant_id.id,
+            'company_id': cls.env.company.id,
+        })
+
+    def _import(self, *rows):
+        return self.env['repair.device.catalog.import']._import_rows(
+            [(number, values) for number, values in enumerate(rows, start=2)]
+        )
+
+    def _lots(self, template):
+        return self.env['stock.lot'].search([('product_id.product_tmpl_id', '=', template.id)])
+
+    def test_rejects_are_reported_per_row(self):
+        result = self._import(
+            {'model': 'Zzyzx 12', 'serial': 'A1'},
+            {'brand': 'Marantz', 'model': '', 'serial': 'A2'},
+            {'brand': 'Marantz', 'model': '2270', 'serial': 'MZ0002'},
+            {'brand': 'Marantz', 'model': '2270', 'serial': 'MZ0002'},
+            {'brand': 'Marantz', 'model': '2270', 'serial': 'MZ0001'},
+        )
+        self.assertEqual([(row, reason) for row, reason, _line in result['rejects']], [
+            (2, "Marque manquante ou inconnue"),
+            (3, "Modèle manquant"),
+            (5, "Numéro de série en double dans le fichier"),
+            (6, "Numéro de série déjà existant"),
+        ])
+        self.assertEqual(result['row_count'], 5)
+        self.assertEqual(result['reject_count'], 4)
+        self.assertEqual(result['lot_count'], 1)
+        self.assertEqual(sorted(self._lots(self.model_2270).mapped('name')), ['MZ0001', 'MZ0002'])
+
+    def test_brand_from_prefix_and_new_brand(self):
+        result = self._import(
+            {'model': 'marantz 2230', 'serial': 'MZ1000'},
+            {'brand': 'Revox', 'model': 'b77', 'year': '1977'},
+        )
+        self.assertFalse(result['rejects'])
+        self.assertEqual((result['brand_count'], result['model_count']), (1, 2))
+        model_2230 = self.env['product.template'].search([
+            ('brand_id', '=', self.marantz.id), ('name', '=', '2230'),
+        ])
+        self.assertTrue(model_2230.is_hifi_device)
+        self.assertEqual(self._lots(model_2230).mapped('name'), ['MZ1000'])
+        self.assertTrue(self._lots(model_2230).is_hifi_unit)
+        self.assertEqual(model_2230.hifi_unit_count, 1)
+        b77 = self.env['product.template'].search([('brand_id.name', '=', 'Revox')])
+        self.assertEqual((b77.name, b77.production_year), ('B77', '1977'))
+
+    def test_existing_and_archived_models_are_reused(self):
+        result = self._import(
+            {'brand': 'MARANTZ', 'model': '2270', 'serial': 'MZ2000'},
+            {'brand': 'marantz', 'model': 'model 7'},
+        )
+        self.assertFalse(result['rejects'])
+        self.assertEqual((result['brand_count'], result['model_count']), (0, 0))
+        self.assertIn('MZ2000', self._lots(self.model_2270).mapped('name'))
+        self.assertEqual(self.env['product.template'].with_context(active_test=False).search_count([
+            ('brand_id', '=', self.marantz.id), ('name', '=ilike', 'model 7'),
+        ]), 1)
+
+    def test_variants_are_linked(self):
+        result = self._import(
+            {'brand': 'Marantz', 'model': '2270', 'variant': 'Champagne', 'serial': 'MZ3000'},
+            {'brand': 'Marantz', 'model': '2270', 'variant': 'champagne', 'serial': 'MZ3001'},
+        )
+        self.assertEqual(result['variant_count'], 1)
+        variant = self.env['repair.device.variant'].search([('name', '=', 'Champagne')])
+        self.assertIn(variant, self.model_2270.hifi_variant_ids)
+        lots = self._lots(self.model_2270).filtered(lambda l: l.name.startswith('MZ300'))
+        self.assertEqual(lots.hifi_variant_id, variant)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestLotSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        hifi_categ = cls.env.ref('repair_devices.product_category_hifi')
+        cls.brand = cls.env['repair.device.brand'].create({'name': 'Téchnics'})
+        cls.variant = cls.env['repair.device.variant'].create({'name': 'Argent'})
+        cls.tmpl = cls.env['product.template'].create({
+            'name': 'SL-1200',
+            'brand_id': cls.brand.id,
+            'categ_id': hifi_categ.id,
+        })
+        cls.other_tmpl = cls.env['product.template'].create({
+            'name': 'SL-1210',
+            'brand_id': cls.brand.id,
+            'categ_id': hifi_categ.id,
+        })
+        cls.lot = cls.env['stock.lot'].create({
+            'name': 'GE8ZA001',
+            'product_id': cls.tmpl.product_variant_id.id,
+            'company_id': cls.env.company.id,
+            'hifi_variant_id': cls.variant.id,
+        })
+
+    def test_search_text_is_normalized(self):
+        self.assertEqual(self.tmpl.hifi_search_text, 'technics sl-1200')
+        self.assertEqual(self.lot.hifi_search_text, 'ge8za001 technics sl-1200 argent')
+
+    def test_lot_name_search_matches_every_term(self):
+        Lot = self.env['stock.lot']
+        for query in ('technics 1200', 'TECHNICS ge8za', 'argent', 'ge8za001'):
+            ids = [r[0] for r in Lot.name_search(query)]
+            self.assertIn(self.lot.id, ids, query)
+        self.assertFalse(Lot.name_search('technics 1210'))
+
+    def test_search_text_follows_brand_rename(self):
+        self.brand.name = 'Panasonic'
+        self.assertEqual(self.lot.hifi_search_text, 'ge8za001 panasonic sl-1200 argent')
+        ids = [r[0] for r in self.env['stock.lot'].name_search('panasonic')]
+        self.assertIn(self.lot.id, ids)
+
+    def test_template_name_search_ranks_closest_first(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is not installed")
+        # Sorts before SL-1210 by name, but is a worse match.
+        farther = self.env['product.template'].create({
+            'name': 'GR SL-1210 ÉDITION LIMITÉE',
+            'brand_id': self.brand.id,
+            'categ_id': self.env.ref('repair_devices.product_category_hifi').id,
+        })
+        ids = [r[0] for r in self.env['product.template'].name_search('technics sl-1210')]
+        self.assertEqual(ids, [self.other_tmpl.id, farther.id])
+
+    def test_exact_operators_keep_field_semantics(self):
+        Lot = self.env['stock.lot']
+        ids = [r[0] for r in Lot.name_search('ge8za001', operator='=ilike')]
+        self.assertEqual(ids, [self.lot.id])
+        self.assertFalse(Lot.name_search('ge8za', operator='=ilike'))
+        self.assertFalse(Lot.name_search('ZA00%', operator='=like'))
+        ids = [r[0] for r in Lot.name_search('GE8ZA%', operator='=like')]
+        self.assertEqual(ids, [self.lot.id])
+
+    def test_hifi_label_stored_and_maintained(self):
+        self.assertEqual(self.lot.hifi_label, 'Téchnics SL-1200 (Argent) – SN: GE8ZA001')
+        self.tmpl.name = 'SL-1200MK2'
+        self.variant.name = 'Noir'
+        self.assertEqual(self.lot.hifi_label, 'Téchnics SL-1200MK2 (Noir) – SN: GE8ZA001')
+        self.assertEqual(self.lot.format_hifi_label(include_serial=False), 'Téchnics SL-1200MK2 (Noir)')
+
+    def test_full_name_search_returns_stored_label(self):
+        result = self.env['stock.lot'].with_context(lot_display='full').name_search('ge8za001')
+        self.assertEqual(dict(result)[self.lot.id], self.lot.hifi_label)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import random
+from datetime import datetime, timedelta
+
+from odoo.tests.common import TransactionCase, tagged
+
+
+class LotStatisticsCase(TransactionCase):
+    """Shared fixture: one HiFi template, one lot and a batch for repairs."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Repair = cls.env['repair.order']
+        cls.partner = cls.env['res.partner'].create({'name': 'Client Stats'})
+        cls.batch = cls.env['repair.batch'].create({'partner_id': cls.partner.id})
+        cls.hifi_categ = cls.env.ref('repair_devices.product_category_hifi')
+        cls.product_tmpl = cls.env['product.template'].create({
+            'name': 'STATS TEST AMP',
+            'categ_id': cls.hifi_categ.id,
+        })
+        cls.product = cls.product_tmpl.product_variant_id
+        cls.lot = cls._make_lot('SN-STATS-1')
+
+    @classmethod
+    def _make_lot(cls, name):
+        return cls.env['stock.lot'].create({
+            'name': name,
+            'product_id': cls.product.id,
+            'company_id': cls.env.company.id,
+        })
+
+    def _make_repair(self, entry_date, state='draft', end_date=False, lot=None):
+        repair = self.Repair.create({
+            'partner_id': self.partner.id,
+            'lot_id': (lot or self.lot).id,
+            'entry_date': entry_date,
+            'batch_id': self.batch.id,
+        })
+        if state != 'draft':
+            repair.write({'state': state, 'end_date': end_date})
+        return repair
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestLotStatistics(LotStatisticsCase):
+
+    def test_statistics_follow_repair_history(self):
+        self.assertEqual(self.lot.repair_order_count, 0)
+        self._make_repair(datetime(2025, 1, 1), 'done', datetime(2025, 1, 5))
+        self._make_repair(datetime(2025, 1, 6), 'cancel')
+        last = self._make_repair(datetime(2025, 1, 11), 'done', datetime(2025, 1, 20))
+        self._make_repair(datetime(2025, 1, 31), 'confirmed')
+
+        self.assertEqual(self.lot.repair_order_count, 4)
+        self.assertEqual(self.lot.repair_done_count, 2)
+        self.assertEqual(self.lot.last_repair_date, last.end_date)
+        # Gaps between non-cancelled entries: 10 and 20 days.
+        self.assertAlmostEqual(self.lot.repair_mean_days_between_failures, 15.0)
+
+    def test_statistics_updated_on_state_change(self):
+        repair = self._make_repair(datetime(2025, 2, 1), 'confirmed')
+        self.assertEqual(self.lot.repair_done_count, 0)
+        repair.write({'state': 'done', 'end_date': datetime(2025, 2, 3)})
+        self.assertEqual(self.lot.repair_done_count, 1)
+        self.assertEqual(self.lot.last_repair_date, datetime(2025, 2, 3))
+
+    def test_statistics_computed_for_many_lots_at_once(self):
+        other = self._make_lot('SN-STATS-2')
+        self._make_repair(datetime(2025, 3, 1), 'done', datetime(2025, 3, 2))
+        self._make_repair(datetime(2025, 3, 1), lot=other)
+        self._make_repair(datetime(2025, 3, 4), lot=other)
+        lots = self.lot | other
+        stats = lots._read_repair_statistics()
+        self.assertEqual(stats[self.lot.id]['repair_count'], 1)
+        self.assertEqual(stats[self.lot.id]['done_count'], 1)
+        self.assertEqual(stats[other.id]['repair_count'], 2)
+        self.assertAlmostEqual(float(stats[other.id]['mean_days']), 3.0)
+
+    def test_template_unit_count_maintained_from_lots(self):
+        self.assertEqual(self.product_tmpl.hifi_unit_count, 1)
+        extra = self._make_lot('SN-STATS-3')
+        self.assertEqual(self.product_tmpl.hifi_unit_count, 2)
+        extra.unlink()
+        self.assertEqual(self.product_tmpl.hifi_unit_count, 1)
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestFunctionalStateQuery(LotStatisticsCase):
+
+    @staticmethod
+    def _python_functional_state(lot):
+        """Reference implementation: the historical per-lot Python logic."""
+        repairs = lot.repair_order_ids
+        if repairs.filtered(lambda r: r.state in ['confirmed', 'under_repair']):
+            return 'fixing'
+        last_repair = repairs.sorted(
+            key=lambda r: r.end_date or r.write_date, reverse=True,
+        )
+        if last_repair and last_repair[0].state in ['done']:
+            return 'working'
+        return 'broken'
+
+    def test_matches_python_logic_on_random_histories(self):
+        rng = random.Random(4242)
+        states = ['draft', 'confirmed', 'under_repair', 'done', 'irreparable', 'cancel']
+        base = datetime(2024, 1, 1)
+        lots = self.env['stock.lot']
+        # Distinct day offsets avoid ties on the sort key, which the Python
+        # sort resolves by cache order rather than by a defined rule.
+        offsets = iter(rng.sample(range(1, 5000), 400))
+        for index in range(40):
+            lot = self._make_lot(f'SN-RANDOM-{index}')
+            lots |= lot
+            for _dummy in range(rng.randint(0, 6)):
+                state = rng.choice(states)
+                end_date = base + timedelta(days=next(offsets)) if rng.random() < 0.6 else False
+                repair = self._make_repair(base, state, end_date, lot=lot)
+                if rng.random() < 0.1:
+                    repair.active = False
+                self.env.flush_all()
+                self.env.cr.execute(
+                    "UPDATE repair_order SET write_date = %s WHERE id = %s",
+                    [base + timedelta(days=next(offsets)), repair.id],
+                )
+        self.env.invalidate_all()
+
+        expected = {lot.id: self._python_functional_state(lot) for lot in lots}
+        self.assertEqual(lots._read_functional_states(), expected)
+
+        # The bulk command converges on the same values.
+        self.env.cr.execute(
+            "UPDATE stock_lot SET functional_state = NULL WHERE id = ANY(%s)",
+            [lots.ids],
+        )
+        self.env.invalidate_all()
+        self.env['stock.lot']._bulk_recompute_functional_state(lots.ids)
+        self.assertEqual({lot.id: lot.functional_state for lot in lots}, expected)
+
+    def test_compute_follows_state_changes(self):
+        repair = self._make_repair(datetime(2025, 4, 1), 'confirmed')
+        self.assertEqual(self.lot.functional_state, 'fixing')
+        repair.write({'state': 'done', 'end_date': datetime(2025, 4, 2)})
+        self.assertEqual(self.lot.functional_state, 'working')
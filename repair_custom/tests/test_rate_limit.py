@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.repair_custom.models import repair_rate_limit
+
+
+@tagged('post_install', '-at_install', 'repair_custom')
+class TestRateLimit(TransactionCase):
+    """Drives the buckets on the test cursor: the limiter's own cursor
+    would commit them."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Limiter = cls.env['repair.rate.limiter']
+
+    def _take(self, route='repair_tracking', key='203.0.113.7'):
+        return self.Limiter._consume_token(self.env.cr, route, key)
+
+    def _age_buckets(self, seconds):
+        self.env.cr.execute("""
+            UPDATE repair_rate_limit_bucket
+               SET updated_at = updated_at - make_interval(secs => %s)
+        """, [seconds])
+
+    def test_burst_then_rejected_and_counted(self):
+        before = self.Limiter._get_rejected_counts().get('repair_tracking', 0)
+        results = [self._take() for _i in range(12)]
+        self.assertEqual(results, [True] * 10 + [False] * 2)
+        self.assertEqual(
+            self.Limiter._get_rejected_counts()['repair_tracking'], before + 2)
+
+    def test_buckets_per_route_and_client(self):
+        for _i in range(10):
+            self._take()
+        self.assertFalse(self._take())
+        self.assertTrue(self._take(key='198.51.100.1'))
+        self.assertTrue(self._take(route='pickup_portal'))
+
+    def test_tokens_refill_over_time(self):
+        for _i in range(10):
+            self._take()
+        self.assertFalse(self._take())
+        self._age_buckets(15)  # 10 tokens / 60 s: two and a half back
+        self.assertEqual([self._take() for _i in range(3)], [True, True, False])
+
+    def test_eviction_bounds_table(self):
+        for i in range(5):
+            self._take(key=f'192.0.2.{i}')
+        self._age_buckets(3600)
+        self._take(key='192.0.2.200')
+        with patch.object(repair_rate_limit, 'RATE_LIMIT_MAX_BUCKETS', 1):
+            self.Limiter._evict_buckets(self.env.cr)
+        self.env.cr.execute("SELECT client_key FROM repair_rate_limit_bucket")
+        self.assertEqual(self.env.cr.fetchall(), [('192.0.2.200',)])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install', 'repair_custom')
+class TestReclassify(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hifi_categ = cls.env.ref('repair_devices.product_category_hifi')
+        cls.amp_categ = cls.env['product.category'].create({
+            'name': 'Amplis', 'parent_id': cls.hifi_categ.id,
+        })
+        cls.other_categ = cls.env['product.category'].create({'name': 'Divers'})
+        cls.brand = cls.env['repair.device.brand'].create({'name': 'Revox'})
+        cls.tmpl = cls.env['product.template'].create({
+            'name': 'B77',
+            'brand_id': cls.brand.id,
+            'categ_id': cls.amp_categ.id,
+        })
+        cls.lot = cls.env['stock.lot'].create({
+            'name': 'RVX001',
+            'product_id': cls.tmpl.product_variant_id.id,
+            'company_id': cls.env.company.id,
+        })
+
+    def _reclassify(self, categ):
+        return self.env['repair.device.reclassify'].with_context(
+            active_model='product.template', active_ids=self.tmpl.ids,
+        ).create({'new_category_id': categ.id})
+
+    def test_wizard_updates_classification(self):
+        self.assertTrue(self.lot.is_hifi_unit)
+        self.assertEqual(self.lot.stock_state, 'client')
+
+        self._reclassify(self.other_categ).action_apply()
+        self.assertEqual(self.tmpl.categ_id, self.other_categ)
+        self.assertFalse(self.tmpl.is_hifi_device)
+        self.assertFalse(self.lot.is_hifi_unit)
+        self.assertFalse(self.lot.stock_state)
+        self.assertEqual(self.lot.hifi_label, 'RVX001')
+
+        self._reclassify(self.amp_categ).action_apply()
+        self.assertTrue(self.tmpl.is_hifi_device)
+        self.assertTrue(self.lot.is_hifi_unit)
+        self.assertEqual(self.lot.stock_state, 'client')
+        self.assertEqual(self.tmpl.hifi_unit_count, 1)
+
+    def test_category_move_reclassifies_subtree(self):
+        self.amp_categ.parent_id = self.other_categ
+        self.assertFalse(self.tmpl.is_hifi_device)
+        self.assertFalse(self.lot.is_hifi_unit)
+        self.assertFalse(self.lot.stock_state)
+
+        self.amp_categ.parent_id = self.hifi_categ
+        self.assertTrue(self.tmpl.is_hifi_device)
+        self.assertTrue(self.lot.is_hifi_unit)
+        self.assertEqual(self.lot.stock_state, 'client')
+
+    def test_category_move_rejects_non_hifi_config(self):
+        consumables = self.env['product.category'].create({
+            'name': 'Consommables', 'parent_id': self.other_categ.id,
+        })
+        cable = self.env['product.template'].create({
+            'name': 'Câble RCA',
+            'detailed_type': 'consu',
+            'categ_id': consumables.id,
+        })
+        with self.assertRaises(ValidationError):
+            consumables.parent_id = self.hifi_categ
+        self.assertFalse(cable.is_hifi_device)
+
+    def test_large_selection_runs_in_background(self):
+        wizard = self._reclassify(self.other_categ)
+        with patch('odoo.addons.repair_devices.wizard.repair_device_reclassify'
+                   '.RECLASSIFY_BACKGROUND_THRESHOLD', 0):
+            wizard.action_apply()
+        self.assertEqual(wizard.state, 'queued')
+        self.assertEqual(self.tmpl.categ_id, self.amp_categ)
+
+        self.env['repair.device.reclassify']._cron_process_reclassify()
+        self.assertEqual(wizard.state, 'done')
+        self.assertEqual(wizard.done_count, 1)
+        self.assertEqual(self.tmpl.categ_id, self.other_categ)
+        self.assertFalse(self.lot.is_hifi_unit)
@@ -85,6 +85,21 @@ class ReviewSmsCase(TransactionCase):
         self.assertEqual(second.review_sms_state, 'skipped')
         self.assertEqual(second.review_sms_skip_reason, "SMS envoyé récemment au client")
 
+    def _mock_gateway(self, fail=False, state='pending'):
+        """Local stand-in for the SMS gateway: accepts (leaving the sms in
+        `state`) or refuses every sms.sms handed to it and records each
+        batch."""
+        batches = []
+
+        def _send(sms_records, unlink_failed=False, unlink_sent=True, raise_exception=False):
+            batches.append(sms_records)
+            if fail:
+                sms_records.write({'state': 'error', 'failure_type': 'sms_server'})
+            else:
+                sms_records.write({'state': state})
+
+        return patch.object(type(self.env['sms.sms']), '_send', _send), batches
+
     def _force_eligible(self, repair, when=None):
         repair.write({
             'review_sms_eligible_date': when or (fields.Datetime.now() - relativedelta(minutes=1)),
@@ -103,12 +118,25 @@ class ReviewSmsCase(TransactionCase):
     def test_cron_sends_eligible_repair(self):
         repair = self._make_delivered_repair()
         self._force_eligible(repair)
-        with patch.object(type(self.template), '_send_review_sms') as mock_send:
+        gateway, batches = self._mock_gateway()
+        with gateway:
             self.Repair._cron_send_review_sms()
-            mock_send.assert_called_once_with(repair.id)
+        self.assertEqual(len(batches), 1)
+        [sms] = batches[0]
+        self.assertEqual(sms.partner_id, self.partner_with_mobile)
+        self.assertIn('Client Avec Mobile', sms.body)
         self.assertEqual(repair.review_sms_state, 'sent')
         self.assertTrue(repair.review_sms_sent_date)
 
+    def test_sms_processing_counts_as_accepted(self):
+        repair = self._make_delivered_repair()
+        self._force_eligible(repair)
+        gateway, _batches = self._mock_gateway(state='process')
+        with gateway:
+            self.Repair._cron_send_review_sms()
+        self.assertEqual(repair.review_sms_state, 'sent')
+        self.assertEqual(repair.review_sms_attempt_count, 0)
+
     def test_cron_dedup_recheck_at_send_time(self):
         # Eligible repair, but a sibling got sent in between
         repair = self._make_delivered_repair()
@@ -131,6 +159,33 @@ class ReviewSmsCase(TransactionCase):
         with patch.object(type(self.template), '_send_review_sms', side_effect=Exception("IAP fail")):
             self.Repair._cron_send_review_sms()
         self.assertEqual(repair.review_sms_state, 'pending')
+        self.assertEqual(repair.review_sms_attempt_count, 1)
+        self.assertEqual(repair.review_sms_error, "IAP fail")
+        self.assertGreater(repair.review_sms_eligible_date, fields.Datetime.now())
+
+    def test_cron_gateway_refusal_backs_off_then_fails(self):
+        repair = self._make_delivered_repair()
+        gateway, batches = self._mock_gateway(fail=True)
+        delays = []
+        with gateway:
+            for _attempt in range(5):
+                self._force_eligible(repair)
+                before = fields.Datetime.now()
+                self.Repair._cron_send_review_sms()
+                if repair.review_sms_state == 'pending':
+                    delays.append(round(
+                        (repair.review_sms_eligible_date - before).total_seconds() / 60))
+        self.assertEqual(len(batches), 5)
+        self.assertEqual(delays, [15, 30, 60, 120])
+        self.assertEqual(repair.review_sms_state, 'failed')
+        self.assertEqual(repair.review_sms_attempt_count, 5)
+
+        repair.action_retry_review_sms()
+        self.assertEqual(repair.review_sms_state, 'pending')
+        gateway, batches = self._mock_gateway()
+        with gateway:
+            self.Repair._cron_send_review_sms()
+        self.assertEqual(repair.review_sms_state, 'sent')
 
     def test_cancel_action_marks_cancelled(self):
         repair = self._make_delivered_repair()
@@ -146,3 +201,46 @@ class ReviewSmsCase(TransactionCase):
             self.Repair._cron_send_review_sms()
             mock_send.assert_not_called()
         self.assertEqual(repair.review_sms_state, 'cancelled')
+
+    def test_cron_sends_once_per_partner_in_batch(self):
+        first = self._make_delivered_repair()
+        second = self.Repair.create({'partner_id': self.partner_with_mobile.id})
+        # Both pending and due, as after a data import.
+        second.write({
+            'review_sms_state': 'pending',
+            'review_sms_eligible_date': fields.Datetime.now(),
+        })
+        self._force_eligible(first)
+        other = self._make_delivered_repair(partner=self.Partner.create({
+            'name': 'Autre Client', 'mobile': '+33622223333',
+        }))
+        self._force_eligible(other)
+        gateway, batches = self._mock_gateway()
+        with gateway:
+            self.Repair._cron_send_review_sms()
+        # One rendering and one gateway batch for the whole due set.
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]), 2)
+        self.assertEqual(
+            sorted([first.review_sms_state, second.review_sms_state]),
+            ['sent', 'skipped'],
+        )
+        self.assertEqual(other.review_sms_state, 'sent')
+
+    def test_review_sms_history_grouped_by_partner(self):
+        repair = self._make_delivered_repair()
+        sent = self.Repair.create({'partner_id': self.partner_with_mobile.id})
+        sent.write({
+            'review_sms_state': 'sent',
+            'review_sms_sent_date': fields.Datetime.now() - relativedelta(months=1),
+        })
+        old = self.Repair.create({'partner_id': self.partner_with_mobile.id})
+        old.write({
+            'review_sms_state': 'sent',
+            'review_sms_sent_date': fields.Datetime.now() - relativedelta(months=12),
+        })
+        history = (repair | sent | old)._get_review_sms_history()
+        self.assertEqual(history, {
+            self.partner_with_mobile.id: {'sent': {sent.id}, 'pending': {repair.id}},
+        })
+        self.assertTrue(repair._review_sms_recently_handled(history))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import HttpCase, tagged
+
+from odoo.addons.repair_custom.controllers import repair_tracking
+
+
+@tagged('post_install', '-at_install', 'repair_custom')
+class TestTrackingStatus(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        partner = cls.env['res.partner'].create({'name': 'Client Suivi'})
+        cls.repair = cls.env['repair.order'].create({'partner_id': partner.id})
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate('admin', 'admin')
+        self.url = f'/repair/tracking/{self.repair.tracking_token}/status'
+
+    def _touch(self, vals):
+        """Write `vals` as a later transaction would: the test shares one
+        transaction with the requests, so write_date would not move."""
+        self.repair.write(vals)
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE repair_order SET write_date = write_date + interval '1 second' WHERE id = %s",
+            [self.repair.id])
+        self.repair.invalidate_recordset(['write_date'])
+
+    def test_status_returns_safe_fields_only(self):
+        resp = self.url_open(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(set(resp.json()), {
+            'state', 'delivery_state', 'entry_date', 'device_id_name', 'appointment_date',
+        })
+        self.assertEqual(resp.json()['state'], self.repair.state)
+
+    def test_status_conditional_requests(self):
+        resp = self.url_open(self.url)
+        etag = resp.headers['ETag']
+        last_modified = resp.headers['Last-Modified']
+        self.assertEqual(
+            self.url_open(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(
+            self.url_open(self.url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+        self._touch({'internal_notes': "Pièce commandée"})
+        resp = self.url_open(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers['ETag'], etag)
+
+    def test_unknown_token_404(self):
+        resp = self.url_open('/repair/tracking/%s/status' % ('x' * 43))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_page_body_rendered_once_per_change(self):
+        page = f'/repair/tracking/{self.repair.tracking_token}'
+        repair_tracking._tracking_page_cache.clear()
+        self.assertIn(self.repair.name, self.url_open(page).text)
+        self.url_open(page)
+        self.assertEqual(len(repair_tracking._tracking_page_cache), 1)
+        self._touch({'internal_notes': "Devis envoyé"})
+        self.assertIn("Devis envoyé", self.url_open(page).text)
+        self.assertEqual(len(repair_tracking._tracking_page_cache), 2)
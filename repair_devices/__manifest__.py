@@ -12,12 +12,14 @@
     "data": [
         'security/ir.model.access.csv',
         'data/product_category_data.xml',
+        'data/repair_device_reclassify_cron.xml',
         "views/device_views.xml",
         "views/product_template_views.xml",
         "views/product_category_views.xml",
         "views/stock_lot_views.xml",
         "views/menu.xml",
         "views/repair_device_reclassify_views.xml",
+        "views/repair_device_catalog_import_views.xml",
     ],
     'post_init_hook': '_post_init_migrate_devices',
     'installable': True,
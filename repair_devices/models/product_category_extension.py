@@ -1,7 +1,29 @@
 from odoo import fields, models
+from odoo.tools import split_every
+
+from .product_template_extension import RECLASSIFY_CHUNK_SIZE
 
 
 class ProductCategory(models.Model):
     _inherit = 'product.category'
 
     short_name = fields.Char(string="Abréviation")
+
+    def write(self, vals):
+        """Moving a category in the tree changes the parent_path of its whole
+        subtree; the HiFi classification of the templates below it is then
+        recomputed in SQL, chunk by chunk, instead of through the ORM
+        cascade on categ_id.parent_path."""
+        if 'parent_id' not in vals:
+            return super().write(vals)
+        templates = self.env['product.template'].with_context(active_test=False).search([
+            ('categ_id', 'child_of', self.ids),
+        ])
+        if not templates:
+            return super().write(vals)
+        lots = templates._get_hifi_lots()
+        with self.env.protecting(templates._get_reclassify_protected(lots)):
+            res = super().write(vals)
+            for chunk in split_every(RECLASSIFY_CHUNK_SIZE, templates.ids, templates.browse):
+                chunk._recompute_hifi_classification(chunk._get_hifi_lots())
+        return res
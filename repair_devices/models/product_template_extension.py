@@ -1,6 +1,47 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
-import re
+from odoo.tools import SQL, split_every
+import unicodedata
+
+from .repair_device import split_brand_prefix
+
+
+# Templates reclassified per chunk by _reclassify_hifi_devices().
+RECLASSIFY_CHUNK_SIZE = 1000
+
+# Operators for which the normalized search column can stand in for the
+# original multi-join ilike domain. The anchored '=ilike'/'=like' match a
+# single field and keep the original domain.
+SEARCH_TEXT_OPERATORS = ('ilike', 'like')
+
+
+def normalize_search_text(*parts):
+    """Lowercase, unaccent and whitespace-collapse the given strings into a
+    single search string ('Müller  Röhre' → 'muller rohre')."""
+    text = ' '.join(p for p in parts if p)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def hifi_model_key(brand_id, name):
+    """Deduplication key of a HiFi model: its brand and normalized name, so
+    that 'sl-1200' and 'SL-1200' are one model."""
+    return brand_id, normalize_search_text(name)
+
+
+def order_by_similarity(model, query, fname, term):
+    """Rank a name_search query by trigram similarity of `fname` to `term`
+    when pg_trgm is available; keep the model order otherwise."""
+    if not model.env.registry.has_trigram:
+        return query
+    query.order = SQL(
+        "similarity(%s, %s) DESC, %s",
+        SQL.identifier(query.table, fname),
+        term,
+        SQL.identifier(query.table, 'id'),
+    )
+    return query
 
 
 class ProductTemplate(models.Model):
@@ -25,9 +66,18 @@ class ProductTemplate(models.Model):
         string="Variantes",
     )
     production_year = fields.Char("Année de sortie")
+    hifi_search_text = fields.Char(
+        "Texte de recherche",
+        compute="_compute_hifi_search_text",
+        store=True,
+        index='trigram',
+        help="Marque + modèle, en minuscules et sans accents. "
+             "Utilisé par l'autocomplétion des modèles.",
+    )
     hifi_unit_count = fields.Integer(
         "# Appareils physiques",
         compute="_compute_hifi_unit_count",
+        store=True,
     )
 
     @api.depends('categ_id', 'categ_id.parent_path')
@@ -43,19 +93,129 @@ class ProductTemplate(models.Model):
                     and rec.categ_id.parent_path.startswith(hifi_cat.parent_path)
                 )
 
+    @api.depends('brand_id.name', 'name')
+    def _compute_hifi_search_text(self):
+        for rec in self:
+            rec.hifi_search_text = normalize_search_text(rec.brand_id.name, rec.name) or False
+
+    @api.depends('is_hifi_device', 'product_variant_ids')
     def _compute_hifi_unit_count(self):
+        """One grouped query for the whole recordset. stock.lot has no inverse
+        relation to depend on, so lot create/write/unlink re-trigger this
+        compute explicitly through _schedule_hifi_unit_count()."""
+        hifi = self.filtered(lambda t: t.is_hifi_device and isinstance(t.id, int))
+        counts = {}
+        if hifi:
+            groups = self.env['stock.lot']._read_group(
+                [('product_id.product_tmpl_id', 'in', hifi.ids), ('is_hifi_unit', '=', True)],
+                ['product_id'],
+                ['__count'],
+            )
+            for product, count in groups:
+                tmpl_id = product.product_tmpl_id.id
+                counts[tmpl_id] = counts.get(tmpl_id, 0) + count
         for rec in self:
-            if rec.is_hifi_device:
-                product = rec.product_variant_id
-                if product:
-                    rec.hifi_unit_count = self.env['stock.lot'].search_count([
-                        ('product_id', '=', product.id),
-                        ('is_hifi_unit', '=', True),
-                    ])
-                else:
-                    rec.hifi_unit_count = 0
-            else:
-                rec.hifi_unit_count = 0
+            rec.hifi_unit_count = counts.get(rec.id, 0)
+
+    def _schedule_hifi_unit_count(self):
+        """Mark hifi_unit_count for recomputation; it is evaluated once, for
+        all scheduled templates, at the next flush or read. Bulk imports set
+        `hifi_defer_unit_count` and schedule their templates once at the end."""
+        if self and not self.env.context.get('hifi_defer_unit_count'):
+            self.env.add_to_compute(self._fields['hifi_unit_count'], self)
+
+    def _get_hifi_lots(self):
+        """All lots of the templates of `self`, in one query."""
+        self.env['stock.lot'].flush_model(['product_id'])
+        self.env.cr.execute("""
+            SELECT l.id FROM stock_lot l
+              JOIN product_product pp ON pp.id = l.product_id
+             WHERE pp.product_tmpl_id = ANY(%s)
+        """, [self.ids])
+        return self.env['stock.lot'].browse([r[0] for r in self.env.cr.fetchall()])
+
+    def _get_reclassify_protected(self, lots):
+        """(fields, records) pairs recomputed in SQL by
+        _recompute_hifi_classification(), hence kept away from the ORM
+        recomputation while the category changes."""
+        return [
+            ([self._fields['is_hifi_device']], self),
+            ([lots._fields[fname] for fname in lots._get_reclassify_protected_fields()], lots),
+        ]
+
+    def _reclassify_hifi_devices(self, vals=None, chunk_size=RECLASSIFY_CHUNK_SIZE,
+                                 auto_commit=False, progress=None):
+        """Write `vals` (category, brand) on the templates chunk by chunk and
+        recompute the classification fields depending on the category with
+        set-based SQL instead of the per-record ORM cascade.
+
+        :param auto_commit: commit after each chunk (background runs)
+        :param progress: optional callable(done, total) called after each chunk
+        """
+        total = len(self)
+        done = 0
+        for chunk in split_every(chunk_size, self.ids, self.browse):
+            lots = chunk._get_hifi_lots()
+            with self.env.protecting(chunk._get_reclassify_protected(lots)):
+                if vals:
+                    chunk.write(vals)
+                chunk._recompute_hifi_classification(lots)
+            self.env.flush_all()
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        return done
+
+    def _recompute_hifi_classification(self, lots):
+        """Set-based recompute of is_hifi_device on `self` and is_hifi_unit on
+        `lots` (their lots) from the current category tree, then of the lot
+        fields depending on it. Only the rows whose value changes are
+        written, and only those are reported as modified to the ORM, so the
+        remaining dependents (labels, unit counts) follow in batch. The
+        HiFi configuration constraint is checked on the changed templates,
+        as the ORM recompute would."""
+        hifi_cat = self.env.ref('repair_devices.product_category_hifi', raise_if_not_found=False)
+        self.flush_recordset(['categ_id'])
+        self.env['product.category'].flush_model(['parent_path'])
+        self.env.cr.execute("""
+            UPDATE product_template pt
+               SET is_hifi_device = COALESCE(c.parent_path LIKE %(prefix)s, FALSE)
+              FROM product_template t
+              LEFT JOIN product_category c ON c.id = t.categ_id
+             WHERE t.id = pt.id
+               AND pt.id = ANY(%(ids)s)
+               AND pt.is_hifi_device IS DISTINCT FROM COALESCE(c.parent_path LIKE %(prefix)s, FALSE)
+            RETURNING pt.id
+        """, {
+            'prefix': f"{hifi_cat.parent_path}%" if hifi_cat and hifi_cat.parent_path else None,
+            'ids': self.ids,
+        })
+        templates = self.browse([r[0] for r in self.env.cr.fetchall()])
+        if not templates:
+            return
+        templates.invalidate_recordset(['is_hifi_device'])
+        templates._validate_fields(['is_hifi_device'])
+        templates.modified(['is_hifi_device'])
+
+        lots.flush_recordset(['is_hifi_unit'])
+        self.env.cr.execute("""
+            UPDATE stock_lot l
+               SET is_hifi_unit = COALESCE(pt.is_hifi_device, FALSE)
+              FROM product_product pp
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE pp.id = l.product_id
+               AND l.id = ANY(%s)
+               AND l.is_hifi_unit IS DISTINCT FROM COALESCE(pt.is_hifi_device, FALSE)
+            RETURNING l.id
+        """, [lots.ids])
+        changed_lots = lots.browse([r[0] for r in self.env.cr.fetchall()])
+        if changed_lots:
+            changed_lots.invalidate_recordset(['is_hifi_unit'])
+            changed_lots._recompute_reclassified_lots()
+            changed_lots.modified(['is_hifi_unit'])
 
     @api.depends("brand_id", "brand_id.name", "name", "is_hifi_device")
     def _compute_display_name(self):
@@ -71,6 +231,17 @@ class ProductTemplate(models.Model):
     @api.model
     def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
         domain = domain or []
+        if name and operator in SEARCH_TEXT_OPERATORS:
+            # Every term must appear in "brand model"; one indexed column
+            # instead of a brand join per term.
+            normalized = normalize_search_text(name)
+            search_domain = [
+                ('hifi_search_text', operator, term) for term in normalized.split()
+            ]
+            query = self._search(search_domain + domain, limit=limit, order=order)
+            if not order:
+                order_by_similarity(self, query, 'hifi_search_text', normalized)
+            return query
         if name:
             search_terms = name.split()
             search_domain = []
@@ -104,33 +275,70 @@ class ProductTemplate(models.Model):
         input_name = self.env.context.get('default_name') or self.env.context.get('default_display_name')
 
         if input_name and not defaults.get('brand_id'):
-            def clean_str(s):
-                return re.sub(r'[^a-z0-9]', '', s.lower()) if s else ''
-
-            input_clean = clean_str(input_name)
-            brands = self.env['repair.device.brand'].search([])
-            sorted_brands = sorted(brands, key=lambda b: len(clean_str(b.name)), reverse=True)
-
-            for brand in sorted_brands:
-                brand_clean = clean_str(brand.name)
-                if brand_clean and input_clean.startswith(brand_clean):
-                    defaults['brand_id'] = brand.id
-                    target_length = len(brand_clean)
-                    current_count = 0
-                    cut_index = 0
-                    for i, char in enumerate(input_name):
-                        if char.isalnum():
-                            current_count += 1
-                        if current_count == target_length:
-                            cut_index = i + 1
-                            break
-                    remainder = input_name[cut_index:].strip()
-                    remainder = re.sub(r'^[^a-zA-Z0-9]+', '', remainder)
-                    defaults['name'] = remainder.upper()
-                    break
+            brand, remainder = self.env['repair.device.brand']._split_brand_prefix(input_name)
+            if brand:
+                defaults['brand_id'] = brand.id
+                defaults['name'] = remainder.upper()
 
         return defaults
 
+    @api.model
+    def _import_hifi_models(self, names, categ=None):
+        """Bulk counterpart of the new-model form: split each 'Brand Model'
+        string on the brand trie and create the missing HiFi templates in
+        one batch, under `categ` (the HiFi root category by default).
+
+        Returns ({name: template}, unmatched) where unmatched lists the
+        names with no known brand prefix or no model after it. Existing
+        (brand, model) pairs, archived ones included, are reused."""
+        trie = self.env['repair.device.brand']._get_brand_trie()
+        keys, vals_list, unmatched = {}, [], []
+        for name in names:
+            brand_id, model = split_brand_prefix(trie, name or '')
+            if brand_id and model:
+                keys[name] = hifi_model_key(brand_id, model)
+                vals_list.append({'brand_id': brand_id, 'name': model})
+            else:
+                unmatched.append(name)
+        if not keys:
+            return {}, unmatched
+        templates, _created = self._get_or_create_hifi_models(vals_list, categ=categ)
+        return {name: templates[key] for name, key in keys.items()}, unmatched
+
+    @api.model
+    def _get_or_create_hifi_models(self, vals_list, categ=None):
+        """Templates for a list of vals holding at least brand_id and name,
+        deduplicated on hifi_model_key: existing templates of the brands,
+        archived ones included, are reused and the missing ones created in
+        one batch under `categ` (the HiFi root category by default), their
+        name uppercased as on the new-model form.
+
+        Returns ({key: template}, created templates)."""
+        categ = categ or self.env.ref('repair_devices.product_category_hifi')
+        wanted = {}
+        for vals in vals_list:
+            name = (vals['name'] or '').strip().upper()
+            wanted.setdefault(hifi_model_key(vals['brand_id'], name), dict(vals, name=name))
+        if not wanted:
+            return {}, self.browse()
+
+        existing = self.with_context(active_test=False).search_fetch(
+            [('brand_id', 'in', list({brand_id for brand_id, _name in wanted}))],
+            ['brand_id', 'name'],
+            order='id',
+        )
+        by_key = {}
+        for template in existing:
+            key = hifi_model_key(template.brand_id.id, template.name)
+            if key in wanted:
+                by_key.setdefault(key, template)
+        missing = [key for key in wanted if key not in by_key]
+        created = self.browse()
+        if missing:
+            created = self.create([dict(wanted[key], categ_id=categ.id) for key in missing])
+            by_key.update(zip(missing, created))
+        return by_key, created
+
     def action_view_lots(self):
         """Open stock.lot records for this HiFi device."""
         self.ensure_one()
@@ -1,6 +1,44 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 from random import randint
+import re
+
+
+# Trie node key holding the brand id that ends at that node; every other key
+# is a single character of the cleaned brand name.
+BRAND_TRIE_END = ''
+
+
+def clean_brand_key(name):
+    """Lowercase ASCII letters and digits only ('Bang & Olufsen' → 'bangolufsen'),
+    the form brand prefixes are matched on."""
+    return re.sub(r'[^a-z0-9]', '', name.lower()) if name else ''
+
+
+def split_brand_prefix(trie, text):
+    """Walk `text` down the brand trie, skipping the characters dropped by
+    clean_brand_key, and return (brand_id, remainder) for the longest brand
+    the text starts with, or (False, text). One pass over the input,
+    whatever the number of brands."""
+    node = trie
+    brand_id, cut_index = False, 0
+    for i, char in enumerate(text):
+        advanced = False
+        for c in char.lower():
+            if not ('a' <= c <= 'z' or '0' <= c <= '9'):
+                continue
+            advanced = True
+            node = node.get(c)
+            if node is None:
+                break
+        if node is None:
+            break
+        if advanced and BRAND_TRIE_END in node:
+            brand_id, cut_index = node[BRAND_TRIE_END], i + 1
+    if not brand_id:
+        return False, text
+    remainder = re.sub(r'^[^a-zA-Z0-9]+', '', text[cut_index:].strip())
+    return brand_id, remainder
 
 
 # --- 1. MARQUES ---------------------------------------------------------
@@ -25,6 +63,52 @@ class RepairDeviceBrand(models.Model):
         ("unique_brand_name", "unique(name)", "Cette marque existe déjà."),
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        brands = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return brands
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @tools.ormcache()
+    def _get_brand_trie(self):
+        """Prefix trie of the cleaned brand names, shared by all requests of
+        the registry until a brand is created, renamed or deleted. Brands
+        cleaning to the same key keep the first one in name order. Read-only:
+        callers must not modify it."""
+        # Pending renames must reach the table before the trie is cached.
+        self.flush_model(['name'])
+        self.env.cr.execute("SELECT id, name FROM repair_device_brand ORDER BY name, id")
+        trie = {}
+        for brand_id, name in self.env.cr.fetchall():
+            key = clean_brand_key(name)
+            if not key:
+                continue
+            node = trie
+            for c in key:
+                node = node.setdefault(c, {})
+            node.setdefault(BRAND_TRIE_END, brand_id)
+        return trie
+
+    @api.model
+    def _split_brand_prefix(self, text):
+        """(brand, remainder) for a typed 'Brand Model' string; an empty
+        brand recordset and the unchanged text when no brand matches."""
+        if not text:
+            return self.browse(), text or ''
+        brand_id, remainder = split_brand_prefix(self._get_brand_trie(), text)
+        return self.browse(brand_id), remainder
+
 
 class RepairDeviceVariant(models.Model):
     _name = "repair.device.variant"
@@ -46,11 +130,10 @@ class RepairDeviceVariant(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         records = super().create(vals_list)
-        for rec, vals in zip(records, vals_list):
-            device_ctx = self.env.context.get('default_product_tmpl_id')
-            if device_ctx:
-                device = self.env['product.template'].browse(device_ctx)
-                device.hifi_variant_ids = [(4, rec.id)]
+        device_ctx = self.env.context.get('default_product_tmpl_id')
+        if device_ctx:
+            device = self.env['product.template'].browse(device_ctx)
+            device.hifi_variant_ids = [(4, rec.id) for rec in records]
         return records
 
     @api.model
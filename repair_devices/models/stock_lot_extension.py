@@ -1,5 +1,11 @@
 from odoo import models, fields, api, _
 
+from .product_template_extension import (
+    SEARCH_TEXT_OPERATORS,
+    normalize_search_text,
+    order_by_similarity,
+)
+
 
 class StockLot(models.Model):
     _inherit = 'stock.lot'
@@ -21,16 +27,46 @@ class StockLot(models.Model):
         'repair.device.variant',
         string="Variante",
     )
+    hifi_search_text = fields.Char(
+        "Texte de recherche",
+        compute="_compute_hifi_search_text",
+        store=True,
+        index='trigram',
+        help="N° de série + marque + modèle + variante, en minuscules et sans "
+             "accents. Utilisé par l'autocomplétion des appareils.",
+    )
+    hifi_label = fields.Char(
+        "Libellé appareil",
+        compute="_compute_hifi_label",
+        store=True,
+        help="'Marque Modèle (Variante) – SN: XXX' pour les appareils HiFi, "
+             "le numéro de série sinon. Maintenu à chaque renommage de marque, "
+             "modèle ou variante.",
+    )
 
-    def format_hifi_label(self, include_serial=True):
-        """Render a HiFi lot as 'Brand Model (Variant) – SN: XXX'.
+    @api.depends('name', 'product_id.product_tmpl_id.hifi_search_text', 'hifi_variant_id.name')
+    def _compute_hifi_search_text(self):
+        for rec in self:
+            rec.hifi_search_text = normalize_search_text(
+                rec.name,
+                rec.product_id.product_tmpl_id.hifi_search_text,
+                rec.hifi_variant_id.name,
+            ) or False
 
-        include_serial=False → just the device label. Use this anywhere
-        you need the full descriptive form without touching display_name.
-        """
+    @api.depends(
+        'name', 'is_hifi_unit', 'product_id.name',
+        'product_id.product_tmpl_id.brand_id.name',
+        'product_id.product_tmpl_id.name',
+        'hifi_variant_id.name',
+    )
+    def _compute_hifi_label(self):
+        for rec in self:
+            rec.hifi_label = rec._build_hifi_label(include_serial=True)
+
+    def _build_hifi_label(self, include_serial=True):
         self.ensure_one()
         if not self.is_hifi_unit:
-            return self.display_name
+            return self.name or ''
         tmpl = self.product_id.product_tmpl_id
         label = tmpl.display_name or self.product_id.name or ""
         if self.hifi_variant_id:
@@ -39,10 +75,33 @@ class StockLot(models.Model):
             label = f"{label} – SN: {self.name}" if label else self.name
         return label
 
+    def format_hifi_label(self, include_serial=True):
+        """Render a HiFi lot as 'Brand Model (Variant) – SN: XXX'.
+
+        include_serial=False → just the device label. Use this anywhere
+        you need the full descriptive form without touching display_name.
+        The serial form is read from the stored hifi_label column.
+        """
+        self.ensure_one()
+        if not self.is_hifi_unit:
+            return self.display_name
+        if include_serial:
+            return self.hifi_label or ''
+        return self._build_hifi_label(include_serial=False)
+
     @api.model
     def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
-        """Search lots by serial number, product name, or brand."""
+        """Search lots by serial number, product name, brand or variant."""
         domain = domain or []
+        if name and operator in SEARCH_TEXT_OPERATORS:
+            normalized = normalize_search_text(name)
+            search_domain = [
+                ('hifi_search_text', operator, term) for term in normalized.split()
+            ]
+            query = self._search(search_domain + domain, limit=limit, order=order)
+            if not order:
+                order_by_similarity(self, query, 'hifi_search_text', normalized)
+            return query
         if name:
             lot_domain = [
                 '|', '|',
@@ -65,17 +124,46 @@ class StockLot(models.Model):
         result = super().name_search(name=name, args=args, operator=operator, limit=limit)
         if self.env.context.get('lot_display') != 'full' or not result:
             return result
-        ids = [r[0] for r in result]
+        # One read of the stored label column for the whole payload.
         rich = {
-            rec.id: rec.format_hifi_label(include_serial=True)
-            for rec in self.browse(ids)
-            if rec.is_hifi_unit
+            row['id']: row['hifi_label']
+            for row in self.browse([r[0] for r in result]).read(['is_hifi_unit', 'hifi_label'])
+            if row['is_hifi_unit']
         }
         return [(rid, rich.get(rid, label)) for rid, label in result]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lots = super().create(vals_list)
+        lots.product_id.product_tmpl_id._schedule_hifi_unit_count()
+        return lots
+
+    def write(self, vals):
+        templates = self.product_id.product_tmpl_id if 'product_id' in vals else None
+        res = super().write(vals)
+        if templates is not None:
+            (templates | self.product_id.product_tmpl_id)._schedule_hifi_unit_count()
+        return res
+
+    def unlink(self):
+        templates = self.product_id.product_tmpl_id
+        res = super().unlink()
+        templates.exists()._schedule_hifi_unit_count()
+        return res
+
     @api.depends('product_id.product_tmpl_id.is_hifi_device')
     def _compute_is_hifi_unit(self):
         for rec in self:
             rec.is_hifi_unit = bool(
                 rec.product_id and rec.product_id.product_tmpl_id.is_hifi_device
             )
+
+    def _get_reclassify_protected_fields(self):
+        """Lot fields recomputed in SQL when templates are reclassified
+        (see product.template._recompute_hifi_classification)."""
+        return ['is_hifi_unit']
+
+    def _recompute_reclassified_lots(self):
+        """Hook called on the lots whose is_hifi_unit was just rewritten in
+        SQL, to recompute the protected fields depending on it."""
+        return
@@ -1,3 +1,4 @@
 # Fichier: wizard/__init__.py
 
-from . import repair_device_reclassify
\ No newline at end of file
+from . import repair_device_reclassify
+from . import repair_device_catalog_import
@@ -0,0 +1,355 @@
+import base64
+import csv
+import io
+import logging
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from ..models.product_template_extension import hifi_model_key, normalize_search_text
+from ..models.repair_device import clean_brand_key
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+_logger = logging.getLogger(__name__)
+
+# Rows resolved, deduplicated and created together.
+CATALOG_IMPORT_CHUNK_SIZE = 5000
+
+# Accepted headers per column, compared after normalize_search_text.
+CATALOG_IMPORT_COLUMNS = {
+    'brand': ('marque', 'brand'),
+    'model': ('modele', 'model', 'nom', 'name'),
+    'variant': ('variante', 'variant'),
+    'serial': ('numero de serie', 'n° de serie', 'n de serie', 'serie', 'serial',
+               'serial number', 'sn', 'lot'),
+    'year': ('annee', 'annee de sortie', 'year', 'production year'),
+}
+
+
+def _brand_key(name):
+    return clean_brand_key(name) or normalize_search_text(name)
+
+
+def _cell_text(value):
+    """Spreadsheet cells come back as numbers for serials and years."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class RepairDeviceCatalogImport(models.TransientModel):
+    """Import of brands, HiFi models, variants and units from one CSV or
+    XLSX file, one row per model or physical unit.
+
+    Rows are read as a stream and handled CATALOG_IMPORT_CHUNK_SIZE at a
+    time: the existing brands and variants are indexed in memory once,
+    models are resolved through product.template._get_or_create_hifi_models
+    once per new (brand, model) key, each chunk creates what is missing
+    with one batch create per record type, and invalid or duplicate rows
+    are reported instead of raising. The stored fields computed from the new records are left to
+    the final flush, and the unit count of the models is recomputed once
+    at the end."""
+    _name = "repair.device.catalog.import"
+    _description = "Import du catalogue d'appareils"
+
+    file = fields.Binary("Fichier", required=True)
+    filename = fields.Char("Nom du fichier")
+    categ_id = fields.Many2one(
+        'product.category',
+        string="Catégorie des nouveaux modèles",
+        required=True,
+        default=lambda self: self.env.ref('repair_devices.product_category_hifi', raise_if_not_found=False),
+    )
+    state = fields.Selection([
+        ('draft', 'Brouillon'),
+        ('done', 'Terminé'),
+    ], default='draft', readonly=True)
+    row_count = fields.Integer("Lignes lues", readonly=True)
+    brand_count = fields.Integer("Marques créées", readonly=True)
+    model_count = fields.Integer("Modèles créés", readonly=True)
+    variant_count = fields.Integer("Variantes créées", readonly=True)
+    lot_count = fields.Integer("Appareils créés", readonly=True)
+    reject_count = fields.Integer("Lignes rejetées", readonly=True)
+    reject_ids = fields.One2many(
+        'repair.device.catalog.import.reject', 'import_id', string="Rejets", readonly=True,
+    )
+
+    def action_import(self):
+        self.ensure_one()
+        result = self._import_rows(self._read_rows())
+        self.env['repair.device.catalog.import.reject'].create([{
+            'import_id': self.id,
+            'row_number': row_number,
+            'reason': reason,
+            'line': line,
+        } for row_number, reason, line in result.pop('rejects')])
+        self.write(dict(result, state='done'))
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # --- Reading -------------------------------------------------------
+
+    def _read_rows(self):
+        """Yield (row number, {column: text}) for each data row of the file."""
+        data = base64.b64decode(self.file)
+        if (self.filename or '').lower().endswith(('.xlsx', '.xlsm')):
+            lines = self._iter_xlsx(data)
+        else:
+            lines = self._iter_csv(data)
+        header = None
+        for row_number, cells in lines:
+            cells = [_cell_text(c) for c in cells]
+            if not any(cells):
+                continue
+            if header is None:
+                header = self._map_header(cells)
+                continue
+            yield row_number, {
+                column: cells[index] if index < len(cells) else ''
+                for column, index in header.items()
+            }
+
+    def _iter_csv(self, data):
+        try:
+            text = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        return enumerate(csv.reader(io.StringIO(text), dialect), start=1)
+
+    def _iter_xlsx(self, data):
+        if load_workbook is None:
+            raise UserError(_("La lecture des fichiers XLSX nécessite la librairie openpyxl."))
+        workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        return enumerate(workbook.active.iter_rows(values_only=True), start=1)
+
+    def _map_header(self, cells):
+        aliases = {
+            alias: column
+            for column, names in CATALOG_IMPORT_COLUMNS.items()
+            for alias in names
+        }
+        header = {}
+        for index, cell in enumerate(cells):
+            column = aliases.get(normalize_search_text(cell))
+            if column:
+                header.setdefault(column, index)
+        if 'model' not in header:
+            raise UserError(_(
+                "Colonne « Modèle » introuvable dans l'en-tête du fichier. "
+                "Colonnes reconnues : Marque, Modèle, Variante, Numéro de série, Année."
+            ))
+        return header
+
+    # --- Import --------------------------------------------------------
+
+    @api.model
+    def _import_rows(self, rows, chunk_size=CATALOG_IMPORT_CHUNK_SIZE):
+        """Import an iterable of (row number, {column: text}) rows; usable
+        without a file. Returns the counters of the wizard and the list of
+        (row number, reason, line) rejects."""
+        importer = self.with_context(
+            tracking_disable=True,
+            mail_create_nolog=True,
+            hifi_defer_unit_count=True,
+        )
+        index = self._load_catalog_index()
+        result = {
+            'row_count': 0, 'brand_count': 0, 'model_count': 0,
+            'variant_count': 0, 'lot_count': 0, 'rejects': [],
+        }
+        templates_with_lots = set()
+        for chunk in split_every(chunk_size, rows):
+            templates_with_lots |= importer._import_chunk(chunk, index, result)
+            _logger.info("Catalogue import: %d rows read", result['row_count'])
+        result['reject_count'] = len(result['rejects'])
+
+        self.env['product.template'].browse(templates_with_lots)._schedule_hifi_unit_count()
+        if index['links']:
+            self.env['product.template'].invalidate_model(['hifi_variant_ids'])
+            self.env['repair.device.variant'].invalidate_model(['device_ids'])
+        self.env.flush_all()
+        return result
+
+    @api.model
+    def _load_catalog_index(self):
+        """In-memory keys of the existing brands and variants, so that rows
+        matching them are reused without a query; models are added as the
+        rows resolve them."""
+        self.env['repair.device.brand'].flush_model(['name'])
+        self.env['repair.device.variant'].flush_model(['name'])
+        cr = self.env.cr
+        cr.execute("SELECT id, name FROM repair_device_brand ORDER BY name, id")
+        brands = {}
+        for brand_id, name in cr.fetchall():
+            brands.setdefault(_brand_key(name), brand_id)
+        cr.execute("SELECT id, name FROM repair_device_variant ORDER BY id")
+        variants = {}
+        for variant_id, name in cr.fetchall():
+            variants.setdefault(normalize_search_text(name), variant_id)
+        return {
+            'brands': brands,
+            'models': {},
+            'variants': variants,
+            'serials': set(),
+            'links': False,
+        }
+
+    def _import_chunk(self, chunk, index, result):
+        """Resolve and create one chunk of rows; returns the ids of the
+        templates that received new units."""
+        rejects = result['rejects']
+        result['row_count'] += len(chunk)
+        Brand = self.env['repair.device.brand']
+        categ = self.categ_id or self.env.ref('repair_devices.product_category_hifi')
+
+        # Brands: explicit column first, otherwise the prefix of the model.
+        rows, new_brands = [], {}
+        for row_number, values in chunk:
+            brand_name, model = values.get('brand', ''), values.get('model', '')
+            if not brand_name and model:
+                brand, model = Brand._split_brand_prefix(model)
+                brand_name = brand.name or ''
+            if not brand_name:
+                rejects.append((row_number, _("Marque manquante ou inconnue"), self._format_line(values)))
+                continue
+            if not model:
+                rejects.append((row_number, _("Modèle manquant"), self._format_line(values)))
+                continue
+            key = _brand_key(brand_name)
+            if key not in index['brands']:
+                new_brands.setdefault(key, brand_name)
+            rows.append((row_number, values, key, model))
+        if new_brands:
+            created = Brand.create([{'name': name} for name in new_brands.values()])
+            index['brands'].update(zip(new_brands, created.ids))
+            result['brand_count'] += len(created)
+
+        # Models, existing or created in one batch.
+        new_models = {}
+        for _row_number, values, brand_key, model in rows:
+            model_key = hifi_model_key(index['brands'][brand_key], model)
+            if model_key not in index['models']:
+                new_models.setdefault(model_key, {
+                    'name': model,
+                    'brand_id': model_key[0],
+                    'production_year': values.get('year') or False,
+                })
+        if new_models:
+            templates, created = self.env['product.template']._get_or_create_hifi_models(
+                list(new_models.values()), categ=categ,
+            )
+            tmpl_ids = [tmpl.id for tmpl in templates.values()]
+            self.env.cr.execute("""
+                SELECT product_tmpl_id, MIN(id) FROM product_product
+                 WHERE product_tmpl_id = ANY(%s) GROUP BY product_tmpl_id
+            """, [tmpl_ids])
+            products = dict(self.env.cr.fetchall())
+            index['models'].update(
+                (key, (tmpl.id, products.get(tmpl.id)))
+                for key, tmpl in templates.items()
+            )
+            result['model_count'] += len(created)
+
+        # Variants, linked to their model.
+        new_variants = {}
+        for _row_number, values, _key, _model in rows:
+            name = values.get('variant')
+            if name and normalize_search_text(name) not in index['variants']:
+                new_variants.setdefault(normalize_search_text(name), name)
+        if new_variants:
+            created = self.env['repair.device.variant'].with_context(
+                default_product_tmpl_id=False,
+            ).create([{'name': name} for name in new_variants.values()])
+            index['variants'].update(zip(new_variants, created.ids))
+            result['variant_count'] += len(created)
+        links = {
+            (self._model_of(index, brand_key, model)[0],
+             index['variants'][normalize_search_text(values['variant'])])
+            for _row_number, values, brand_key, model in rows if values.get('variant')
+        }
+        if links:
+            tmpl_ids, variant_ids = zip(*links)
+            self.env.cr.execute("""
+                INSERT INTO product_template_variant_rel (product_template_id, repair_device_variant_id)
+                SELECT * FROM unnest(%s::int[], %s::int[])
+                ON CONFLICT DO NOTHING
+            """, [list(tmpl_ids), list(variant_ids)])
+            index['links'] = True
+
+        # Units: one lookup of the serials already known for these models.
+        candidates = {}
+        for row_number, values, brand_key, model in rows:
+            serial = values.get('serial')
+            if not serial:
+                continue
+            tmpl_id, product_id = self._model_of(index, brand_key, model)
+            if not product_id:
+                rejects.append((row_number, _("Modèle sans article"), self._format_line(values)))
+                continue
+            if (product_id, serial) in index['serials'] or (product_id, serial) in candidates:
+                rejects.append((row_number, _("Numéro de série en double dans le fichier"),
+                                self._format_line(values)))
+                continue
+            candidates[product_id, serial] = (row_number, values, tmpl_id)
+        if not candidates:
+            return set()
+        company = self.env.company
+        self.env.cr.execute("""
+            SELECT product_id, name FROM stock_lot
+             WHERE (company_id = %s OR company_id IS NULL)
+               AND product_id = ANY(%s) AND name = ANY(%s)
+        """, [company.id,
+              list({product_id for product_id, _serial in candidates}),
+              list({serial for _product_id, serial in candidates})])
+        for key in self.env.cr.fetchall():
+            if key in candidates:
+                row_number, values, _tmpl_id = candidates.pop(key)
+                rejects.append((row_number, _("Numéro de série déjà existant"), self._format_line(values)))
+        index['serials'].update(candidates)
+        if not candidates:
+            return set()
+        self.env['stock.lot'].create([{
+            'name': serial,
+            'product_id': product_id,
+            'company_id': company.id,
+            'hifi_variant_id': index['variants'].get(normalize_search_text(values.get('variant', ''))) or False,
+        } for (product_id, serial), (_row_number, values, _tmpl_id) in candidates.items()])
+        result['lot_count'] += len(candidates)
+        return {tmpl_id for _row_number, _values, tmpl_id in candidates.values()}
+
+    @api.model
+    def _model_of(self, index, brand_key, model):
+        return index['models'][hifi_model_key(index['brands'][brand_key], model)]
+
+    @api.model
+    def _format_line(self, values):
+        return ' ; '.join(values.get(column, '') for column in CATALOG_IMPORT_COLUMNS)
+
+
+class RepairDeviceCatalogImportReject(models.TransientModel):
+    _name = "repair.device.catalog.import.reject"
+    _description = "Ligne rejetée de l'import du catalogue"
+    _order = "row_number"
+
+    import_id = fields.Many2one(
+        'repair.device.catalog.import', required=True, ondelete='cascade',
+    )
+    row_number = fields.Integer("Ligne")
+    reason = fields.Char("Motif")
+    line = fields.Char("Contenu")
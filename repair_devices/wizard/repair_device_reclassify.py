@@ -1,9 +1,16 @@
+import threading
+
 from odoo import models, fields, api, _
 
+# Au-delà, le reclassement est confié au cron et suivi par notifications.
+RECLASSIFY_BACKGROUND_THRESHOLD = 2000
+
 
 class RepairDeviceReclassify(models.TransientModel):
     _name = "repair.device.reclassify"
     _description = "Réassignation de masse des appareils"
+    # Une réassignation en file d'attente doit survivre jusqu'au passage du cron.
+    _transient_max_hours = 24.0
 
     # Les appareils sélectionnés (rempli automatiquement par le contexte)
     device_ids = fields.Many2many('product.template', string="Appareils à déplacer")
@@ -22,6 +29,14 @@ class RepairDeviceReclassify(models.TransientModel):
         help="Laisser vide pour conserver la marque actuelle"
     )
 
+    # Suivi des réassignations faites en arrière-plan
+    state = fields.Selection([
+        ('draft', 'Brouillon'),
+        ('queued', 'En attente'),
+        ('done', 'Terminé'),
+    ], default='draft', readonly=True)
+    done_count = fields.Integer("Appareils traités", readonly=True)
+
     @api.model
     def default_get(self, fields):
         res = super(RepairDeviceReclassify, self).default_get(fields)
@@ -30,14 +45,33 @@ class RepairDeviceReclassify(models.TransientModel):
             res['device_ids'] = [(6, 0, active_ids)]
         return res
 
-    def action_apply(self):
-        self.ensure_one()
+    def _get_reclassify_vals(self):
         vals = {'categ_id': self.new_category_id.id}
 
         if self.new_brand_id:
             vals['brand_id'] = self.new_brand_id.id
+        return vals
 
-        self.device_ids.write(vals)
+    def action_apply(self):
+        self.ensure_one()
+
+        if len(self.device_ids) > RECLASSIFY_BACKGROUND_THRESHOLD:
+            self.state = 'queued'
+            self.env.ref('repair_devices.ir_cron_repair_device_reclassify')._trigger()
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _("Réassignation lancée"),
+                    'message': _("%s appareils seront déplacés vers %s en arrière-plan. "
+                                 "Vous serez notifié de l'avancement.")
+                               % (len(self.device_ids), self.new_category_id.display_name),
+                    'type': 'info',
+                    'sticky': False,
+                }
+            }
+
+        self.device_ids._reclassify_hifi_devices(self._get_reclassify_vals())
 
         return {
             'type': 'ir.actions.client',
@@ -49,3 +83,37 @@ class RepairDeviceReclassify(models.TransientModel):
                 'sticky': False,
             }
         }
+
+    @api.model
+    def _cron_process_reclassify(self):
+        """Traite les réassignations en attente, par lots, avec un commit et
+        une notification d'avancement au demandeur après chaque lot. Une
+        exécution interrompue reprend après le dernier lot validé."""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for wizard in self.search([('state', '=', 'queued')], order='id'):
+            ids = sorted(wizard.device_ids.ids)
+            todo = self.env['product.template'].browse(ids[wizard.done_count:])
+            total = len(ids)
+
+            def progress(done, _total, wizard=wizard, start=wizard.done_count):
+                wizard.done_count = start + done
+                wizard._notify_reclassify_progress(start + done, total)
+
+            todo._reclassify_hifi_devices(
+                wizard._get_reclassify_vals(), auto_commit=auto_commit, progress=progress,
+            )
+            wizard.state = 'done'
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _notify_reclassify_progress(self, done, total):
+        partner = self.create_uid.partner_id
+        if done < total:
+            title, message = _("Réassignation en cours"), _("%(done)s / %(total)s appareils déplacés vers %(categ)s.")
+        else:
+            title, message = _("Réassignation terminée"), _("%(done)s appareils déplacés vers %(categ)s.")
+        self.env['bus.bus']._sendone(partner, 'simple_notification', {
+            'title': title,
+            'message': message % {'done': done, 'total': total, 'categ': self.new_category_id.display_name},
+            'sticky': done >= total,
+        })
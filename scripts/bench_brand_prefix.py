@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Latency benchmark for the brand prefix detection of the new-model form.
+
+Seeds 5k brands with raw SQL, then times the former linear scan (search all
+brands, clean and sort them by length, test each prefix) against the
+cached brand trie for a set of typed model names, with a warm cache and
+once with the registry cache cleared before every call, and finally the
+bulk `_import_hifi_models` path. Everything runs in the current
+transaction and is rolled back at the end — nothing is kept.
+
+Usage (inside `./odoo-bin shell -c ../odoo.conf -d hifi-vintage --no-http`):
+    exec(open('/Users/martin/Documents/odoo_dev/custom_addons/scripts/bench_brand_prefix.py').read())
+    bench(env)                 # defaults: 5k brands, 200 runs per query
+    bench(env, brands=20000, runs=50)
+"""
+import logging
+import re
+import statistics
+import time
+
+_logger = logging.getLogger("bench_brand_prefix")
+
+QUERIES = ["Marantz 2270", "Bench Brand 04999 GX-636", "bang & olufsen beogram 4000",
+           "Technics SL-1200", "Unknown Model 12"]
+
+
+def _log(msg):
+    _logger.warning("[bench_brand_prefix] " + msg)
+    print("[bench_brand_prefix] " + msg)
+
+
+def _seed(env, brands):
+    env.cr.execute("""
+        INSERT INTO repair_device_brand (name, create_uid, write_uid, create_date, write_date)
+        SELECT 'Bench Brand ' || lpad(i::text, 5, '0'), 1, 1, NOW(), NOW()
+          FROM generate_series(1, %s) i
+        ON CONFLICT DO NOTHING
+    """, [brands])
+    env.registry.clear_cache()
+
+
+def _linear_scan(env, input_name):
+    """The detection as it was before the trie, kept for comparison."""
+    def clean_str(s):
+        return re.sub(r'[^a-z0-9]', '', s.lower()) if s else ''
+
+    input_clean = clean_str(input_name)
+    brands = env['repair.device.brand'].search([])
+    for brand in sorted(brands, key=lambda b: len(clean_str(b.name)), reverse=True):
+        brand_clean = clean_str(brand.name)
+        if brand_clean and input_clean.startswith(brand_clean):
+            return brand.id
+    return False
+
+
+def _time(fn, runs, cold=None):
+    samples = []
+    for _i in range(runs):
+        if cold:
+            cold()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench(env, brands=5000, runs=200, imports=5000):
+    _log(f"seeding {brands} brands ...")
+    env.cr.execute("SAVEPOINT bench_brand_prefix")
+    try:
+        _seed(env, brands)
+        Brand = env['repair.device.brand']
+        total = Brand.search_count([])
+        _log(f"{total} brands in database")
+        for query in QUERIES:
+            linear = _linear_scan(env, query)
+            brand, _remainder = Brand._split_brand_prefix(query)
+            if linear != brand.id:
+                _log(f"MISMATCH on {query!r}: linear {linear} trie {brand.id}")
+            p50, p95 = _time(lambda: _linear_scan(env, query), max(runs // 20, 5),
+                             cold=env.invalidate_all)
+            _log(f"{'linear':>10} {query!r:>32}: p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+            p50, p95 = _time(lambda: Brand._split_brand_prefix(query), runs)
+            _log(f"{'trie warm':>10} {query!r:>32}: p50 {p50:8.3f} ms  p95 {p95:8.3f} ms")
+        p50, p95 = _time(lambda: Brand._split_brand_prefix(QUERIES[0]), max(runs // 20, 5),
+                         cold=env.registry.clear_cache)
+        _log(f"trie rebuild (cold cache): p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+
+        names = [f"Bench Brand {1 + i % brands:05d} MODEL-{i}" for i in range(imports)]
+        start = time.perf_counter()
+        templates, unmatched = env['product.template'].with_context(
+            tracking_disable=True)._import_hifi_models(names)
+        env.flush_all()
+        elapsed = time.perf_counter() - start
+        _log(f"bulk import: {len(templates)} models, {len(unmatched)} unmatched "
+             f"in {elapsed:.2f} s ({len(names) / elapsed:,.0f} names/s)")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_brand_prefix")
+        env.invalidate_all()
+        env.registry.clear_cache()
+        _log("rolled back")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark for the HiFi catalogue importer.
+
+Builds an in-memory CSV of physical units spread over a few thousand
+models, brands and variants (with some duplicate and incomplete rows),
+then runs `repair.device.catalog.import` on it and reports rows per
+second, created records and rejects. Everything runs in the current
+transaction and is rolled back at the end — nothing is kept.
+
+Usage (inside `./odoo-bin shell -c ../odoo.conf -d hifi-vintage --no-http`):
+    exec(open('/Users/martin/Documents/odoo_dev/custom_addons/scripts/bench_catalog_import.py').read())
+    bench(env)                 # defaults: 100k rows, 5k models, 500 brands
+    bench(env, rows=20000)
+"""
+import base64
+import csv
+import io
+import logging
+import time
+
+_logger = logging.getLogger("bench_catalog_import")
+
+
+def _log(msg):
+    _logger.warning("[bench_catalog_import] " + msg)
+    print("[bench_catalog_import] " + msg)
+
+
+def _build_csv(rows, models, brands, variants):
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=';')
+    writer.writerow(["Marque", "Modèle", "Variante", "Numéro de série", "Année"])
+    for i in range(rows):
+        model = i % models
+        writer.writerow([
+            f"Bench Marque {model % brands:04d}",
+            f"BENCH-{model:05d}" if i % 997 else "",
+            f"Finition {i % variants}" if i % 3 == 0 else "",
+            # Every 500th row repeats the serial of the previous unit of its model.
+            f"SN{(i - models if i % 500 == 0 and i >= models else i):08d}",
+            1970 + model % 30,
+        ])
+    return out.getvalue().encode('utf-8')
+
+
+def bench(env, rows=100000, models=5000, brands=500, variants=40):
+    _log(f"building {rows} rows / {models} models / {brands} brands ...")
+    data = _build_csv(rows, models, brands, variants)
+    env.cr.execute("SAVEPOINT bench_catalog_import")
+    try:
+        wizard = env['repair.device.catalog.import'].create({
+            'file': base64.b64encode(data),
+            'filename': 'bench.csv',
+        })
+        start = time.perf_counter()
+        wizard.action_import()
+        elapsed = time.perf_counter() - start
+        _log(f"imported in {elapsed:.1f} s ({wizard.row_count / elapsed:,.0f} rows/s)")
+        _log(f"created: {wizard.brand_count} brands, {wizard.model_count} models, "
+             f"{wizard.variant_count} variants, {wizard.lot_count} units")
+        _log(f"rejected: {wizard.reject_count} rows")
+        for reject in wizard.reject_ids[:5]:
+            _log(f"  row {reject.row_number}: {reject.reason}")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_catalog_import")
+        env.invalidate_all()
+        env.registry.clear_cache()
+        _log("rolled back")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Latency benchmark for the HiFi lot / model autocompletes (trigram search).
+
+Seeds 100k HiFi lots spread over 2k models and 200 brands with raw SQL,
+recomputes the stored search columns, then times `name_search` on
+stock.lot (plain and `lot_display='full'`) and product.template for a set
+of typical counter queries. Everything runs in the current transaction and
+is rolled back at the end — nothing is kept.
+
+Usage (inside `./odoo-bin shell -c ../odoo.conf -d hifi-vintage --no-http`):
+    exec(open('/Users/martin/Documents/odoo_dev/custom_addons/scripts/bench_lot_search.py').read())
+    bench(env)                 # defaults: 100k lots, 50 runs per query
+    bench(env, lots=20000)
+"""
+import logging
+import statistics
+import time
+
+_logger = logging.getLogger("bench_lot_search")
+
+QUERIES = ["marantz", "2270", "mar 22", "técnics sl", "SN-0004", "akai gx"]
+
+
+def _log(msg):
+    _logger.warning("[bench_lot_search] " + msg)
+    print("[bench_lot_search] " + msg)
+
+
+def _seed(env, lots, models, brands):
+    cr = env.cr
+    hifi_cat = env.ref('repair_devices.product_category_hifi')
+    company = env.company
+    cr.execute("""
+        INSERT INTO repair_device_brand (name, create_uid, write_uid, create_date, write_date)
+        SELECT 'Bench Brand ' || i, 1, 1, NOW(), NOW()
+          FROM generate_series(1, %s) i
+        RETURNING id
+    """, [brands])
+    brand_ids = [r[0] for r in cr.fetchall()]
+    Template = env['product.template'].with_context(tracking_disable=True)
+    templates = Template.create([{
+        'name': f"BENCH {i:05d}",
+        'brand_id': brand_ids[i % len(brand_ids)],
+        'categ_id': hifi_cat.id,
+    } for i in range(models)])
+    env.flush_all()
+    cr.execute("""
+        INSERT INTO stock_lot (name, product_id, company_id, is_hifi_unit,
+                               create_uid, write_uid, create_date, write_date)
+        SELECT 'SN-' || lpad(i::text, 7, '0'),
+               products[1 + (i %% array_length(products, 1))],
+               %s, TRUE, 1, 1, NOW(), NOW()
+          FROM generate_series(1, %s) i,
+               (SELECT array_agg(id) AS products FROM product_product
+                 WHERE product_tmpl_id = ANY(%s)) p
+        RETURNING id
+    """, [company.id, lots, templates.ids])
+    lot_ids = [r[0] for r in cr.fetchall()]
+    Lot = env['stock.lot']
+    for start in range(0, len(lot_ids), 10000):
+        chunk = Lot.browse(lot_ids[start:start + 10000])
+        chunk._compute_hifi_search_text()
+        chunk.flush_recordset(['hifi_search_text'])
+        env.invalidate_all()
+    cr.execute("ANALYZE stock_lot")
+    cr.execute("ANALYZE product_template")
+
+
+def _time(fn, runs):
+    samples = []
+    for _i in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench(env, lots=100000, models=2000, brands=200, runs=50):
+    _log(f"seeding {lots} lots / {models} models / {brands} brands ...")
+    env.cr.execute("SAVEPOINT bench_lot_search")
+    try:
+        _seed(env, lots, models, brands)
+        _log(f"pg_trgm available: {env.registry.has_trigram}")
+        Lot = env['stock.lot']
+        LotFull = Lot.with_context(lot_display='full')
+        Template = env['product.template']
+        for query in QUERIES:
+            for label, model in (("lot", Lot), ("lot full", LotFull), ("template", Template)):
+                p50, p95 = _time(lambda: model.name_search(query, limit=8), runs)
+                _log(f"{label:>9} {query!r:>14}: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_lot_search")
+        env.invalidate_all()
+        _log("rolled back")
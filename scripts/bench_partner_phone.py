@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark for partner phone formatting (partner_custom).
+
+Seeds 100k partners with raw SQL, their phone / mobile written the
+messy ways they arrive from imports ("0612345678", "+33 6 12 34 56 78",
+"06.12.34.56.78", foreign numbers...), then times:
+
+* the former per-partner loop (format both numbers, one write each) on
+  a sample, extrapolated to the whole set;
+* `_format_phone_numbers_bulk` on all of them;
+* `_format_phone_vals` over the create() payloads of 10k partners, with
+  the formatting memo hit rate.
+
+Everything runs in the current transaction and is rolled back at the
+end — nothing is kept (the bulk formatter runs with auto_commit=False).
+
+`bench_lookup` seeds 200k partners the same way and times caller
+lookups through the E.164 index (`phone_lookup` search and
+`name_search`) against the former ilike scan on phone / mobile.
+
+Usage (inside `./odoo-bin shell -c ../odoo.conf -d hifi-vintage --no-http`):
+    exec(open('/Users/martin/Documents/odoo_dev/custom_addons/scripts/bench_partner_phone.py').read())
+    bench(env)                 # defaults: 100k partners, 2k sample
+    bench(env, partners=20000)
+    bench_lookup(env)          # defaults: 200k partners, 200 runs per query
+"""
+import logging
+import statistics
+import time
+
+from odoo.addons.partner_custom.models.res_partner import format_national
+from odoo.addons.phone_validation.tools import phone_validation
+
+_logger = logging.getLogger("bench_partner_phone")
+
+PATTERNS = [
+    "06{:08d}", "+33 6 {:08d}", "07.{:08d}", "01 {:08d}", "+49 151 {:08d}", "0032 47{:07d}",
+]
+
+
+def _log(msg):
+    _logger.warning("[bench_partner_phone] " + msg)
+    print("[bench_partner_phone] " + msg)
+
+
+def _seed(env, partners):
+    cr = env.cr
+    france = env.ref('base.fr')
+    # Numbers repeat the way real contact lists do (households, shops,
+    # duplicates): ~60% distinct.
+    numbers = [PATTERNS[i % len(PATTERNS)].format((i * 7919) % int(partners * 0.6))
+               for i in range(partners)]
+    cr.execute("""
+        INSERT INTO res_partner (name, phone, mobile, country_id, active, type,
+                                 create_uid, write_uid, create_date, write_date)
+        SELECT 'Bench Client ' || n, v.phone, v.mobile, %s, TRUE, 'contact',
+               1, 1, NOW(), NOW()
+          FROM unnest(%s::varchar[], %s::varchar[]) WITH ORDINALITY AS v(phone, mobile, n)
+        RETURNING id
+    """, [france.id, numbers, numbers[::-1]])
+    return env['res.partner'].browse([r[0] for r in cr.fetchall()])
+
+
+def _legacy_loop(partners):
+    """The per-partner loop the bulk formatter replaced."""
+    for partner in partners:
+        vals = {}
+        country = partner.country_id or partner.env.company.country_id
+        for field in ('phone', 'mobile'):
+            if partner[field]:
+                formatted = phone_validation.phone_format(
+                    partner[field], country.code or 'FR', country.phone_code,
+                    force_format='NATIONAL', raise_exception=False,
+                )
+                if formatted and formatted != partner[field]:
+                    vals[field] = formatted
+        if vals:
+            partner.with_context(skip_phone_format=True).write(vals)
+
+
+def bench(env, partners=100000, sample=2000):
+    _log(f"seeding {partners} partners ...")
+    env.cr.execute("SAVEPOINT bench_partner_phone")
+    try:
+        records = _seed(env, partners)
+        env.cr.execute("ANALYZE res_partner")
+
+        start = time.perf_counter()
+        env.cr.execute("SAVEPOINT bench_partner_phone_legacy")
+        _legacy_loop(records[:sample])
+        env.flush_all()
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_partner_phone_legacy")
+        env.invalidate_all()
+        legacy = (time.perf_counter() - start) * partners / sample
+        _log(f"legacy loop: {legacy:8.1f} s (extrapolated from {sample})")
+
+        format_national.cache_clear()
+        start = time.perf_counter()
+        count = records._format_phone_numbers_bulk(auto_commit=False)
+        bulk = time.perf_counter() - start
+        _log(f"bulk formatter: {bulk:8.1f} s, {count} partners changed, "
+             f"{partners / bulk:,.0f} partners/s ({legacy / bulk:.0f}x)")
+
+        format_national.cache_clear()
+        payloads = [{'name': f"Import {i}", 'phone': PATTERNS[i % len(PATTERNS)].format(i % 3000)}
+                    for i in range(10000)]
+        Partner = env['res.partner']
+        start = time.perf_counter()
+        for vals in payloads:
+            Partner._format_phone_vals(vals)
+        elapsed = time.perf_counter() - start
+        info = format_national.cache_info()
+        _log(f"create payloads: {len(payloads) / elapsed:,.0f} vals/s, "
+             f"memo hits {info.hits} / misses {info.misses}")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_partner_phone")
+        env.invalidate_all()
+        _log("rolled back")
+
+
+LOOKUP_QUERIES = ["06 00 00 07 91", "+33600000791", "0600000791", "06.00.00.07.91", "07 99 99 99 99"]
+
+
+def _time(fn, runs):
+    samples = []
+    for _i in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench_lookup(env, partners=200000, runs=200):
+    _log(f"seeding {partners} partners ...")
+    env.cr.execute("SAVEPOINT bench_partner_phone")
+    try:
+        records = _seed(env, partners)
+        records._format_phone_numbers_bulk(auto_commit=False)  # fills the E.164 keys
+        env.cr.execute("ANALYZE res_partner")
+        Partner = env['res.partner']
+        for query in LOOKUP_QUERIES:
+            cases = [
+                ("e164 search", lambda: Partner.search([('phone_lookup', '=', query)], limit=8)),
+                ("name_search", lambda: Partner.name_search(query, limit=8)),
+                ("ilike scan", lambda: Partner.search(
+                    ['|', ('phone', 'ilike', query), ('mobile', 'ilike', query)], limit=8)),
+            ]
+            for label, fn in cases:
+                p50, p95 = _time(fn, runs)
+                _log(f"{label:>11} {query!r:>18}: p50 {p50:7.3f} ms  p95 {p95:7.3f} ms"
+                     f"  ({len(fn())} found)")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_partner_phone")
+        env.invalidate_all()
+        _log("rolled back")
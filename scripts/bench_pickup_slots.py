@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark for the pickup availability computation.
+
+Seeds a few pickup locations with slotted schedules, closures and
+scheduled appointments, then times `_compute_available_days` (portal
+window), `_is_day_available` (booking check) and the backend capacity
+overlay with a warm registry cache, and once with the cache cleared
+before every call for comparison. Everything runs in the current
+transaction and is rolled back at the end — nothing is kept.
+
+Usage (inside `./odoo-bin shell -c ../odoo.conf -d hifi-vintage --no-http`):
+    exec(open('/Users/martin/Documents/odoo_dev/custom_addons/scripts/bench_pickup_slots.py').read())
+    bench(env)                 # defaults: 5 locations, 2000 bookings, 200 runs
+    bench(env, horizon=60)
+"""
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from odoo import fields
+
+_logger = logging.getLogger("bench_pickup_slots")
+
+
+def _log(msg):
+    _logger.warning("[bench_pickup_slots] " + msg)
+    print("[bench_pickup_slots] " + msg)
+
+
+def _seed(env, locations, bookings, horizon):
+    today = fields.Date.today()
+    Location = env['repair.pickup.location']
+    records = Location.create([{'name': f"Bench Lieu {i}"} for i in range(locations)])
+    schedules = env['repair.pickup.schedule'].create([{
+        'location_id': location.id,
+        'daily_capacity': 40,
+    } for location in records])
+    env['repair.pickup.slot'].create([{
+        'schedule_id': schedule.id,
+        'weekday': str(weekday),
+        'time_from': start,
+        'time_to': start + 1.5,
+        'capacity': 8,
+    } for schedule in schedules for weekday in range(6) for start in (10.0, 11.5, 14.0, 15.5, 17.0)])
+    env['repair.pickup.closure'].create([{
+        'name': f"Bench fermeture {i}",
+        'location_id': records[i % locations].id,
+        'date_from': today + timedelta(days=5 + 7 * i),
+        'date_to': today + timedelta(days=6 + 7 * i),
+    } for i in range(horizon // 7)])
+    partner = env['res.partner'].create({'name': 'Bench Client'})
+    batches = env['repair.batch'].create([{
+        'partner_id': partner.id,
+        'repair_ids': [(0, 0, {
+            'partner_id': partner.id,
+            'pickup_location_id': records[i % locations].id,
+        })],
+    } for i in range(bookings)])
+    appointments = env['repair.pickup.appointment'].create([
+        {'batch_id': batch.id} for batch in batches
+    ])
+    env.flush_all()
+    # Raw SQL: spread the bookings without going through capacity checks.
+    env.cr.execute("""
+        UPDATE repair_pickup_appointment
+           SET state = 'scheduled',
+               pickup_date = %s::date + (2 + id %% %s)
+         WHERE id = ANY(%s)
+    """, [today, horizon - 2, appointments.ids])
+    env.invalidate_all()
+    env.cr.execute("ANALYZE repair_pickup_appointment")
+    return records, appointments
+
+
+def _time(fn, runs, cold=None):
+    samples = []
+    for _i in range(runs):
+        if cold:
+            cold()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench(env, locations=5, bookings=2000, horizon=30, runs=200):
+    _log(f"seeding {locations} locations / {bookings} bookings / {horizon} days ...")
+    env.cr.execute("SAVEPOINT bench_pickup_slots")
+    try:
+        records, appointments = _seed(env, locations, bookings, horizon)
+        Appointment = env['repair.pickup.appointment']
+        location = records[0]
+        apt = appointments[0]
+        day = apt.pickup_date
+        today = fields.Date.today()
+        cases = [
+            ("available days", lambda: Appointment._compute_available_days(
+                location, booking_horizon_days=horizon)),
+            ("is_day_available", lambda: apt._is_day_available(day)),
+            ("overlay", lambda: Appointment._get_capacity_overlay(
+                today, today + timedelta(days=horizon), records)),
+        ]
+        for label, fn in cases:
+            for mode, cold in (("warm", None), ("cold", env.registry.clear_cache)):
+                p50, p95 = _time(lambda: (env.invalidate_all(), fn()), runs, cold)
+                _log(f"{label:>16} {mode}: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms"
+                     f"  ({1000 / p50 if p50 else 0:,.0f}/s)")
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT bench_pickup_slots")
+        env.invalidate_all()
+        env.registry.clear_cache()
+        _log("rolled back")